@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+为已有的健康报告项目解析数值、参考范围和单位（迁移10之后执行一次，可以重复执行）
+
+用法:
+    python backfill_report_items.py                   解析所有项目的数值列
+    python backfill_report_items.py --batch-size 5000 指定每批处理的项目数
+    python backfill_report_items.py --refresh-status  同时按项目重新计算所有报告的状态
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.extensions.database import db
+from src.utils.report_values import backfill_report_items, refresh_report_statuses
+
+def main():
+    parser = argparse.ArgumentParser(description='回填健康报告项目的数值列')
+    parser.add_argument('--batch-size', type=int, help='每批处理的项目数，默认REPORT_ITEM_BACKFILL_BATCH')
+    parser.add_argument('--refresh-status', action='store_true', help='按项目重新计算报告状态，覆盖原有状态')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        started = time.perf_counter()
+        items = backfill_report_items(batch_size=args.batch_size)
+        print(f"报告项目回填完成: {items}个项目，耗时{time.perf_counter() - started:.1f}秒")
+        if args.refresh_status:
+            reports = refresh_report_statuses()
+            db.session.commit()
+            print(f"报告状态更新完成: {reports}份报告")
+
+if __name__ == "__main__":
+    main()
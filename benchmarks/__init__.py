@@ -0,0 +1 @@
+"""接口压测与基准测试工具，用法见 python -m benchmarks.run --help"""
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+千问医疗问答服务的本地替身
+
+实现 /api/medical_qa 和 /health 接口，可配置延迟、分块慢速返回、流式输出以及错误和
+超时注入，用于在没有真实模型服务时测试和压测客户端代码（连接池、超时、重试等）。
+
+用法:
+    python -m benchmarks.qwen_standin --port 8000 --latency 0.2 --error-rate 0.05
+    QWEN_API_URL=http://127.0.0.1:8000 python run.py
+
+运行中可通过 POST /admin/config 修改故障注入参数，GET /admin/stats 查看请求数和连接数。
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_OPTIONS = {
+    'latency': 0.0,          # 基础延迟（秒）
+    'jitter': 0.0,           # 在基础延迟上随机增加的最大延迟（秒）
+    'error_rate': 0.0,       # 返回500的概率
+    'unavailable_rate': 0.0, # 返回503（模型未加载）的概率
+    'hang_rate': 0.0,        # 挂起hang_seconds秒后才响应的概率，用于触发客户端超时
+    'hang_seconds': 60.0,
+    'chunk_delay': 0.0,      # 响应体分块发送时每块之间的间隔（秒）
+    'chunk_size': 64,        # 分块发送时每块的字节数
+    'answer': '建议规律作息、低盐饮食，定期监测血压，如有不适请及时就医。'
+}
+
+
+class QwenStandinHandler(BaseHTTPRequestHandler):
+    # 使用HTTP/1.1以支持长连接，客户端的连接复用才能生效
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.record('connections')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'healthy', 'model_path': 'standin'})
+        elif self.path == '/admin/stats':
+            self._send_json(200, self.server.snapshot_stats())
+        else:
+            self._send_json(404, {'detail': 'Not Found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(422, {'detail': '请求体不是合法的JSON'})
+
+        if self.path == '/admin/config':
+            self.server.options.update({key: value for key, value in body.items() if key in DEFAULT_OPTIONS})
+            return self._send_json(200, self.server.options)
+        if self.path != '/api/medical_qa':
+            return self._send_json(404, {'detail': 'Not Found'})
+        self._medical_qa(body)
+
+    def _medical_qa(self, body):
+        options = dict(self.server.options)
+        self.server.record('requests')
+        started = time.time()
+
+        if not body.get('query'):
+            return self._send_json(422, {'detail': [{'loc': ['body', 'query'], 'msg': 'field required'}]})
+        language = body.get('language', 'chinese')
+        if language not in ('chinese', 'mongolian'):
+            return self._send_json(400, {'detail': "语言参数无效，支持'chinese'或'mongolian'"})
+
+        roll = random.random()
+        if roll < options['hang_rate']:
+            self.server.record('hangs')
+            time.sleep(options['hang_seconds'])
+        time.sleep(options['latency'] + random.uniform(0, options['jitter']))
+
+        roll = random.random()
+        if roll < options['error_rate']:
+            self.server.record('errors')
+            return self._send_json(500, {'detail': '模型推理错误: 注入的故障'})
+        if roll < options['error_rate'] + options['unavailable_rate']:
+            self.server.record('errors')
+            return self._send_json(503, {'detail': '模型尚未加载或加载失败，请稍后再试或检查服务器日志。'})
+
+        answer = options['answer']
+        if body.get('stream'):
+            return self._stream_answer(answer, started, options)
+        self._send_json(200, {'response': answer, 'time_taken': round(time.time() - started, 2)}, options)
+
+    def _stream_answer(self, answer, started, options):
+        # 逐字输出NDJSON，最后一行给出总耗时
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for char in answer:
+            self._write_chunk(json.dumps({'delta': char}, ensure_ascii=False).encode('utf-8') + b'\n')
+            time.sleep(options['chunk_delay'])
+        self._write_chunk(json.dumps({'done': True, 'time_taken': round(time.time() - started, 2)}).encode('utf-8') + b'\n')
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, options=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        # 分块慢速发送响应体，模拟网络缓慢，客户端的读取超时按块间隔计算
+        if options and options['chunk_delay']:
+            for start in range(0, len(data), options['chunk_size']):
+                self.wfile.write(data[start:start + options['chunk_size']])
+                self.wfile.flush()
+                time.sleep(options['chunk_delay'])
+        else:
+            self.wfile.write(data)
+
+
+class QwenStandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, **options):
+        super().__init__(address, QwenStandinHandler)
+        self.options = {**DEFAULT_OPTIONS, **options}
+        self.stats = {'connections': 0, 'requests': 0, 'errors': 0, 'hangs': 0}
+        self._stats_lock = threading.Lock()
+
+    def record(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def snapshot_stats(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """
+    在后台线程中启动替身服务
+
+    Args:
+        host (str): 监听地址
+        port (int): 端口，0表示随机分配
+        **options: 故障注入参数，见DEFAULT_OPTIONS
+
+    Returns:
+        QwenStandinServer: 服务实例，url属性为服务地址，用完调用shutdown()
+    """
+    server = QwenStandinServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True, name='qwen-standin').start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='千问医疗问答服务的本地替身')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    for key, value in DEFAULT_OPTIONS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    options = {key: getattr(args, key) for key in DEFAULT_OPTIONS}
+    server = QwenStandinServer((args.host, args.port), **options)
+    print(f"千问替身服务已启动: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
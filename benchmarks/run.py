@@ -0,0 +1,515 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+接口压测
+
+对每个接口场景以指定并发发送固定数量的请求，统计吞吐量和p50/p95/p99延迟，
+结果以JSON保存到 benchmarks/results/，便于不同提交之间对比。
+
+进程内模式（默认）：在临时数据库中生成数据，通过Flask测试客户端直接调用应用，
+医疗大模型使用零延迟的模拟响应，无需网络。
+    python -m benchmarks.run --concurrency 8 --requests 200
+
+走真实的千问HTTP客户端（连接池、超时）时加 --standin，使用本地替身服务代替模型：
+    python -m benchmarks.run --standin --standin-latency 0.05 --scenarios consult.medical_qa
+
+HTTP模式：压测已启动的服务，服务端需先用 benchmarks.seed 生成数据，并设置
+USE_MOCK_MEDICAL_MODEL=true、MOCK_MEDICAL_MODEL_LATENCY=0、RATE_LIMIT_ENABLED=false。
+    python -m benchmarks.run --url http://127.0.0.1:5000 --concurrency 16
+
+与之前的结果对比：
+    python -m benchmarks.run --compare benchmarks/results/<文件名>.json
+"""
+
+import argparse
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from benchmarks.seed import ACCOUNT_PREFIX, DEFAULT_VOLUMES, PASSWORD, seed
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+class Upload:
+    """以multipart/form-data上传的文件，作为场景的请求体"""
+
+    def __init__(self, field, filename, content, mimetype):
+        self.field = field
+        self.filename = filename
+        self.content = content
+        self.mimetype = mimetype
+
+
+class InProcessClient:
+    """通过Flask测试客户端调用应用"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        if isinstance(body, Upload):
+            response = self.client.open(path, method=method, headers=headers, data={
+                body.field: (io.BytesIO(body.content), body.filename, body.mimetype)
+            })
+        else:
+            response = self.client.open(path, method=method, json=body, headers=headers)
+        # 流式响应（批量问答）读完才算请求结束
+        response.get_data()
+        response.close()
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """通过HTTP调用已启动的服务，每个线程复用一个连接"""
+
+    def __init__(self, base_url):
+        import requests
+
+        self.session = requests.Session()
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None, headers=None):
+        if isinstance(body, Upload):
+            response = self.session.request(method, self.base_url + path, headers=headers, timeout=60, files={
+                body.field: (body.filename, body.content, body.mimetype)
+            })
+        else:
+            response = self.session.request(method, self.base_url + path, json=body, headers=headers, timeout=60)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+_registration_counter = itertools.count()
+_run_tag = random.randint(100, 999)
+
+
+def _register_body(ctx, user):
+    n = next(_registration_counter)
+    return {
+        'account': f"bench_reg_{_run_tag}_{n}",
+        'password': PASSWORD,
+        'confirmPassword': PASSWORD,
+        'nickname': '压测注册',
+        'phone': f"17{_run_tag}{n:06d}"
+    }
+
+
+def _fresh_tokens(ctx, user):
+    """重新登录获取一对新令牌（不计入耗时），用于会轮换或撤销令牌的场景"""
+    _, body = ctx['client'].request('POST', '/api/auth/login', {'account': user['account'], 'password': PASSWORD})
+    return body['data']
+
+
+def _avatar_upload(rng):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (256, 256), tuple(rng.randrange(256) for _ in range(3))).save(buffer, 'JPEG')
+    return Upload('avatar', '头像.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+def _avatar_path(ctx, user, rng):
+    """用户还没有头像时先上传一张（不计入耗时），返回头像图片的路径"""
+    if 'avatar_path' not in user:
+        _, body = ctx['client'].request('POST', '/api/user/avatar', _avatar_upload(rng), user['headers'])
+        user['avatar_path'] = urlsplit(body['data']['avatar']).path
+    return user['avatar_path']
+
+
+def _avatar(ctx, user, rng):
+    _avatar_path(ctx, user, rng)
+    return 'GET', f"/api/user/{user['id']}/avatar?size=64", None, False
+
+
+def _refresh(ctx, user, rng):
+    tokens = _fresh_tokens(ctx, user)
+    return 'POST', '/api/auth/refresh', None, {'Authorization': f"Bearer {tokens['refreshToken']}"}
+
+
+def _logout(ctx, user, rng):
+    tokens = _fresh_tokens(ctx, user)
+    return ('POST', '/api/auth/logout', {'refreshToken': tokens['refreshToken']},
+            {'Authorization': f"Bearer {tokens['token']}"})
+
+
+def _report_body(rng):
+    return {'title': '压测体检报告', 'hospital': '旗人民医院', 'items': [
+        {'name': '空腹血糖', 'value': f"{rng.uniform(3.5, 7.5):.1f} mmol/L", 'reference': '3.9-6.1'},
+        {'name': '收缩压', 'value': f"{rng.randint(100, 160)} mmHg", 'reference': '90-140'}
+    ]}
+
+
+def _delete_report(ctx, user, rng):
+    # 先创建一份报告（不计入耗时），只删除压测自己创建的数据
+    _, body = ctx['client'].request('POST', '/api/health/reports', _report_body(rng), user['headers'])
+    return 'DELETE', f"/api/health/reports/{body['data']['id']}", None, True
+
+
+def _import_reports(ctx, user, rng):
+    lines = [json.dumps({**_report_body(rng), 'title': f"导入报告{i}"}, ensure_ascii=False) for i in range(10)]
+    return 'POST', '/api/health/reports/import', Upload(
+        'file', 'reports.ndjson', '\n'.join(lines).encode('utf-8'), 'application/x-ndjson'), True
+
+
+# 场景名称 -> 生成请求的函数，返回(方法, 路径, 请求体, 登录)；请求体为dict（JSON）或Upload，
+# 登录为True时使用压测账号的令牌，也可以是请求头dict。生成函数中通过ctx['client']发出的准备请求不计入耗时。
+#
+# 未覆盖的接口：*-test/test/*系列是无需认证的调试接口；/api/admin/* 会启动性能剖析，影响压测结果；
+# /metrics与Flask默认的/static不属于业务接口；/api/user/upload/image与/api/user/avatar是同一个视图。
+SCENARIOS = {
+    'health.ping': lambda ctx, user, rng: ('GET', '/api/health/ping', None, False),
+    'auth.login': lambda ctx, user, rng: (
+        'POST', '/api/auth/login', {'account': user['account'], 'password': PASSWORD}, False),
+    'auth.register': lambda ctx, user, rng: ('POST', '/api/auth/register', _register_body(ctx, user), False),
+    'auth.refresh': _refresh,
+    'auth.logout': _logout,
+    'auth.reset_password': lambda ctx, user, rng: (
+        'POST', '/api/auth/reset-password',
+        {'phone': user['phone'], 'verifyCode': '1234', 'newPassword': PASSWORD}, False),
+    'user.profile': lambda ctx, user, rng: ('GET', '/api/user/profile', None, True),
+    'user.update_profile': lambda ctx, user, rng: (
+        'PUT', '/api/user/profile', {'nickname': f"压测用户{rng.randint(1, 999)}", 'weight': 65}, True),
+    'user.change_password': lambda ctx, user, rng: (
+        'POST', '/api/user/change-password',
+        {'oldPassword': PASSWORD, 'newPassword': PASSWORD, 'confirmPassword': PASSWORD}, True),
+    'user.upload_avatar': lambda ctx, user, rng: ('POST', '/api/user/avatar', _avatar_upload(rng), True),
+    'user.avatar': _avatar,
+    'media.static': lambda ctx, user, rng: ('GET', _avatar_path(ctx, user, rng), None, False),
+    'setting.get': lambda ctx, user, rng: ('GET', '/api/settings', None, True),
+    'setting.update': lambda ctx, user, rng: (
+        'PUT', '/api/settings', {'language': rng.choice(['zh-CN', 'mn']), 'push_notification': True}, True),
+    'consult.sessions': lambda ctx, user, rng: ('GET', '/api/consult/sessions', None, True),
+    'consult.session_detail': lambda ctx, user, rng: (
+        'GET', f"/api/consult/sessions/{rng.choice(user['sessions'])}", None, True),
+    'consult.create_session': lambda ctx, user, rng: (
+        'POST', '/api/consult/sessions', {'title': '压测问诊', 'description': '头痛'}, True),
+    'consult.update_session': lambda ctx, user, rng: (
+        'PUT', f"/api/consult/sessions/{rng.choice(user['sessions'])}", {'description': '头痛三天'}, True),
+    'consult.send_message': lambda ctx, user, rng: (
+        'POST', f"/api/consult/sessions/{rng.choice(user['sessions'])}/messages",
+        {'content': '最近血压有点高，平时需要注意什么？', 'language': rng.choice(['chinese', 'mongolian'])}, True),
+    'consult.medical_qa': lambda ctx, user, rng: (
+        'POST', '/api/consult/medical-qa', {'query': '糖尿病饮食需要注意什么', 'language': 'chinese'}, True),
+    'consult.medical_qa_batch': lambda ctx, user, rng: (
+        'POST', '/api/consult/medical-qa/batch', {'queries': [
+            f"{topic}需要注意什么（{rng.randint(1, 50)}）" for topic in ('高血压', '糖尿病', '感冒', '高血压', '失眠')
+        ]}, True),
+    # 语音识别需要讯飞服务，见EXTERNAL_SCENARIOS
+    'consult.upload_audio': lambda ctx, user, rng: (
+        'POST', f"/api/consult/sessions/{rng.choice(user['sessions'])}/audio",
+        Upload('audio', '录音.mp3', os.urandom(4000), 'audio/mpeg'), True),
+    'article.list': lambda ctx, user, rng: ('GET', f"/api/articles?page={rng.randint(1, ctx['article_pages'])}", None, False),
+    'article.detail': lambda ctx, user, rng: ('GET', f"/api/articles/{rng.choice(ctx['articles'])}", None, False),
+    'article.hot': lambda ctx, user, rng: ('GET', '/api/articles/hot', None, False),
+    'article.categories': lambda ctx, user, rng: ('GET', '/api/articles/categories', None, False),
+    'article.tags': lambda ctx, user, rng: ('GET', '/api/articles/tags', None, False),
+    'health.reports': lambda ctx, user, rng: ('GET', '/api/health/reports', None, True),
+    'health.report_detail': lambda ctx, user, rng: (
+        'GET', f"/api/health/reports/{rng.choice(user['reports'])}", None, True),
+    'health.create_report': lambda ctx, user, rng: ('POST', '/api/health/reports', _report_body(rng), True),
+    'health.update_report': lambda ctx, user, rng: (
+        'PUT', f"/api/health/reports/{rng.choice(user['reports'])}", {'has_read': True, 'summary': '已复查'}, True),
+    'health.delete_report': _delete_report,
+    'health.import_reports': _import_reports,
+    'health.abnormal_items': lambda ctx, user, rng: (
+        'GET', f"/api/health/reports/items/abnormal?direction={rng.choice(['high', 'low'])}", None, True),
+    'health.advice': lambda ctx, user, rng: ('GET', '/api/health/advice', None, True),
+    'health.create_advice': lambda ctx, user, rng: (
+        'POST', '/api/health/advice', {'title': '运动建议', 'content': '每天步行30分钟', 'category': 'exercise'}, True),
+    'health.datapoints': lambda ctx, user, rng: ('GET', '/api/health/datapoints', None, True),
+    'health.datapoints_range': lambda ctx, user, rng: (
+        'GET', '/api/health/datapoints?metric=heart_rate&points=200', None, True),
+    'health.datapoints_ingest': lambda ctx, user, rng: (
+        'POST', '/api/health/datapoints', {'points': [
+            {'metric': 'heart_rate', 'ts': int(time.time()) - rng.randint(0, 86400), 'value': rng.randint(55, 100)}
+            for _ in range(100)
+        ]}, True),
+    'health.datapoint_stats': lambda ctx, user, rng: ('GET', '/api/health/datapoints/stats', None, True)
+}
+
+# 需要讯飞替身服务（--standin）或真实服务（--url）的场景，不指定--scenarios时进程内模式默认跳过
+EXTERNAL_SCENARIOS = {'consult.upload_audio'}
+
+
+def percentile(sorted_values, pct):
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return 0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, wall_time):
+    """
+    汇总一个场景的结果
+
+    Args:
+        latencies (list): 每个请求的耗时（秒）
+        errors (int): 失败的请求数
+        wall_time (float): 场景总耗时（秒）
+
+    Returns:
+        dict: 请求数、错误数、吞吐量及各分位延迟（毫秒）
+    """
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput': round(len(values) / wall_time, 1) if wall_time else 0,
+        'mean_ms': round(sum(values) / len(values) * 1000, 2) if values else 0,
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p95_ms': round(percentile(values, 95) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+        'max_ms': round(values[-1] * 1000, 2) if values else 0
+    }
+
+
+def prepare_context(client, user_count):
+    """登录压测账号，收集各账号的会话和报告ID以及文章ID"""
+    users = []
+    for i in range(user_count):
+        account = f"{ACCOUNT_PREFIX}{i}"
+        status, body = client.request('POST', '/api/auth/login', {'account': account, 'password': PASSWORD})
+        if not body or body.get('code') != 200:
+            break
+        headers = {'Authorization': f"Bearer {body['data']['token']}"}
+        _, profile = client.request('GET', '/api/user/profile', headers=headers)
+        _, sessions = client.request('GET', '/api/consult/sessions', headers=headers)
+        _, reports = client.request('GET', '/api/health/reports', headers=headers)
+        users.append({
+            'account': account,
+            'id': profile['data']['userId'],
+            'phone': profile['data']['phone'],
+            'headers': headers,
+            'sessions': [item['id'] for item in sessions['data']] or [0],
+            'reports': [item['id'] for item in reports['data']] or [0]
+        })
+    if not users:
+        raise RuntimeError('无法登录压测账号，请先运行 python -m benchmarks.seed 生成数据')
+
+    _, articles = client.request('GET', '/api/articles?per_page=100')
+    _, first_page = client.request('GET', '/api/articles')
+    return {
+        'users': users,
+        'articles': [item['id'] for item in articles['data']['articles']] or [0],
+        'article_pages': max(1, first_page['data']['pagination']['pages'])
+    }
+
+
+def run_scenario(name, client_factory, ctx, concurrency, total, seed_value=0):
+    """
+    以concurrency个线程共发送total个请求
+
+    Returns:
+        dict: summarize的结果
+    """
+    build = SCENARIOS[name]
+    counter = itertools.count()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        client = client_factory()
+        # 每个线程使用自己的客户端发出准备请求
+        worker_ctx = {**ctx, 'client': client}
+        rng = random.Random(seed_value * 1000 + worker_id)
+        local_latencies = []
+        local_errors = 0
+        while next(counter) < total:
+            user = ctx['users'][rng.randrange(len(ctx['users']))]
+            method, path, body, auth = build(worker_ctx, user, rng)
+            headers = user['headers'] if auth is True else auth or None
+            started = time.perf_counter()
+            try:
+                status, result = client.request(method, path, body, headers)
+                ok = status < 400 and (result is None or result.get('code', 200) == 200)
+            except Exception:
+                ok = False
+            local_latencies.append(time.perf_counter() - started)
+            local_errors += 0 if ok else 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def git_revision():
+    """获取当前提交及工作区是否有未提交的修改"""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                         stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             text=True, stderr=subprocess.DEVNULL).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def create_benchmark_app(database_path, volumes, overrides=None):
+    """
+    创建使用零延迟模拟大模型的应用，并在临时数据库中生成数据
+
+    Args:
+        database_path (str): SQLite数据库文件路径
+        volumes (dict): 数据量，见benchmarks.seed.DEFAULT_VOLUMES
+        overrides (dict): 额外的配置项，如指向替身服务的地址
+
+    Returns:
+        tuple: (应用实例, 各类数据条数)
+    """
+    from src.app import create_app
+    from src.migrations import upgrade
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{database_path}",
+        'USE_MOCK_MEDICAL_MODEL': True,
+        'MOCK_MEDICAL_MODEL_LATENCY': 0,
+        'RATE_LIMIT_ENABLED': False,
+        'LOG_LEVEL': 'WARNING',
+        **(overrides or {})
+    })
+    with app.app_context():
+        upgrade()
+        counts = seed(volumes)
+    return app, counts
+
+
+def run_benchmarks(client_factory, scenarios, concurrency, total, warmup=0, user_count=20):
+    """
+    依次压测各场景
+
+    Returns:
+        dict: 场景名称到统计结果的映射
+    """
+    ctx = prepare_context(client_factory(), user_count)
+    results = {}
+    for index, name in enumerate(scenarios):
+        if warmup:
+            run_scenario(name, client_factory, ctx, concurrency, warmup, seed_value=index)
+        results[name] = run_scenario(name, client_factory, ctx, concurrency, total, seed_value=index)
+    return results
+
+
+def print_results(results, baseline=None):
+    header = f"{'场景':<26}{'请求':>7}{'错误':>6}{'吞吐/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if baseline:
+        header += f"{'p50变化':>10}{'p95变化':>10}"
+    print(header)
+    for name, stats in results.items():
+        line = (f"{name:<28}{stats['requests']:>7}{stats['errors']:>6}{stats['throughput']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+        old = (baseline or {}).get(name)
+        if old:
+            for key in ('p50_ms', 'p95_ms'):
+                change = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0
+                line += f"{change:>+9.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='接口压测')
+    parser.add_argument('--url', help='压测已启动的服务（HTTP模式），不指定时在进程内压测')
+    parser.add_argument('--concurrency', type=int, default=4, help='并发线程数')
+    parser.add_argument('--requests', type=int, default=200, help='每个场景的请求数')
+    parser.add_argument('--warmup', type=int, default=20, help='每个场景正式统计前的预热请求数')
+    parser.add_argument('--scenarios', help='只运行指定场景，逗号分隔')
+    parser.add_argument('--login-users', type=int, default=20, help='参与压测的账号数')
+    parser.add_argument('--output', help='结果文件路径，默认 benchmarks/results/<提交>-<时间>.json')
+    parser.add_argument('--compare', help='与之前的结果文件对比')
+    parser.add_argument('--standin', action='store_true',
+                        help='进程内模式下启动千问和讯飞替身服务，走真实的HTTP/WebSocket客户端代码')
+    parser.add_argument('--standin-latency', type=float, default=0.0, help='替身服务的响应延迟（秒）')
+    for key, value in DEFAULT_VOLUMES.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=value, help='进程内模式的数据量')
+    args = parser.parse_args()
+
+    if args.scenarios:
+        scenarios = args.scenarios.split(',')
+    else:
+        scenarios = [name for name in SCENARIOS if args.url or args.standin or name not in EXTERNAL_SCENARIOS]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+
+    volumes = {key: getattr(args, key) for key in DEFAULT_VOLUMES}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.url:
+            mode, counts = 'http', None
+            client_factory = lambda: HttpClient(args.url)
+        else:
+            mode = 'inprocess'
+            overrides = None
+            if args.standin:
+                from benchmarks import qwen_standin, xunfei_standin
+
+                mode = 'inprocess-standin'
+                qwen_server = qwen_standin.start_server(latency=args.standin_latency)
+                xunfei_server = xunfei_standin.start_server(latency=args.standin_latency)
+                overrides = {
+                    'USE_MOCK_MEDICAL_MODEL': False,
+                    'QWEN_API_URL': qwen_server.url,
+                    'XUNFEI_IAT_URL': xunfei_server.url
+                }
+            app, counts = create_benchmark_app(os.path.join(tmp_dir, 'bench.db'), volumes, overrides)
+            logging.getLogger().setLevel(logging.WARNING)
+            client_factory = lambda: InProcessClient(app)
+            print(f"已生成压测数据: {counts}")
+
+        results = run_benchmarks(client_factory, scenarios, args.concurrency, args.requests,
+                                 args.warmup, args.login_users)
+
+    commit, dirty = git_revision()
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'mode': mode,
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'requests_per_scenario': args.requests,
+        'data': counts,
+        'python': platform.python_version(),
+        'results': results
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}-{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
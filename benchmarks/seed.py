@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+生成压测数据：用户、问诊会话与大量消息、中蒙双语文章、健康报告与建议、设备同步的健康数据点
+
+用法:
+    python -m benchmarks.seed --database-uri sqlite:///bench.db --users 50 --messages 5000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+
+# 压测账号的命名规则和统一密码
+ACCOUNT_PREFIX = 'bench_user_'
+PASSWORD = 'bench123456'
+
+DEFAULT_VOLUMES = {
+    'users': 50,
+    'sessions_per_user': 4,
+    'messages': 5000,
+    'articles': 200,
+    'reports_per_user': 5,
+    'datapoint_days': 30
+}
+
+QUESTIONS = [
+    '最近血压有点高，平时需要注意什么？',
+    '糖尿病患者可以喝奶茶吗？',
+    '感冒发烧三天了，需要去医院吗？',
+    '冬季放牧时如何预防冻伤？',
+    '膝盖长期疼痛，可能是什么原因？'
+]
+
+ARTICLE_TOPICS = [
+    ('高血压的日常管理', 'ᠴᠢᠰᠦᠨ ᠦ ᠳᠠᠷᠤᠯᠲᠠ ᠶᠢᠨ ᠡᠳᠦᠷ ᠲᠤᠲᠤᠮ ᠤᠨ ᠠᠩᠬᠠᠷᠤᠯ'),
+    ('牧区冬季保暖与冻伤预防', 'ᠮᠠᠯᠴᠢᠨ ᠤ ᠣᠷᠣᠨ ᠤ ᠡᠪᠦᠯ ᠦᠨ ᠳᠤᠯᠠᠭᠠᠴᠠ'),
+    ('糖尿病饮食指南', 'ᠴᠢᠬᠢᠷ ᠰᠢᠵᠢᠩ ᠤ ᠬᠣᠭᠣᠯᠠ ᠶᠢᠨ ᠵᠢᠭᠠᠪᠤᠷᠢ'),
+    ('儿童常见传染病', 'ᠬᠡᠦᠬᠡᠳ ᠦᠨ ᠬᠠᠯᠳᠠᠪᠠᠷᠢ ᠡᠪᠡᠳᠴᠢᠨ')
+]
+
+REPORT_ITEMS = [
+    ('收缩压', 'mmHg', 90, 140),
+    ('舒张压', 'mmHg', 60, 90),
+    ('空腹血糖', 'mmol/L', 3.9, 6.1),
+    ('总胆固醇', 'mmol/L', 2.8, 5.2),
+    ('血红蛋白', 'g/L', 120, 160)
+]
+
+
+def seed(volumes=None, rng=None):
+    """
+    在当前应用上下文的数据库中写入压测数据，需已执行迁移
+
+    Args:
+        volumes (dict): 数据量，键同DEFAULT_VOLUMES
+        rng (random.Random): 随机数生成器，固定种子可得到相同的数据
+
+    Returns:
+        dict: 实际写入的各类数据条数
+    """
+    from src.extensions.database import db
+    from src.models.article import Article, ArticleCategory, Tag, article_tags
+    from src.models.consult import ConsultMessage, ConsultSession
+    from src.models.health import HealthAdvice, HealthDatapoint, HealthReport, HealthReportItem
+    from src.models.setting import UserSetting
+    from src.models.user import User
+    from src.utils.report_values import parse_item
+
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = rng or random.Random(42)
+    now = datetime.now()
+
+    # 密码哈希很慢，所有压测账号共用同一个哈希
+    password_hash = generate_password_hash(PASSWORD)
+    db.session.execute(insert(User), [{
+        'account': f"{ACCOUNT_PREFIX}{i}",
+        'password_hash': password_hash,
+        'nickname': f"压测用户{i}",
+        'phone': f"199{i:08d}"
+    } for i in range(volumes['users'])])
+    user_ids = db.session.execute(
+        select(User.id).where(User.account.like(f"{ACCOUNT_PREFIX}%")).order_by(User.id)
+    ).scalars().all()
+    db.session.execute(insert(UserSetting), [
+        {'user_id': user_id, 'language': rng.choice(['zh-CN', 'mn-MN'])} for user_id in user_ids
+    ])
+
+    db.session.execute(insert(ConsultSession), [{
+        'user_id': user_id,
+        'title': f"问诊{n + 1}",
+        'description': rng.choice(QUESTIONS),
+        'status': 'active',
+        'created_at': now - timedelta(days=n),
+        'updated_at': now - timedelta(days=n)
+    } for user_id in user_ids for n in range(volumes['sessions_per_user'])])
+    session_ids = db.session.execute(
+        select(ConsultSession.id).where(ConsultSession.user_id.in_(user_ids))
+    ).scalars().all()
+
+    # 消息轮流归属各会话，用户提问与AI回答交替
+    messages = []
+    for i in range(volumes['messages']):
+        session_id = session_ids[i % len(session_ids)] if session_ids else None
+        if session_id is None:
+            break
+        sender = 'user' if (i // len(session_ids)) % 2 == 0 else 'ai'
+        content = rng.choice(QUESTIONS) if sender == 'user' else '建议规律作息、清淡饮食，如症状持续请及时就医。' * rng.randint(1, 6)
+        messages.append({
+            'session_id': session_id,
+            'sender_type': sender,
+            'content': content,
+            'content_type': 'text',
+            'created_at': now - timedelta(minutes=volumes['messages'] - i)
+        })
+    if messages:
+        db.session.execute(insert(ConsultMessage), messages)
+
+    db.session.execute(insert(ArticleCategory), [
+        {'name': name, 'name_mn': name_mn} for name, name_mn in [('慢性病', 'ᠬᠣᠷᠤᠭᠳᠠᠯ ᠡᠪᠡᠳᠴᠢᠨ'), ('急救', 'ᠶᠠᠭᠠᠷᠠᠯᠲᠠᠢ ᠲᠤᠰᠠᠯᠠᠮᠵᠢ'), ('营养', 'ᠲᠡᠵᠢᠭᠡᠯ')]
+    ])
+    category_ids = db.session.execute(select(ArticleCategory.id)).scalars().all()
+    tag_names = ['高血压', '糖尿病', '儿童', '冬季', '饮食']
+    db.session.execute(insert(Tag).prefix_with('OR IGNORE'), [{'name': name} for name in tag_names])
+    tag_ids = db.session.execute(select(Tag.id).where(Tag.name.in_(tag_names))).scalars().all()
+
+    db.session.execute(insert(Article), [{
+        'title': f"{title}（{i}）",
+        'title_mn': title_mn,
+        'summary': f"{title}的要点",
+        'summary_mn': title_mn,
+        'content': f"{title}。" * 80,
+        'content_mn': f"{title_mn}. " * 80,
+        'author': '健康科普',
+        'category_id': rng.choice(category_ids),
+        'view_count': rng.randint(0, 5000),
+        'created_at': now - timedelta(hours=i)
+    } for i, (title, title_mn) in enumerate(rng.choice(ARTICLE_TOPICS) for _ in range(volumes['articles']))])
+    article_ids = db.session.execute(select(Article.id).order_by(Article.id.desc()).limit(volumes['articles'])).scalars().all()
+    if tag_ids:
+        db.session.execute(insert(article_tags).prefix_with('OR IGNORE'), [
+            {'article_id': article_id, 'tag_id': tag_id}
+            for article_id in article_ids for tag_id in rng.sample(tag_ids, 2)
+        ])
+
+    reports = [{
+        'user_id': user_id,
+        'title': f"体检报告{n + 1}",
+        'summary': '各项指标基本正常',
+        'doctor': '王医生',
+        'hospital': '旗人民医院',
+        'status': rng.choice(['normal', 'warning']),
+        'created_at': now - timedelta(days=30 * n)
+    } for user_id in user_ids for n in range(volumes['reports_per_user'])]
+    if reports:
+        db.session.execute(insert(HealthReport), reports)
+    report_ids = db.session.execute(
+        select(HealthReport.id).where(HealthReport.user_id.in_(user_ids))
+    ).scalars().all()
+    items = []
+    for report_id in report_ids:
+        for name, unit, low, high in REPORT_ITEMS:
+            value = round(rng.uniform(low * 0.8, high * 1.2), 1)
+            item = {
+                'report_id': report_id,
+                'name': name,
+                'value': f"{value} {unit}",
+                'reference': f"{low}-{high} {unit}",
+                'status': 'normal' if low <= value <= high else 'abnormal'
+            }
+            items.append({**item, **parse_item(item['value'], item['reference'])})
+    if items:
+        db.session.execute(insert(HealthReportItem), items)
+    db.session.execute(insert(HealthAdvice), [{
+        'user_id': user_id,
+        'title': '饮食建议',
+        'summary': '少盐少油',
+        'content': '建议每日食盐摄入不超过5克，多吃蔬菜水果。',
+        'author': '营养师',
+        'category': 'diet'
+    } for user_id in user_ids])
+
+    # 每天早晚各一次的体重、血压、血糖读数，以及手环每小时的心率
+    from src.utils.health_data import rebuild_rollups, to_ts
+
+    first_day = to_ts(now.replace(hour=0, minute=0, second=0, microsecond=0)) - volumes['datapoint_days'] * 86400
+    datapoints = []
+    for user_id in user_ids:
+        for day in range(volumes['datapoint_days']):
+            day_start = first_day + day * 86400
+            datapoints.append({'user_id': user_id, 'metric': 'weight', 'ts': day_start + 7 * 3600,
+                               'value': round(rng.uniform(60, 80), 1), 'value2': None})
+            datapoints.append({'user_id': user_id, 'metric': 'blood_sugar', 'ts': day_start + 7 * 3600,
+                               'value': round(rng.uniform(4.5, 7.5), 1), 'value2': None})
+            for hour in (8, 20):
+                datapoints.append({'user_id': user_id, 'metric': 'blood_pressure', 'ts': day_start + hour * 3600,
+                                   'value': rng.randint(110, 150), 'value2': rng.randint(70, 95)})
+            for hour in range(24):
+                datapoints.append({'user_id': user_id, 'metric': 'heart_rate', 'ts': day_start + hour * 3600,
+                                   'value': rng.randint(55, 100), 'value2': None})
+    if datapoints:
+        db.session.execute(insert(HealthDatapoint), datapoints)
+        rebuild_rollups()
+
+    db.session.commit()
+    return {
+        'users': len(user_ids),
+        'sessions': len(session_ids),
+        'messages': len(messages),
+        'articles': len(article_ids),
+        'reports': len(report_ids),
+        'report_items': len(items),
+        'datapoints': len(datapoints)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成压测数据')
+    parser.add_argument('--database-uri', default='sqlite:///nomad_health.db', help='目标数据库')
+    for key, value in DEFAULT_VOLUMES.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=value)
+    args = parser.parse_args()
+
+    from src.app import create_app
+    from src.migrations import upgrade
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_uri})
+    with app.app_context():
+        upgrade()
+        started = time.perf_counter()
+        counts = seed({key: getattr(args, key) for key in DEFAULT_VOLUMES})
+    print(f"数据生成完成，耗时 {time.perf_counter() - started:.1f} 秒: {counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+讯飞语音识别（IAT）服务的本地替身
+
+基于标准库实现WebSocket握手和帧收发，按 src/utils/ai_service.py 使用的帧协议工作：
+客户端依次发送status为0/1/2的JSON帧（音频为base64），替身在收到最后一帧后返回识别结果
+并关闭连接。可配置识别延迟、错误注入和断连，配置了api_secret时校验请求签名。
+
+用法:
+    python -m benchmarks.xunfei_standin --port 8001 --latency 0.3
+    XUNFEI_IAT_URL=ws://127.0.0.1:8001/v1 python run.py
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import random
+import socketserver
+import struct
+import threading
+import time
+import urllib.parse
+import uuid
+
+# WebSocket握手使用的固定GUID（RFC 6455）
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+DEFAULT_OPTIONS = {
+    'latency': 0.0,         # 收到最后一帧后返回结果前的延迟（秒）
+    'error_rate': 0.0,      # 返回错误码的概率
+    'error_code': 10165,    # 注入的错误码
+    'drop_rate': 0.0,       # 不返回结果直接断开连接的概率
+    'text': '',             # 固定的识别结果，为空时根据音频长度生成
+    'api_key': '',          # 配置后校验鉴权参数
+    'api_secret': ''
+}
+
+
+class WebSocketConnection:
+    """最小化的服务端WebSocket连接"""
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+
+    def _read_exact(self, size):
+        data = self.rfile.read(size)
+        if len(data) < size:
+            raise ConnectionError('连接已关闭')
+        return data
+
+    def receive(self):
+        """
+        读取一条完整消息，自动应答ping
+
+        Returns:
+            tuple: (操作码, 负载)，收到关闭帧时操作码为OP_CLOSE
+        """
+        message = b''
+        message_opcode = None
+        while True:
+            first, second = self._read_exact(2)
+            fin = first & 0x80
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('>H', self._read_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack('>Q', self._read_exact(8))[0]
+            mask = self._read_exact(4) if second & 0x80 else None
+            payload = self._read_exact(length)
+            if mask:
+                payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+            if opcode == OP_PING:
+                self.send(payload, OP_PONG)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                return OP_CLOSE, payload
+            if opcode != 0:
+                message_opcode = opcode
+            message += payload
+            if fin:
+                return message_opcode, message
+
+    def send(self, payload, opcode=OP_TEXT):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 1 << 16:
+            header += bytes([126]) + struct.pack('>H', length)
+        else:
+            header += bytes([127]) + struct.pack('>Q', length)
+        self.wfile.write(header + payload)
+        self.wfile.flush()
+
+    def close(self, code=1000):
+        try:
+            self.send(struct.pack('>H', code), OP_CLOSE)
+        except OSError:
+            pass
+
+
+def verify_signature(query, host, path, api_key, api_secret):
+    """
+    校验讯飞鉴权参数
+
+    Returns:
+        bool: 签名是否正确
+    """
+    try:
+        authorization = base64.b64decode(query['authorization'][0]).decode('utf-8')
+        date = query['date'][0]
+    except (KeyError, ValueError):
+        return False
+    signature_origin = f"host: {host}\ndate: {date}\nGET {path} HTTP/1.1"
+    expected = base64.b64encode(hmac.new(api_secret.encode('utf-8'), signature_origin.encode('utf-8'),
+                                         digestmod=hashlib.sha256).digest()).decode('utf-8')
+    return f'api_key="{api_key}"' in authorization and f'signature="{expected}"' in authorization
+
+
+class XunfeiStandinHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        request_line = self.rfile.readline().decode('latin-1').strip()
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        parts = request_line.split(' ')
+        if len(parts) < 2 or headers.get('upgrade', '').lower() != 'websocket':
+            self._reject(400, 'Bad Request')
+            return
+        target = urllib.parse.urlsplit(parts[1])
+        options = dict(self.server.options)
+
+        if options['api_secret']:
+            host = headers.get('host', '').split(':')[0]
+            if not verify_signature(urllib.parse.parse_qs(target.query), host, target.path,
+                                    options['api_key'], options['api_secret']):
+                self.server.record('unauthorized')
+                self._reject(401, 'Unauthorized')
+                return
+
+        accept = base64.b64encode(hashlib.sha1(
+            (headers.get('sec-websocket-key', '') + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+        self.wfile.write((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n\r\n'
+        ).encode('ascii'))
+        self.wfile.flush()
+        self.server.record('sessions')
+
+        connection = WebSocketConnection(self.rfile, self.wfile)
+        try:
+            self._recognize(connection, options)
+        except (ConnectionError, OSError):
+            pass
+
+    def _recognize(self, connection, options):
+        audio_size = 0
+        sid = f"iat{uuid.uuid4().hex[:16]}"
+        while True:
+            opcode, payload = connection.receive()
+            if opcode == OP_CLOSE:
+                connection.close()
+                return
+            frame = json.loads(payload)
+            data = frame.get('data', {})
+            audio_size += len(base64.b64decode(data.get('audio') or ''))
+            if data.get('status') == 2:
+                break
+
+        time.sleep(options['latency'])
+        roll = random.random()
+        if roll < options['drop_rate']:
+            self.server.record('drops')
+            return
+        if roll < options['drop_rate'] + options['error_rate']:
+            self.server.record('errors')
+            connection.send(json.dumps({'code': options['error_code'], 'message': 'injected error', 'sid': sid}))
+            connection.close()
+            return
+
+        text = options['text'] or f"识别到{audio_size}字节音频"
+        connection.send(json.dumps({
+            'code': 0,
+            'message': 'success',
+            'sid': sid,
+            'data': {'status': 2, 'result': {'text': text}}
+        }, ensure_ascii=False))
+        connection.close()
+
+    def _reject(self, status, reason):
+        self.wfile.write(f"HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode('ascii'))
+
+
+class XunfeiStandinServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, **options):
+        super().__init__(address, XunfeiStandinHandler)
+        self.options = {**DEFAULT_OPTIONS, **options}
+        self.stats = {'sessions': 0, 'errors': 0, 'drops': 0, 'unauthorized': 0}
+        self._stats_lock = threading.Lock()
+
+    def record(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"ws://{host}:{port}/v1"
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """
+    在后台线程中启动替身服务
+
+    Args:
+        host (str): 监听地址
+        port (int): 端口，0表示随机分配
+        **options: 见DEFAULT_OPTIONS
+
+    Returns:
+        XunfeiStandinServer: 服务实例，url属性可直接作为XUNFEI_IAT_URL，用完调用shutdown()
+    """
+    server = XunfeiStandinServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True, name='xunfei-standin').start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='讯飞语音识别服务的本地替身')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    for key, value in DEFAULT_OPTIONS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    options = {key: getattr(args, key) for key in DEFAULT_OPTIONS}
+    server = XunfeiStandinServer((args.host, args.port), **options)
+    print(f"讯飞替身服务已启动: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -22,7 +22,15 @@ KEEP_FILES = [
     'docker',
     'init_health_tables.py',
     'init_article_tables.py',
-    'init_consult_tables.py',
+    'migrate.py',
+    'process_covers.py',
+    'compute_health_stats.py',
+    'import_reports.py',
+    'backfill_report_items.py',
+    'wsgi.py',
+    'gunicorn.conf.py',
+    'startup_report.py',
+    'benchmarks',
     'reset_db.py',
     'clean_repo.py',  # 保留这个脚本本身
     'static',  # 静态资源目录
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+健康数据统计批处理：为所有有数据的用户重新计算趋势、滑动平均和异常提醒，写入统计结果缓存
+
+用法:
+    python compute_health_stats.py              按HEALTH_STATS_DAYS统计（建议每天凌晨由cron执行）
+    python compute_health_stats.py --days 30    指定统计天数
+    python compute_health_stats.py --rebuild-rollups  先按原始数据点重建预聚合（导入历史数据后）
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.extensions.database import db
+from src.utils.health_analytics import refresh_all_stats
+from src.utils.health_data import rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description='健康数据统计批处理')
+    parser.add_argument('--days', type=int, help='统计最近多少天，默认HEALTH_STATS_DAYS')
+    parser.add_argument('--batch-size', type=int, help='每批计算的用户数，默认HEALTH_STATS_BATCH_USERS')
+    parser.add_argument('--rebuild-rollups', action='store_true', help='先按原始数据点重建预聚合')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        started = time.perf_counter()
+        if args.rebuild_rollups:
+            series = rebuild_rollups()
+            db.session.commit()
+            print(f"预聚合重建完成: {series}个序列")
+        users = refresh_all_stats(days=args.days, batch_size=args.batch_size)
+        print(f"健康数据统计完成: {users}个用户，耗时{time.perf_counter() - started:.1f}秒")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+"""gunicorn配置"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+# 在master进程中导入代码并创建应用，worker通过fork直接继承，
+# 不再各自重复导入依赖和初始化应用，扩容时新worker可以立即开始处理请求
+preload_app = True
+
+def on_starting(server):
+    """清理上次运行遗留的指标文件，计数器随服务重启从零开始"""
+    import glob
+    
+    metrics_dir = os.getenv('METRICS_DIR')
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, 'metrics_*.json')):
+            os.remove(path)
+
+def post_fork(server, worker):
+    """fork之后丢弃从master继承的数据库连接池，每个worker使用自己的连接"""
+    from wsgi import app
+    from src.extensions.database import db
+    
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    """worker初始化时会重置信号处理器，重新注册采样分析的信号"""
+    from src.utils.profiler import install_signal_handler
+    
+    install_signal_handler()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+健康报告批量导入工具：从NDJSON或CSV文件流式导入合作医院推送的检验报告
+
+用法:
+    python import_reports.py reports.ndjson          每行一份报告，用user_id或account指定所属用户
+    python import_reports.py reports.csv             每行一个报告项目，report_key相同的相邻行属于同一份报告
+    python import_reports.py - --format csv < data   从标准输入读取
+    python import_reports.py reports.ndjson --user-id 3   所有报告导入给指定用户
+"""
+
+import argparse
+import io
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.utils.report_import import import_reports, read_csv, read_ndjson
+
+def main():
+    parser = argparse.ArgumentParser(description='健康报告批量导入工具')
+    parser.add_argument('path', help='NDJSON或CSV文件，-表示标准输入')
+    parser.add_argument('--format', choices=['ndjson', 'csv'], help='文件格式，默认按扩展名判断')
+    parser.add_argument('--user-id', type=int, help='所有报告都导入给该用户')
+    parser.add_argument('--chunk-size', type=int, help='每个事务写入的报告数，默认REPORT_IMPORT_CHUNK_SIZE')
+    args = parser.parse_args()
+    
+    fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+    app = create_app()
+    
+    with app.app_context():
+        if args.path == '-':
+            source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            source = open(args.path, encoding='utf-8-sig', newline='')
+        with source:
+            records = read_csv(source) if fmt == 'csv' else read_ndjson(source)
+            result = import_reports(records, user_id=args.user_id, chunk_size=args.chunk_size)
+    
+    for error in result['errors']:
+        print(f"第{error['line']}行: {error['error']}", file=sys.stderr)
+    print(f"导入完成: 报告{result['reports']}份，项目{result['items']}个，失败{result['failed']}份，"
+          f"耗时{result['time_taken']}秒")
+    sys.exit(1 if result['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
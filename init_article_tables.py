@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 # 导入应用
 from src.app import create_app
 from src.extensions.database import db
+from src.migrations import upgrade
 from sqlalchemy import text
 
 def init_article_tables():
@@ -20,76 +21,12 @@ def init_article_tables():
     app = create_app()
     
     with app.app_context():
-        try:
-            # 创建文章分类表
-            create_article_categories_table = text("""
-                CREATE TABLE IF NOT EXISTS article_categories (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name VARCHAR(50) NOT NULL,
-                    name_mn VARCHAR(50)
-                )
-            """)
-            
-            db.session.execute(create_article_categories_table)
-            print("文章分类表创建成功")
-            
-            # 创建标签表
-            create_tags_table = text("""
-                CREATE TABLE IF NOT EXISTS tags (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name VARCHAR(50) NOT NULL UNIQUE
-                )
-            """)
-            
-            db.session.execute(create_tags_table)
-            print("标签表创建成功")
-            
-            # 创建文章表
-            create_articles_table = text("""
-                CREATE TABLE IF NOT EXISTS articles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title VARCHAR(100) NOT NULL,
-                    content TEXT NOT NULL,
-                    summary VARCHAR(500),
-                    cover_image VARCHAR(200),
-                    author VARCHAR(50),
-                    category_id INTEGER,
-                    view_count INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (category_id) REFERENCES article_categories (id)
-                )
-            """)
-            
-            db.session.execute(create_articles_table)
-            print("文章表创建成功")
-            
-            # 创建文章标签关联表
-            create_article_tags_table = text("""
-                CREATE TABLE IF NOT EXISTS article_tags (
-                    article_id INTEGER NOT NULL,
-                    tag_id INTEGER NOT NULL,
-                    PRIMARY KEY (article_id, tag_id),
-                    FOREIGN KEY (article_id) REFERENCES articles (id) ON DELETE CASCADE,
-                    FOREIGN KEY (tag_id) REFERENCES tags (id) ON DELETE CASCADE
-                )
-            """)
-            
-            db.session.execute(create_article_tags_table)
-            print("文章标签关联表创建成功")
-            
-            # 提交事务
-            db.session.commit()
-            print("数据库表初始化完成！")
-            
-            # 添加测试数据
-            insert_test_data()
-            
-        except Exception as e:
-            db.session.rollback()
-            print(f"初始化数据库表时出错: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
+        # 表结构由迁移工具统一管理
+        upgrade()
+        print("数据库表初始化完成！")
+    
+    # 添加测试数据
+    insert_test_data()
 
 def insert_test_data():
     """插入测试数据"""
@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 # 导入应用
 from src.app import create_app
 from src.extensions.database import db
+from src.migrations import upgrade
 from sqlalchemy import text
 
 def init_health_tables():
@@ -20,74 +21,12 @@ def init_health_tables():
     app = create_app()
     
     with app.app_context():
-        try:
-            # 创建健康报告表
-            create_health_reports_table = text("""
-                CREATE TABLE IF NOT EXISTS health_reports (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    title VARCHAR(100) NOT NULL,
-                    summary VARCHAR(200),
-                    doctor VARCHAR(50),
-                    hospital VARCHAR(100),
-                    suggestion TEXT,
-                    status VARCHAR(20) DEFAULT 'normal',
-                    has_read BOOLEAN DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            """)
-            
-            db.session.execute(create_health_reports_table)
-            print("健康报告表创建成功")
-            
-            # 创建健康报告项目表
-            create_health_report_items_table = text("""
-                CREATE TABLE IF NOT EXISTS health_report_items (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    report_id INTEGER NOT NULL,
-                    name VARCHAR(50) NOT NULL,
-                    value VARCHAR(50),
-                    reference VARCHAR(50),
-                    status VARCHAR(20) DEFAULT 'normal',
-                    FOREIGN KEY (report_id) REFERENCES health_reports (id) ON DELETE CASCADE
-                )
-            """)
-            
-            db.session.execute(create_health_report_items_table)
-            print("健康报告项目表创建成功")
-            
-            # 创建健康建议表
-            create_health_advices_table = text("""
-                CREATE TABLE IF NOT EXISTS health_advices (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    title VARCHAR(100) NOT NULL,
-                    summary VARCHAR(200),
-                    content TEXT NOT NULL,
-                    author VARCHAR(50),
-                    category VARCHAR(20) DEFAULT 'general',
-                    has_read BOOLEAN DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            """)
-            
-            db.session.execute(create_health_advices_table)
-            print("健康建议表创建成功")
-            
-            # 提交事务
-            db.session.commit()
-            print("数据库表初始化完成！")
-            
-            # 添加测试数据
-            insert_test_data()
-            
-        except Exception as e:
-            db.session.rollback()
-            print(f"初始化数据库表时出错: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
+        # 表结构由迁移工具统一管理
+        upgrade()
+        print("数据库表初始化完成！")
+    
+    # 添加测试数据
+    insert_test_data()
 
 def insert_test_data():
     """插入测试数据"""
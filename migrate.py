@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+数据库迁移工具
+
+用法:
+    python migrate.py                    执行所有未执行的迁移
+    python migrate.py upgrade --target 2 执行到指定版本
+    python migrate.py current            查看当前版本
+    python migrate.py history            查看所有迁移及执行状态
+"""
+
+import argparse
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+# 导入应用
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import MIGRATIONS, current_version, upgrade
+from src.migrations.engine import applied_versions
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库迁移工具')
+    parser.add_argument('command', nargs='?', default='upgrade', choices=['upgrade', 'current', 'history'])
+    parser.add_argument('--target', type=int, help='目标版本号，默认执行到最新版本')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        if args.command == 'upgrade':
+            applied = upgrade(target=args.target)
+            if applied:
+                print(f"已执行迁移: {', '.join(str(v) for v in applied)}")
+            else:
+                print("数据库已是最新版本")
+            print(f"当前版本: {current_version()}")
+        elif args.command == 'current':
+            print(f"当前版本: {current_version()}")
+        else:
+            import src.migrations.versions  # noqa: F401
+            with db.engine.begin() as conn:
+                done = applied_versions(conn)
+            for m in MIGRATIONS:
+                status = '已执行' if m.version in done else '未执行'
+                print(f"{m.version:>4}  [{status}]  {m.description}")
+
+if __name__ == "__main__":
+    main()
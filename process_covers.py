@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文章封面处理工具：为封面生成按宽度分档的WebP/JPEG衍生图和模糊占位图
+
+用法:
+    python process_covers.py                 处理所有尚未处理的封面（导入文章后执行）
+    python process_covers.py --article-id 3  只处理指定文章
+    python process_covers.py --force         重新生成所有封面
+"""
+
+import argparse
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.app import create_app
+from src.utils.cover_util import process_pending_covers
+
+def main():
+    parser = argparse.ArgumentParser(description='文章封面处理工具')
+    parser.add_argument('--article-id', type=int, action='append', help='只处理指定的文章，可重复')
+    parser.add_argument('--force', action='store_true', help='已处理过的封面也重新生成')
+    args = parser.parse_args()
+    
+    app = create_app()
+    
+    with app.app_context():
+        succeeded, failed = process_pending_covers(article_ids=args.article_id, force=args.force)
+        print(f"封面处理完成: 成功{succeeded}篇，失败{failed}篇")
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 # 导入应用
 from src.app import create_app
-from src.extensions.database import db
+from src.migrations import upgrade
 
 def reset_database():
     """重置数据库"""
@@ -29,9 +29,9 @@ def reset_database():
                 os.remove(backup_path)
             shutil.move(db_path, backup_path)
         
-        # 创建数据库表
+        # 执行迁移创建数据库表
         print("创建新的数据库表...")
-        db.create_all()
+        upgrade()
         
         print("数据库重置完成！")
     
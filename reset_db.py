@@ -9,7 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 # 导入应用
 from src.app import create_app
-from src.extensions.database import db
+from src.migrations import upgrade
 
 def reset_database():
     """重置数据库"""
@@ -25,9 +25,9 @@ def reset_database():
             print(f"删除数据库文件: {db_path}")
             os.remove(db_path)
         
-        # 创建数据库表
+        # 执行迁移创建数据库表
         print("创建新的数据库表...")
-        db.create_all()
+        upgrade()
         
         print("数据库重置完成！")
 
@@ -1,3 +1,8 @@
+import time
+
+# 记录模块导入耗时，用于启动性能报告
+_import_started = time.perf_counter()
+
 from flask import Flask
 import os
 import logging
@@ -6,14 +11,31 @@ from flask_cors import CORS
 from src.config import Config
 from src.extensions.database import db
 from src.extensions.jwt import jwt
+from src.extensions.limiter import limiter
+from src.extensions.metrics import metrics
+from src.extensions.revocation import revocation_store
+from src.extensions.summarizer import summarizer
 from src.routes import get_blueprints
+from src.utils.log_util import setup_logging
+from src.utils.profiler import setup_profiler
+from src.utils.tracing import setup_tracing
 
-# 配置日志
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def create_app():
-    """创建Flask应用实例"""
+# src.app及其依赖的导入耗时（秒）
+IMPORT_TIME = time.perf_counter() - _import_started
+
+def create_app(config_overrides=None):
+    """
+    创建Flask应用实例
+    
+    Args:
+        config_overrides (dict): 覆盖默认配置的配置项，测试时用于指定独立的数据库等
+    
+    Returns:
+        Flask: 应用实例
+    """
+    started = time.perf_counter()
     app = Flask(__name__)
     
     # 从配置对象加载配置
@@ -22,6 +44,13 @@ def create_app():
     # 设置数据库连接为SQLite
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///nomad_health.db'
     
+    if config_overrides:
+        app.config.update(config_overrides)
+    
+    setup_logging(app)
+    setup_tracing(app)
+    setup_profiler(app)
+    
     # 启用CORS，允许所有跨域请求
     CORS(app, 
          supports_credentials=True, 
@@ -36,17 +65,27 @@ def create_app():
     # 初始化扩展
     db.init_app(app)
     jwt.init_app(app)
+    limiter.init_app(app)
+    revocation_store.init_app(app)
+    metrics.init_app(app)
+    summarizer.init_app(app)
     
     # 设置JWT密钥和过期时间
     app.config['JWT_SECRET_KEY'] = Config.JWT_SECRET_KEY
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = Config.JWT_ACCESS_TOKEN_EXPIRES
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = Config.JWT_REFRESH_TOKEN_EXPIRES
     
     # 注册蓝图
     register_blueprints(app)
     
-    # 创建数据库表
-    with app.app_context():
-        db.create_all()
+    # 数据库表结构由迁移工具管理（python migrate.py），启动时不执行DDL
+    
+    # 记录启动耗时
+    app.extensions['startup'] = {
+        'import_ms': round(IMPORT_TIME * 1000, 1),
+        'create_app_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    logger.info("应用创建完成，导入耗时 %(import_ms)sms，创建耗时 %(create_app_ms)sms", app.extensions['startup'])
     
     return app
 
@@ -10,22 +10,138 @@ class Config:
     
     # JWT配置
     JWT_SECRET_KEY = "nomad-health-jwt-secret-key-123456"
-    JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(days=1)
+    JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
+    JWT_REFRESH_TOKEN_EXPIRES = datetime.timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', '30')))
+    
+    # 令牌撤销列表配置
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', '100000'))
+    REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('REVOCATION_BLOOM_ERROR_RATE', '0.01'))
+    REVOCATION_SYNC_INTERVAL = int(os.getenv('REVOCATION_SYNC_INTERVAL', '5'))  # 秒，各worker增量同步撤销记录的间隔
+    REVOCATION_PURGE_INTERVAL = int(os.getenv('REVOCATION_PURGE_INTERVAL', '3600'))  # 秒
     
     # 文件上传配置
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp3', 'wav'} 
+    # 上传文件流式写入磁盘时每块的字节数
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(64 * 1024)))
+    # 图片处理：并行生成缩略图的线程数、编码质量、允许解码的最大像素数
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '4'))
+    IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', '80'))
+    IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', '40000000'))
+    # 上传文件的缓存时间（秒）：按内容寻址的文件内容不变，可长期缓存
+    MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', '3600'))
+    MEDIA_IMMUTABLE_MAX_AGE = int(os.getenv('MEDIA_IMMUTABLE_MAX_AGE', '31536000'))
+    # 由前端服务器发送文件：USE_X_SENDFILE用于Apache/lighttpd，
+    # MEDIA_ACCEL_REDIRECT_PREFIX为nginx中指向上传目录的internal location
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() in ('true', '1', 'yes')
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')
     
     # 讯飞语音识别API配置
     XUNFEI_API_KEY = os.getenv('XUNFEI_API_KEY', 'Your_API_KEY')
     XUNFEI_API_SECRET = os.getenv('XUNFEI_API_SECRET', 'Your_API_SECRET')
+    # 讯飞语音识别服务地址，签名使用其中的主机名和路径；本地测试可指向 benchmarks.xunfei_standin
+    XUNFEI_IAT_URL = os.getenv('XUNFEI_IAT_URL', 'wss://iat.cn-huabei-1.xf-yun.com/v1')
+    # 语音预处理：均方根音量低于该值的帧视为静音（16位PCM），单次识别的最长时长（秒）
+    AUDIO_SILENCE_THRESHOLD = int(os.getenv('AUDIO_SILENCE_THRESHOLD', '500'))
+    AUDIO_MAX_CHUNK_SECONDS = float(os.getenv('AUDIO_MAX_CHUNK_SECONDS', '55'))
+    # 语音活动检测：语句之间至少间隔多少毫秒的静音，相邻语句合并到不超过多少秒
+    AUDIO_VAD_MIN_SILENCE_MS = int(os.getenv('AUDIO_VAD_MIN_SILENCE_MS', '400'))
+    AUDIO_VAD_TARGET_SECONDS = float(os.getenv('AUDIO_VAD_TARGET_SECONDS', '15'))
+    # 每个进程同时进行的讯飞识别数
+    XUNFEI_MAX_CONCURRENCY = int(os.getenv('XUNFEI_MAX_CONCURRENCY', '4'))
+    # 单次讯飞识别的超时（秒）：连接、握手、等待识别结果的总时间
+    XUNFEI_TIMEOUT = float(os.getenv('XUNFEI_TIMEOUT', '30'))
+    # 语音识别结果的缓存时间（秒），按音频内容哈希保存在transcript_cache表中，0表示不缓存
+    TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', str(7 * 24 * 3600)))
     
     # 千问医疗模型API配置
     QWEN_API_URL = os.getenv('QWEN_API_URL', 'http://183.175.12.124:8000')
+    # 千问接口的连接超时和读取超时（秒），读取超时为两次收到数据之间的最长间隔
+    QWEN_CONNECT_TIMEOUT = float(os.getenv('QWEN_CONNECT_TIMEOUT', '5'))
+    QWEN_API_TIMEOUT = float(os.getenv('QWEN_API_TIMEOUT', '30'))
+    # 每个进程到千问服务保持的最大连接数
+    QWEN_POOL_SIZE = int(os.getenv('QWEN_POOL_SIZE', '10'))
+    # 每个进程同时发往千问服务的最大请求数，批量问答也受此限制
+    QWEN_MAX_CONCURRENCY = int(os.getenv('QWEN_MAX_CONCURRENCY', '10'))
+    # 批量问答单次最多的问题数
+    QWEN_BATCH_MAX_QUERIES = int(os.getenv('QWEN_BATCH_MAX_QUERIES', '1000'))
+    # 批量医疗问答答案的缓存时间（秒），0表示不缓存；单个问题的接口不使用缓存
+    ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', '3600'))
+    
+    # 多轮问诊上下文配置：最多带入的历史消息数、整个上下文及其中摘要的token预算
+    CONTEXT_MAX_MESSAGES = int(os.getenv('CONTEXT_MAX_MESSAGES', '20'))
+    CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+    CONTEXT_SUMMARY_TOKENS = int(os.getenv('CONTEXT_SUMMARY_TOKENS', '300'))
+    # 后台会话摘要：每新增多少条消息更新一次会话行上保存的摘要
+    SUMMARY_WORKER_ENABLED = os.getenv('SUMMARY_WORKER_ENABLED', 'true').lower() in ('true', '1', 'yes')
+    SUMMARY_EVERY_MESSAGES = int(os.getenv('SUMMARY_EVERY_MESSAGES', '10'))
+    
+    # 健康数据点：单次同步最多的数据点数、每批插入的行数、按区间查询最多返回的分桶数、默认图表的天数
+    DATAPOINT_INGEST_MAX_POINTS = int(os.getenv('DATAPOINT_INGEST_MAX_POINTS', '10000'))
+    DATAPOINT_INSERT_BATCH = int(os.getenv('DATAPOINT_INSERT_BATCH', '1000'))
+    DATAPOINT_MAX_BUCKETS = int(os.getenv('DATAPOINT_MAX_BUCKETS', '1000'))
+    DATAPOINT_DEFAULT_DAYS = int(os.getenv('DATAPOINT_DEFAULT_DAYS', '90'))
+    # 健康数据统计：统计最近多少天、滑动平均的天数、夜间批处理每批计算的用户数
+    HEALTH_STATS_DAYS = int(os.getenv('HEALTH_STATS_DAYS', '90'))
+    HEALTH_STATS_ROLLING_DAYS = int(os.getenv('HEALTH_STATS_ROLLING_DAYS', '7'))
+    HEALTH_STATS_BATCH_USERS = int(os.getenv('HEALTH_STATS_BATCH_USERS', '500'))
+    # 健康报告批量导入：合作医院在X-Import-Token请求头中携带该令牌后可为任意用户导入，为空时只能导入自己的报告；
+    # 每个事务写入的报告数、每份报告最多的项目数、最多返回的错误条数
+    REPORT_IMPORT_TOKEN = os.getenv('REPORT_IMPORT_TOKEN', '')
+    REPORT_IMPORT_CHUNK_SIZE = int(os.getenv('REPORT_IMPORT_CHUNK_SIZE', '500'))
+    REPORT_IMPORT_MAX_ITEMS = int(os.getenv('REPORT_IMPORT_MAX_ITEMS', '200'))
+    REPORT_IMPORT_MAX_ERRORS = int(os.getenv('REPORT_IMPORT_MAX_ERRORS', '1000'))
+    # 异常报告项目查询最多返回的项目数；回填数值列时每批处理的项目数
+    ABNORMAL_ITEMS_MAX_LIMIT = int(os.getenv('ABNORMAL_ITEMS_MAX_LIMIT', '500'))
+    REPORT_ITEM_BACKFILL_BATCH = int(os.getenv('REPORT_ITEM_BACKFILL_BATCH', '1000'))
     
     # API基础URL配置
     BASE_URL = os.getenv('BASE_URL', 'http://127.0.0.1:5000/api')
     
     # 是否使用模拟医疗大模型响应
-    USE_MOCK_MEDICAL_MODEL = os.getenv('USE_MOCK_MEDICAL_MODEL', 'false').lower() in ('true', '1', 'yes') 
+    USE_MOCK_MEDICAL_MODEL = os.getenv('USE_MOCK_MEDICAL_MODEL', 'false').lower() in ('true', '1', 'yes')
+    # 模拟响应的延迟（秒），压测时设为0
+    MOCK_MEDICAL_MODEL_LATENCY = float(os.getenv('MOCK_MEDICAL_MODEL_LATENCY', '1'))
+    
+    # 登录限流配置
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('true', '1', 'yes')
+    # memory:// 为进程内存储；sqlite:///path/to/file.db 可在同一主机的多个worker之间共享
+    RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL', 'memory://')
+    LOGIN_IP_BUCKET_CAPACITY = int(os.getenv('LOGIN_IP_BUCKET_CAPACITY', '20'))
+    LOGIN_IP_REFILL_PER_SECOND = float(os.getenv('LOGIN_IP_REFILL_PER_SECOND', '0.5'))
+    LOGIN_ACCOUNT_BUCKET_CAPACITY = int(os.getenv('LOGIN_ACCOUNT_BUCKET_CAPACITY', '5'))
+    LOGIN_ACCOUNT_REFILL_PER_SECOND = float(os.getenv('LOGIN_ACCOUNT_REFILL_PER_SECOND', '0.1'))
+    LOGIN_LOCKOUT_THRESHOLD = int(os.getenv('LOGIN_LOCKOUT_THRESHOLD', '10'))
+    LOGIN_LOCKOUT_WINDOW = int(os.getenv('LOGIN_LOCKOUT_WINDOW', '900'))  # 秒
+    
+    # 日志配置
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    # 按模块设置级别，如 "sqlalchemy.engine=WARNING,src.routes.auth=DEBUG"
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json, text
+    # 日志经队列由后台线程写出，请求线程不阻塞在I/O上
+    LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() in ('true', '1', 'yes')
+    
+    # 指标配置
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('true', '1', 'yes')
+    # 多worker部署时各进程把指标写入该目录，由/metrics汇总；为空时只输出当前进程的指标
+    METRICS_DIR = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '1'))  # 秒
+    
+    # 请求追踪配置
+    # none 不导出；stdout 输出到标准输出；其他值视为文件路径，按行写入OTLP/JSON
+    TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'none')
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+    TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'nomad-health')
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() in ('true', '1', 'yes')
+    
+    # 性能分析配置（默认关闭）
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() in ('true', '1', 'yes')
+    # 管理接口和按请求cProfile需要在X-Admin-Token请求头中携带该令牌，为空时不可用
+    PROFILER_ADMIN_TOKEN = os.getenv('PROFILER_ADMIN_TOKEN', '')
+    PROFILER_OUTPUT_DIR = os.getenv('PROFILER_OUTPUT_DIR', 'profiles')
+    PROFILER_SIGNAL = os.getenv('PROFILER_SIGNAL', 'SIGUSR2')
+    PROFILER_DEFAULT_SECONDS = float(os.getenv('PROFILER_DEFAULT_SECONDS', '10'))
+    PROFILER_MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '60'))
+    PROFILER_SAMPLE_INTERVAL = float(os.getenv('PROFILER_SAMPLE_INTERVAL', '0.005'))
@@ -1,4 +1,8 @@
 from src.extensions.database import db
 from src.extensions.jwt import jwt
+from src.extensions.limiter import limiter
+from src.extensions.metrics import metrics
+from src.extensions.revocation import revocation_store
+from src.extensions.summarizer import summarizer
 
-__all__ = ['db', 'jwt'] 
\ No newline at end of file
+__all__ = ['db', 'jwt', 'limiter', 'metrics', 'revocation_store', 'summarizer'] 
\ No newline at end of file
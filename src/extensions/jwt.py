@@ -1,6 +1,8 @@
 from flask_jwt_extended import JWTManager
 from flask import jsonify
 
+from src.extensions.revocation import revocation_store
+
 # 初始化JWTManager实例
 jwt = JWTManager()
 
@@ -39,4 +41,17 @@ def token_verification_failed_callback():
         'code': 401,
         'message': '令牌验证失败',
         'data': None
-    }), 401 
\ No newline at end of file
+    }), 401 
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    """检查令牌是否已被撤销"""
+    return revocation_store.is_revoked(jwt_payload['jti'])
+
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    """已撤销令牌回调"""
+    return jsonify({
+        'code': 401,
+        'message': '令牌已失效，请重新登录',
+        'data': None
+    }), 401
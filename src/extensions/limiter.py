@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStorage:
+    """进程内存储，适用于单进程或开发环境"""
+
+    # 超过该数量的键时清理过期数据，防止内存无限增长
+    MAX_KEYS = 100000
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, func, ttl):
+        """
+        原子地读取并更新一个键
+
+        Args:
+            key (str): 键名
+            func (callable): 接收旧值（不存在或已过期时为None），返回新值
+            ttl (float): 新值的存活秒数
+
+        Returns:
+            Any: 新值
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            value = entry[0] if entry and entry[1] > now else None
+            new_value = func(value)
+            self._data[key] = (new_value, now + ttl)
+            if len(self._data) > self.MAX_KEYS:
+                self._purge(now)
+            return new_value
+
+    def get(self, key):
+        """读取一个键，不存在或已过期时返回None"""
+        entry = self._data.get(key)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        return None
+
+    def delete(self, key):
+        """删除一个键"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _purge(self, now):
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+
+class SqliteStorage:
+    """基于SQLite文件的存储，同一主机上的多个gunicorn worker可共享限流状态"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def update(self, key, func, ttl):
+        """原子地读取并更新一个键，参数同MemoryStorage.update"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM rate_limit WHERE key = ?", (key,)
+            ).fetchone()
+            value = json.loads(row[0]) if row and row[1] > now else None
+            new_value = func(value)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(new_value), now + ttl)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return new_value
+
+    def get(self, key):
+        """读取一个键，不存在或已过期时返回None"""
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM rate_limit WHERE key = ?", (key,)
+        ).fetchone()
+        if row and row[1] > time.time():
+            return json.loads(row[0])
+        return None
+
+    def delete(self, key):
+        """删除一个键"""
+        self._connect().execute("DELETE FROM rate_limit WHERE key = ?", (key,))
+
+
+def create_storage(url):
+    """
+    根据URL创建限流存储
+
+    Args:
+        url (str): memory:// 或 sqlite:///path/to/file.db
+
+    Returns:
+        MemoryStorage | SqliteStorage: 存储实例
+    """
+    if not url or url == 'memory://':
+        return MemoryStorage()
+    if url.startswith('sqlite:///'):
+        return SqliteStorage(url[len('sqlite:///'):])
+    raise ValueError(f"不支持的限流存储: {url}")
+
+
+class TokenBucket:
+    """令牌桶：允许capacity次突发请求，之后按refill_rate每秒恢复令牌"""
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+
+    def consume(self, storage, key, cost=1):
+        """
+        尝试从桶中取出令牌
+
+        Returns:
+            float: 需要等待的秒数，0表示放行
+        """
+        now = time.time()
+        retry_after = 0
+
+        def _apply(state):
+            nonlocal retry_after
+            tokens, last = state if state else (self.capacity, now)
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / self.refill_rate
+            return [tokens, now]
+
+        # 令牌桶回满后状态与新建时相同，过期即可丢弃
+        storage.update(key, _apply, ttl=self.capacity / self.refill_rate + 1)
+        return retry_after
+
+
+class SlidingWindowCounter:
+    """滑动窗口计数器，用当前和上一个固定窗口的加权和近似滑动窗口内的次数"""
+
+    def __init__(self, window):
+        self.window = window
+
+    def _roll(self, state, now):
+        start, current, previous = state if state else (now, 0, 0)
+        elapsed_windows = int((now - start) // self.window)
+        if elapsed_windows == 1:
+            start, current, previous = start + self.window, 0, current
+        elif elapsed_windows > 1:
+            start, current, previous = now, 0, 0
+        return [start, current, previous]
+
+    def _weighted(self, state, now):
+        start, current, previous = state
+        weight = 1 - (now - start) / self.window
+        return current + previous * max(weight, 0)
+
+    def hit(self, storage, key):
+        """记录一次事件，返回窗口内的近似次数"""
+        now = time.time()
+
+        def _apply(state):
+            state = self._roll(state, now)
+            state[1] += 1
+            return state
+
+        state = storage.update(key, _apply, ttl=self.window * 2)
+        return self._weighted(state, now)
+
+    def count(self, storage, key):
+        """返回窗口内的近似次数"""
+        state = storage.get(key)
+        if not state:
+            return 0
+        now = time.time()
+        return self._weighted(self._roll(state, now), now)
+
+
+class LoginRateLimiter:
+    """
+    登录类接口的限流器
+
+    每个IP和每个账号各有一个令牌桶限制请求速率；账号的失败次数用滑动窗口统计，
+    超过阈值后在窗口期内锁定该账号。检查在密码哈希之前进行，被拒绝的请求不消耗哈希计算。
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.storage = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get('RATE_LIMIT_ENABLED', True)
+        self.storage = create_storage(config.get('RATE_LIMIT_STORAGE_URL', 'memory://'))
+        self.ip_bucket = TokenBucket(
+            config.get('LOGIN_IP_BUCKET_CAPACITY', 20),
+            config.get('LOGIN_IP_REFILL_PER_SECOND', 0.5)
+        )
+        self.account_bucket = TokenBucket(
+            config.get('LOGIN_ACCOUNT_BUCKET_CAPACITY', 5),
+            config.get('LOGIN_ACCOUNT_REFILL_PER_SECOND', 0.1)
+        )
+        self.lockout_threshold = config.get('LOGIN_LOCKOUT_THRESHOLD', 10)
+        self.failures = SlidingWindowCounter(config.get('LOGIN_LOCKOUT_WINDOW', 900))
+        app.extensions['login_limiter'] = self
+
+    def check(self, account, ip):
+        """
+        检查本次登录尝试是否放行
+
+        Args:
+            account (str): 账号、手机号等登录标识
+            ip (str): 客户端IP
+
+        Returns:
+            int: 需要等待的秒数，0表示放行
+        """
+        if not self.enabled:
+            return 0
+
+        if self.failures.count(self.storage, f"fail:{account}") >= self.lockout_threshold:
+            logger.warning("账号因多次登录失败被临时锁定: %s", account)
+            return int(self.failures.window)
+
+        retry_after = self.ip_bucket.consume(self.storage, f"ip:{ip}")
+        if not retry_after:
+            retry_after = self.account_bucket.consume(self.storage, f"account:{account}")
+        return int(retry_after) + 1 if retry_after else 0
+
+    def record_failure(self, account):
+        """记录一次失败的登录尝试"""
+        if self.enabled:
+            self.failures.hit(self.storage, f"fail:{account}")
+
+    def reset(self, account):
+        """登录成功后清除账号的失败记录"""
+        if self.enabled:
+            self.storage.delete(f"fail:{account}")
+
+
+# 初始化登录限流器实例
+limiter = LoginRateLimiter()
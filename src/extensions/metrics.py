@@ -0,0 +1,366 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 延迟直方图的默认桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class _Metric:
+    """指标基类，按标签值保存数据"""
+
+    type = None
+
+    def __init__(self, registry, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = registry.lock
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'type': self.type,
+                'help': self.help,
+                'labelnames': list(self.labelnames),
+                'values': [[list(key), value] for key, value in self.values.items()]
+            }
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值，多进程汇总时只统计存活的worker"""
+
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """直方图，每个标签组合保存各桶计数、总和与总数"""
+
+    type = 'histogram'
+
+    def __init__(self, registry, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data['buckets'][i] += 1
+                    break
+            else:
+                data['buckets'][-1] += 1
+            data['sum'] += value
+            data['count'] += 1
+
+    def snapshot(self):
+        result = super().snapshot()
+        result['buckets'] = list(self.buckets)
+        return result
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    每个进程在内存中累计指标，并定期把快照写到METRICS_DIR下以进程号命名的文件中。
+    /metrics接口读取目录下所有文件并汇总，gunicorn的多个worker因此能汇总成一份指标。
+    未配置METRICS_DIR时只输出当前进程的指标。
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}
+        self.directory = None
+        self.flush_interval = 1
+        self._next_flush = 0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def flush(self, force=False):
+        """把当前进程的指标快照写入文件，两次写入间隔不小于flush_interval"""
+        if not self.directory:
+            return
+        now = time.time()
+        if not force and now < self._next_flush:
+            return
+        self._next_flush = now + self.flush_interval
+        path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("写入指标文件失败: %s", e)
+
+    def collect(self):
+        """汇总所有worker的指标，返回与snapshot相同结构的数据"""
+        merged = self.snapshot()
+        if not self.directory:
+            return merged
+
+        own_file = f"metrics_{os.getpid()}.json"
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            if os.path.basename(path) == own_file:
+                continue
+            try:
+                with open(path) as f:
+                    other = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(_pid_from_path(path))
+            for name, data in other.items():
+                if name not in merged or (data['type'] == 'gauge' and not alive):
+                    continue
+                _merge_values(merged[name], data)
+        return merged
+
+    def render(self):
+        """以Prometheus文本格式输出汇总后的指标"""
+        lines = []
+        for name, data in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {data['help']}")
+            lines.append(f"# TYPE {name} {data['type']}")
+            labelnames = data['labelnames']
+            for labelvalues, value in sorted(data['values'], key=lambda item: item[0]):
+                labels = list(zip(labelnames, labelvalues))
+                if data['type'] == 'histogram':
+                    cumulative = 0
+                    bounds = [_format_number(b) for b in data['buckets']] + ['+Inf']
+                    for bound, count in zip(bounds, value['buckets']):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(value['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_values(target, data):
+    existing = {tuple(key): value for key, value in target['values']}
+    for key, value in data['values']:
+        key = tuple(key)
+        if key not in existing:
+            existing[key] = value
+        elif data['type'] == 'histogram':
+            current = existing[key]
+            existing[key] = {
+                'buckets': [a + b for a, b in zip(current['buckets'], value['buckets'])],
+                'sum': current['sum'] + value['sum'],
+                'count': current['count'] + value['count']
+            }
+        else:
+            existing[key] = existing[key] + value
+    target['values'] = [[list(key), value] for key, value in existing.items()]
+
+
+def _pid_from_path(path):
+    try:
+        return int(os.path.basename(path)[len('metrics_'):-len('.json')])
+    except ValueError:
+        return None
+
+
+def _pid_alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# 全局指标注册表
+registry = MetricsRegistry()
+
+REQUEST_COUNT = Counter(registry, 'http_requests_total', 'HTTP请求数', ['method', 'endpoint', 'status'])
+REQUEST_LATENCY = Histogram(registry, 'http_request_duration_seconds', 'HTTP请求处理耗时', ['method', 'endpoint'])
+REQUESTS_IN_FLIGHT = Gauge(registry, 'http_requests_in_flight', '正在处理的HTTP请求数')
+DB_QUERY_COUNT = Histogram(registry, 'db_queries_per_request', '每个请求执行的SQL数', ['endpoint'],
+                           buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+DB_QUERY_TIME = Histogram(registry, 'db_query_seconds_per_request', '每个请求的SQL总耗时', ['endpoint'])
+UPSTREAM_REQUESTS = Counter(registry, 'upstream_requests_total', '上游服务调用次数', ['service', 'outcome'])
+UPSTREAM_LATENCY = Histogram(registry, 'upstream_request_duration_seconds', '上游服务调用耗时', ['service'])
+UPSTREAM_IN_FLIGHT = Gauge(registry, 'upstream_requests_in_flight', '正在进行的上游服务调用数', ['service'])
+CACHE_REQUESTS = Counter(registry, 'cache_requests_total', '缓存查询次数', ['cache', 'result'])
+
+
+def record_cache(cache, hit):
+    """
+    记录一次缓存查询
+
+    Args:
+        cache (str): 缓存名称
+        hit (bool): 是否命中
+    """
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+@contextmanager
+def track_upstream(service):
+    """
+    统计一次上游服务调用，用法:
+
+        with track_upstream('qwen') as call:
+            ...
+            call['outcome'] = 'error'
+
+    outcome默认为ok，代码块抛出异常时记为error，超时需由调用方设置为timeout
+    """
+    call = {'outcome': 'ok'}
+    UPSTREAM_IN_FLIGHT.inc(service=service)
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        if call['outcome'] == 'ok':
+            call['outcome'] = 'error'
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(service=service)
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, service=service)
+        UPSTREAM_REQUESTS.inc(service=service, outcome=call['outcome'])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _record_query(conn):
+    started = conn.info['query_started'].pop()
+    if has_request_context():
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        g.db_query_time = g.get('db_query_time', 0) + time.perf_counter() - started
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(conn)
+
+
+def _handle_db_error(exception_context):
+    # 语句出错时after_cursor_execute不会执行，在这里取出开始时间，否则列表随连接池中的连接一直增长
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_started'):
+        _record_query(conn)
+
+
+class Metrics:
+    """指标扩展：记录请求、SQL、上游调用指标，并提供/metrics接口"""
+
+    _engine_listeners_installed = False
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        registry.directory = app.config.get('METRICS_DIR') or None
+        registry.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 1)
+        if registry.directory:
+            os.makedirs(registry.directory, exist_ok=True)
+
+        if not Metrics._engine_listeners_installed:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_db_error)
+            Metrics._engine_listeners_installed = True
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+        app.extensions['metrics'] = self
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        g.db_query_count = 0
+        g.db_query_time = 0
+        REQUESTS_IN_FLIGHT.inc()
+
+    def _after_request(self, response):
+        started = g.get('request_started')
+        if started is not None and request.endpoint != 'metrics':
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_COUNT.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+            REQUEST_LATENCY.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+            DB_QUERY_COUNT.observe(g.get('db_query_count', 0), endpoint=endpoint)
+            DB_QUERY_TIME.observe(g.get('db_query_time', 0), endpoint=endpoint)
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('request_started', None) is not None:
+            REQUESTS_IN_FLIGHT.dec()
+        registry.flush()
+
+    def _metrics_view(self):
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+# 初始化指标扩展实例
+metrics = Metrics()
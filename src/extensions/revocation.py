@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+
+from src.extensions.database import db
+from src.models.token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """布隆过滤器，判断不存在时一定不存在，判断存在时需要再查精确集合"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # 双重哈希：由一次blake2b摘要派生出hash_count个位置
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    """
+    JWT撤销列表
+
+    撤销记录持久化到revoked_tokens表，各worker在内存中维护布隆过滤器和
+    jti到过期时间的精确映射。每个请求的检查只访问内存；数据库只在同步间隔到期时
+    增量读取其他worker新写入的撤销记录。记录在令牌本身过期后即被清理。
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._bloom = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.capacity = app.config.get('REVOCATION_BLOOM_CAPACITY', 100000)
+        self.error_rate = app.config.get('REVOCATION_BLOOM_ERROR_RATE', 0.01)
+        self.sync_interval = app.config.get('REVOCATION_SYNC_INTERVAL', 5)
+        self.purge_interval = app.config.get('REVOCATION_PURGE_INTERVAL', 3600)
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._expiry = {}
+        self._last_id = 0
+        self._next_sync = 0
+        self._next_purge = 0
+        app.extensions['revocation_store'] = self
+
+    def revoke(self, jwt_payload):
+        """
+        撤销一个令牌
+
+        Args:
+            jwt_payload (dict): 已解码的JWT载荷，需包含jti、type和exp
+        """
+        jti = jwt_payload['jti']
+        expires_at = jwt_payload['exp']
+        user_id = jwt_payload.get('sub')
+        db.session.add(RevokedToken(
+            jti=jti,
+            token_type=jwt_payload.get('type', 'access'),
+            user_id=int(user_id) if user_id and str(user_id).isdigit() else None,
+            expires_at=datetime.fromtimestamp(expires_at)
+        ))
+        db.session.commit()
+        with self._lock:
+            self._remember(jti, expires_at)
+
+    def is_revoked(self, jti):
+        """
+        检查令牌是否已撤销，常数时间的内存查找
+
+        Args:
+            jti (str): 令牌ID
+
+        Returns:
+            bool: 是否已撤销
+        """
+        now = time.time()
+        if now >= self._next_sync:
+            self._sync(now)
+        if jti not in self._bloom:
+            return False
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > now
+
+    def _remember(self, jti, expires_at):
+        self._expiry[jti] = expires_at
+        self._bloom.add(jti)
+
+    def _sync(self, now):
+        with self._lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+            try:
+                rows = db.session.query(
+                    RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at
+                ).filter(RevokedToken.id > self._last_id).order_by(RevokedToken.id).all()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning("同步令牌撤销列表失败: %s", e)
+                return
+
+            for row_id, jti, expires_at in rows:
+                self._last_id = row_id
+                expires_ts = expires_at.timestamp()
+                if expires_ts > now:
+                    self._remember(jti, expires_ts)
+
+            if now >= self._next_purge:
+                self._next_purge = now + self.purge_interval
+                self._purge(now)
+
+    def _purge(self, now):
+        # 布隆过滤器不支持删除，清理过期记录后重建
+        self._expiry = {jti: exp for jti, exp in self._expiry.items() if exp > now}
+        self._bloom = BloomFilter(max(self.capacity, len(self._expiry) * 2), self.error_rate)
+        for jti in self._expiry:
+            self._bloom.add(jti)
+        try:
+            RevokedToken.query.filter(RevokedToken.expires_at < datetime.fromtimestamp(now)).delete()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("清理过期撤销记录失败: %s", e)
+
+
+# 初始化令牌撤销列表实例
+revocation_store = RevocationStore()
@@ -0,0 +1,134 @@
+import logging
+import os
+import queue
+import threading
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from src.extensions.database import db
+from src.models.consult import ConsultMessage, ConsultSession
+from src.utils.context_builder import ROLE_LABELS, extend_summary
+
+logger = logging.getLogger(__name__)
+
+# 一次更新最多读取的新消息数；摘要只保留最近的部分，更早的消息读了也会被丢弃
+MAX_MESSAGES_PER_UPDATE = 200
+
+
+class SessionSummarizer:
+    """
+    后台会话摘要任务
+
+    发送消息后把会话ID放入进程内队列，由后台线程在请求之外更新摘要：
+    只读取上次摘要之后新增的消息，追加到会话行上保存的摘要并按预算截断，
+    每累计SUMMARY_EVERY_MESSAGES条新消息更新一次，不重新扫描完整历史。
+    """
+
+    def __init__(self, app=None):
+        self._queue = None
+        self._pid = None
+        self._pending = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['summarizer'] = self
+
+    def notify(self, session_id):
+        """
+        会话有新消息时调用，把摘要更新排入后台队列，同一会话排队中时不重复入队
+
+        Args:
+            session_id (int): 会话ID
+        """
+        app = current_app._get_current_object()
+        if not app.config.get('SUMMARY_WORKER_ENABLED', True):
+            return
+        key = (id(app), session_id)
+        with self._lock:
+            # 进程fork后后台线程不会被复制，按进程号懒启动
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pending = set()
+                threading.Thread(target=self._run, args=(self._queue,), daemon=True,
+                                 name='session-summarizer').start()
+                self._pid = os.getpid()
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            self._queue.put((app, session_id))
+
+    def wait(self):
+        """等待队列中已有的摘要任务全部完成"""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def _run(self, task_queue):
+        while True:
+            app, session_id = task_queue.get()
+            with self._lock:
+                self._pending.discard((id(app), session_id))
+            try:
+                with app.app_context():
+                    try:
+                        self.update(session_id)
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.warning("更新会话%s的摘要失败: %s", session_id, e)
+            finally:
+                task_queue.task_done()
+
+    def update(self, session_id, every=None, token_budget=None):
+        """
+        新消息达到阈值时增量更新会话摘要
+
+        Args:
+            session_id (int): 会话ID
+            every (int): 触发更新的新消息数，默认SUMMARY_EVERY_MESSAGES
+            token_budget (int): 摘要的token预算，默认CONTEXT_SUMMARY_TOKENS
+
+        Returns:
+            bool: 是否更新了摘要
+        """
+        config = current_app.config
+        every = every or config.get('SUMMARY_EVERY_MESSAGES', 10)
+        token_budget = token_budget or config.get('CONTEXT_SUMMARY_TOKENS', 300)
+
+        row = db.session.execute(
+            select(ConsultSession.summary, ConsultSession.summarized_until).where(ConsultSession.id == session_id)
+        ).first()
+        if row is None:
+            return False
+        summarized_until = row.summarized_until or 0
+
+        rows = db.session.execute(
+            select(ConsultMessage.id, ConsultMessage.sender_type, ConsultMessage.content).where(
+                ConsultMessage.session_id == session_id,
+                ConsultMessage.id >= summarized_until,
+                ConsultMessage.sender_type.in_(list(ROLE_LABELS))
+            ).order_by(ConsultMessage.id.desc()).limit(MAX_MESSAGES_PER_UPDATE)
+        ).all()
+        if len(rows) < every:
+            return False
+        rows.reverse()
+
+        # 条件更新：其他worker已经更新过时放弃本次结果
+        result = db.session.execute(
+            update(ConsultSession).where(
+                ConsultSession.id == session_id,
+                db.func.coalesce(ConsultSession.summarized_until, 0) == summarized_until
+            ).values(
+                summary=extend_summary(row.summary or '', rows, token_budget),
+                summarized_until=rows[-1].id + 1,
+                # 摘要不是用户操作，保持会话的更新时间不变
+                updated_at=ConsultSession.updated_at
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+
+# 全局摘要任务
+summarizer = SessionSummarizer()
@@ -0,0 +1,8 @@
+from src.migrations.engine import MIGRATIONS, migration, current_version, upgrade
+
+__all__ = [
+    'MIGRATIONS',
+    'migration',
+    'current_version',
+    'upgrade'
+]
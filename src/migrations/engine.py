@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, inspect, text
+
+from src.extensions.database import db
+
+logger = logging.getLogger(__name__)
+
+# 记录已执行迁移的版本表
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+# 按版本号注册的迁移列表
+MIGRATIONS = []
+
+
+class Migration:
+    """一个前向迁移，upgrade函数接收数据库连接，且必须可以重复执行"""
+
+    def __init__(self, version, description, upgrade):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+
+def migration(version, description):
+    """
+    注册迁移的装饰器
+
+    Args:
+        version (int): 版本号，必须唯一且递增
+        description (str): 迁移说明
+    """
+    def decorator(func):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"迁移版本号重复: {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+def add_column(conn, table_name, column_name, ddl):
+    """
+    表中缺少该列时添加列
+
+    Args:
+        conn: 数据库连接
+        table_name (str): 表名
+        column_name (str): 列名
+        ddl (str): 列定义，如 "TEXT DEFAULT ''"
+    """
+    columns = [column['name'] for column in inspect(conn).get_columns(table_name)]
+    if column_name not in columns:
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}"))
+        logger.info("已添加列 %s.%s", table_name, column_name)
+
+
+def create_index(conn, index_name, table, *columns, unique=False):
+    """
+    索引不存在时创建索引
+
+    Args:
+        conn: 数据库连接
+        index_name (str): 索引名
+        table (Table): SQLAlchemy表对象
+        columns (str): 列名
+        unique (bool): 是否唯一索引
+    """
+    # 模型中已声明的索引直接复用，重复构造同名索引会被再次挂到表上
+    index = next((item for item in table.indexes if item.name == index_name), None)
+    if index is not None:
+        index.create(conn, checkfirst=True)
+        return
+    index = Index(index_name, *[table.c[name] for name in columns], unique=unique)
+    index.create(conn, checkfirst=True)
+    # 只为旧表补建的索引不留在模型上，以免之后新建的表也带上
+    table.indexes.discard(index)
+
+
+def create_tables(conn, *tables):
+    """不存在时创建表"""
+    db.metadata.create_all(bind=conn, tables=list(tables), checkfirst=True)
+
+
+def applied_versions(conn):
+    """返回已执行的迁移版本号集合"""
+    schema_version.create(conn, checkfirst=True)
+    return {row[0] for row in conn.execute(schema_version.select().with_only_columns(schema_version.c.version))}
+
+
+def current_version(engine=None):
+    """
+    返回数据库当前的架构版本
+
+    Returns:
+        int: 已执行的最大版本号，未执行任何迁移时为0
+    """
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        return max(applied_versions(conn), default=0)
+
+
+def upgrade(engine=None, target=None):
+    """
+    执行所有未执行的迁移，每个迁移在各自的事务中执行
+
+    Args:
+        engine: 数据库引擎，默认使用当前应用的引擎
+        target (int): 目标版本号，默认执行到最新版本
+
+    Returns:
+        list: 本次执行的迁移版本号
+    """
+    # 确保所有迁移已注册
+    import src.migrations.versions  # noqa: F401
+
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+
+    applied = []
+    for m in MIGRATIONS:
+        if m.version in done or (target is not None and m.version > target):
+            continue
+        logger.info("执行迁移 %s: %s", m.version, m.description)
+        with engine.begin() as conn:
+            m.upgrade(conn)
+            conn.execute(schema_version.insert().values(
+                version=m.version,
+                description=m.description,
+                applied_at=datetime.now()
+            ))
+        applied.append(m.version)
+    return applied
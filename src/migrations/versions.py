@@ -0,0 +1,125 @@
+from sqlalchemy import inspect, text
+
+from src.migrations.engine import migration, add_column, create_index, create_tables
+from src.models import (
+    User, UserSetting, HealthReport, HealthReportItem, HealthAdvice,
+    ConsultSession, ConsultMessage, Article, ArticleCategory, Tag, RevokedToken, TranscriptCache,
+    HealthDatapoint, HealthDatapointRollup, HealthStats
+)
+from src.models.article import article_tags
+
+# 所有迁移都必须可以重复执行：建表使用checkfirst，加列前先检查列是否存在
+
+
+@migration(1, '创建初始表结构')
+def create_initial_tables(conn):
+    create_tables(
+        conn,
+        User.__table__, UserSetting.__table__,
+        HealthReport.__table__, HealthReportItem.__table__, HealthAdvice.__table__,
+        ConsultSession.__table__, ConsultMessage.__table__,
+        ArticleCategory.__table__, Tag.__table__, Article.__table__, article_tags,
+        RevokedToken.__table__
+    )
+
+
+@migration(2, '补齐旧版初始化脚本创建的表中缺失的列')
+def add_legacy_missing_columns(conn):
+    # register-test曾创建只有部分列的users表
+    add_column(conn, 'users', 'gender', "VARCHAR(10) DEFAULT 'unknown'")
+    add_column(conn, 'users', 'birthday', "DATE")
+    add_column(conn, 'users', 'height', "FLOAT DEFAULT 0")
+    add_column(conn, 'users', 'weight', "FLOAT DEFAULT 0")
+    add_column(conn, 'users', 'avatar', "VARCHAR(200)")
+    add_column(conn, 'users', 'updated_at', "DATETIME")
+
+    # 原fix_consult_tables.py修复的问诊表列
+    add_column(conn, 'consult_sessions', 'title', "VARCHAR(100) DEFAULT '问诊会话'")
+    add_column(conn, 'consult_sessions', 'description', "TEXT DEFAULT ''")
+    add_column(conn, 'consult_sessions', 'status', "VARCHAR(20) DEFAULT 'active'")
+    add_column(conn, 'consult_sessions', 'created_at', "DATETIME")
+    add_column(conn, 'consult_sessions', 'updated_at', "DATETIME")
+    add_column(conn, 'consult_messages', 'sender_type', "VARCHAR(20) DEFAULT 'system'")
+    add_column(conn, 'consult_messages', 'content', "TEXT DEFAULT ''")
+    add_column(conn, 'consult_messages', 'content_type', "VARCHAR(20) DEFAULT 'text'")
+    add_column(conn, 'consult_messages', 'media_url', "VARCHAR(200)")
+    add_column(conn, 'consult_messages', 'created_at', "DATETIME")
+
+
+@migration(3, '为问诊消息添加(session_id, created_at)索引')
+def add_consult_message_session_index(conn):
+    create_index(conn, 'ix_consult_messages_session_created', ConsultMessage.__table__, 'session_id', 'created_at')
+
+
+@migration(4, '为问诊会话添加后台维护的摘要列')
+def add_consult_session_summary(conn):
+    add_column(conn, 'consult_sessions', 'summary', "TEXT")
+    add_column(conn, 'consult_sessions', 'summarized_until', "INTEGER DEFAULT 0")
+
+
+@migration(5, '为用户添加头像缩略图哈希列')
+def add_user_avatar_hash(conn):
+    add_column(conn, 'users', 'avatar_hash', "VARCHAR(64)")
+
+
+@migration(6, '为文章添加封面衍生图信息列')
+def add_article_cover_variants(conn):
+    add_column(conn, 'articles', 'cover_variants', "JSON")
+
+
+@migration(7, '创建语音识别结果缓存表')
+def create_transcript_cache_table(conn):
+    create_tables(conn, TranscriptCache.__table__)
+
+
+@migration(8, '创建健康数据点表及其预聚合表')
+def create_health_datapoint_tables(conn):
+    create_tables(conn, HealthDatapoint.__table__, HealthDatapointRollup.__table__)
+
+
+@migration(9, '创建健康数据统计结果缓存表')
+def create_health_stats_table(conn):
+    create_tables(conn, HealthStats.__table__)
+
+
+@migration(10, '为健康报告项目添加数值列及索引')
+def add_report_item_numbers(conn):
+    add_column(conn, 'health_report_items', 'value_num', "FLOAT")
+    add_column(conn, 'health_report_items', 'ref_low', "FLOAT")
+    add_column(conn, 'health_report_items', 'ref_high', "FLOAT")
+    add_column(conn, 'health_report_items', 'unit', "VARCHAR(20)")
+    create_index(conn, 'ix_health_report_items_report', HealthReportItem.__table__, 'report_id')
+    create_index(conn, 'ix_health_report_items_name_report', HealthReportItem.__table__, 'name', 'report_id')
+    create_index(conn, 'ix_health_reports_user_created', HealthReport.__table__, 'user_id', 'created_at')
+
+
+@migration(11, '撤销记录表的id改为AUTOINCREMENT，清理过期记录后不再复用')
+def revoked_tokens_autoincrement(conn):
+    # 只有SQLite会把删除的最大id分配给下一条记录，其他数据库的自增序列不回退
+    if conn.dialect.name != 'sqlite':
+        return
+    ddl = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'revoked_tokens'"
+    )).scalar()
+    if ddl is None or 'AUTOINCREMENT' in ddl.upper():
+        return
+    # SQLite不能修改主键定义，重建表；索引随旧表改名，先删除以便新表重建同名索引
+    conn.execute(text("ALTER TABLE revoked_tokens RENAME TO revoked_tokens_old"))
+    for index in RevokedToken.__table__.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    create_tables(conn, RevokedToken.__table__)
+    columns = ', '.join(column.name for column in RevokedToken.__table__.columns)
+    conn.execute(text(f"INSERT INTO revoked_tokens ({columns}) SELECT {columns} FROM revoked_tokens_old"))
+    conn.execute(text("DROP TABLE revoked_tokens_old"))
+
+
+@migration(12, '为旧版users表的账号和手机号补建唯一索引')
+def add_user_unique_indexes(conn):
+    # register-test创建的users表手机号没有唯一约束，且未填写的手机号存为空字符串
+    conn.execute(text("UPDATE users SET phone = NULL WHERE phone = ''"))
+    inspector = inspect(conn)
+    unique_columns = {tuple(item['column_names']) for item in inspector.get_unique_constraints('users')}
+    unique_columns |= {tuple(item['column_names']) for item in inspector.get_indexes('users') if item['unique']}
+    for column in ('account', 'phone'):
+        if (column,) not in unique_columns:
+            create_index(conn, f"uq_users_{column}", User.__table__, column, unique=True)
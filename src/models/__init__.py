@@ -1,8 +1,10 @@
 from src.models.user import User
 from src.models.setting import UserSetting
-from src.models.health import HealthReport, HealthReportItem, HealthAdvice
+from src.models.health import HealthReport, HealthReportItem, HealthAdvice, HealthDatapoint, HealthDatapointRollup, HealthStats
 from src.models.consult import ConsultSession, ConsultMessage
 from src.models.article import Article, ArticleCategory, Tag
+from src.models.token import RevokedToken
+from src.models.transcript import TranscriptCache
 
 __all__ = [
     'User', 
@@ -10,9 +12,14 @@ __all__ = [
     'HealthReport', 
     'HealthReportItem', 
     'HealthAdvice',
+    'HealthDatapoint',
+    'HealthDatapointRollup',
+    'HealthStats',
     'ConsultSession', 
     'ConsultMessage',
     'Article', 
     'ArticleCategory', 
-    'Tag'
+    'Tag',
+    'RevokedToken',
+    'TranscriptCache'
 ] 
\ No newline at end of file
@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import NEVER_SET, NO_VALUE
 from src.extensions.database import db
 
 # 文章标签关联表
@@ -54,6 +56,8 @@ class Article(db.Model):
     content = db.Column(db.Text, nullable=False)
     content_mn = db.Column(db.Text)
     cover_image = db.Column(db.String(200))
+    # 封面衍生图信息：{"hash", "width", "height", "widths", "lqip"}，未处理时为空
+    cover_variants = db.Column(db.JSON)
     author = db.Column(db.String(50))
     category_id = db.Column(db.Integer, db.ForeignKey('article_categories.id'))
     view_count = db.Column(db.Integer, default=0)
@@ -73,6 +77,7 @@ class Article(db.Model):
             'summary': self.summary,
             'summary_mn': self.summary_mn,
             'cover_image': self.cover_image,
+            'cover': self.cover_srcset(),
             'author': self.author,
             'category_id': self.category_id,
             'view_count': self.view_count,
@@ -90,7 +95,42 @@ class Article(db.Model):
             
         return result
     
+    def cover_srcset(self):
+        """
+        封面的响应式图片信息，供前端填入img/picture的srcset
+
+        Returns:
+            dict: {"src", "srcset", "srcset_webp", "width", "height", "lqip"}，封面未处理时为None
+        """
+        variants = self.cover_variants
+        if not variants:
+            return None
+        from src.utils.file_util import get_file_url
+        from src.utils.image_util import cover_variant_path
+
+        def srcset(extension):
+            return ', '.join(
+                f"{get_file_url(cover_variant_path(variants['hash'], width, extension))} {width}w"
+                for width in variants['widths']
+            )
+
+        return {
+            'src': get_file_url(cover_variant_path(variants['hash'], variants['widths'][-1], 'jpg')),
+            'srcset': srcset('jpg'),
+            'srcset_webp': srcset('webp'),
+            'width': variants['width'],
+            'height': variants['height'],
+            'lqip': variants['lqip']
+        }
+    
     def increment_view_count(self):
         """增加文章浏览次数"""
         self.view_count += 1
-        db.session.commit() 
\ No newline at end of file
+        db.session.commit()
+
+
+@event.listens_for(Article.cover_image, 'set', active_history=True)
+def _reset_cover_variants(target, value, oldvalue, initiator):
+    # 封面更换后旧的衍生图不再适用，等待重新处理；新建对象时不处理
+    if oldvalue not in (NO_VALUE, NEVER_SET) and value != oldvalue:
+        target.cover_variants = None
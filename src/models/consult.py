@@ -10,6 +10,9 @@ class ConsultSession(db.Model):
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     status = db.Column(db.String(20), default='active')  # active, closed
+    # 后台维护的滚动摘要，覆盖ID小于summarized_until的消息
+    summary = db.Column(db.Text)
+    summarized_until = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
@@ -22,7 +25,8 @@ class ConsultSession(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'title': self.title,
-            'description': self.description,
+            # 没有填写描述时以摘要作为会话描述，长度受摘要预算限制
+            'description': self.description or self.summary,
             'status': self.status,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
@@ -37,6 +41,10 @@ class ConsultSession(db.Model):
 class ConsultMessage(db.Model):
     """问诊消息模型"""
     __tablename__ = 'consult_messages'
+    # 按会话取最近的消息时使用
+    __table_args__ = (
+        db.Index('ix_consult_messages_session_created', 'session_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('consult_sessions.id'), nullable=False)
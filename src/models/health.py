@@ -1,9 +1,13 @@
 from datetime import datetime
+from sqlalchemy import event
 from src.extensions.database import db
 
 class HealthReport(db.Model):
     """健康报告模型"""
     __tablename__ = 'health_reports'
+    __table_args__ = (
+        db.Index('ix_health_reports_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -43,6 +47,10 @@ class HealthReport(db.Model):
 class HealthReportItem(db.Model):
     """健康报告项目模型"""
     __tablename__ = 'health_report_items'
+    __table_args__ = (
+        db.Index('ix_health_report_items_report', 'report_id'),
+        db.Index('ix_health_report_items_name_report', 'name', 'report_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
@@ -50,6 +58,27 @@ class HealthReportItem(db.Model):
     reference = db.Column(db.String(50))
     status = db.Column(db.String(20), default='normal')
     report_id = db.Column(db.Integer, db.ForeignKey('health_reports.id'), nullable=False)
+    # 写入时由value和reference解析出的数值，无法解析时为空
+    value_num = db.Column(db.Float)
+    ref_low = db.Column(db.Float)
+    ref_high = db.Column(db.Float)
+    unit = db.Column(db.String(20))
+    
+    def parse_values(self):
+        """根据value和reference填充数值列"""
+        from src.utils.report_values import parse_item
+        for field, number in parse_item(self.value, self.reference).items():
+            setattr(self, field, number)
+    
+    def derived_status(self):
+        """
+        按数值和参考范围判断的状态
+        
+        Returns:
+            str: abnormal或normal，无法判断时为None
+        """
+        from src.utils.report_values import item_status
+        return item_status(self.value_num, self.ref_low, self.ref_high)
     
     def to_dict(self):
         """将健康报告项目对象转换为字典"""
@@ -59,10 +88,21 @@ class HealthReportItem(db.Model):
             'name': self.name,
             'value': self.value,
             'reference': self.reference,
-            'status': self.status
+            'status': self.status,
+            'value_num': self.value_num,
+            'ref_low': self.ref_low,
+            'ref_high': self.ref_high,
+            'unit': self.unit
         }
 
 
+@event.listens_for(HealthReportItem, 'before_insert')
+@event.listens_for(HealthReportItem, 'before_update')
+def _parse_item_values(mapper, connection, target):
+    # 通过ORM写入的项目在刷新前统一解析，批量导入的Core插入由report_import自行填充
+    target.parse_values()
+
+
 class HealthAdvice(db.Model):
     """健康建议模型"""
     __tablename__ = 'health_advices'
@@ -89,4 +129,62 @@ class HealthAdvice(db.Model):
             'category': self.category,
             'has_read': self.has_read,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
-        } 
\ No newline at end of file
+        } 
+
+
+class HealthDatapoint(db.Model):
+    """
+    健康数据点模型（设备同步的体重、血压、血糖等读数）
+
+    ts为本地时间换算的秒数（把本地时间当作UTC计算），与其他表使用本地时间一致，按天汇总时日界即本地零点。
+    主键(user_id, metric, ts)同一时刻的重复读数后写覆盖；SQLite下建为WITHOUT ROWID表，
+    数据按主键聚簇存放，范围查询只读主键B树，PostgreSQL另建INCLUDE数值列的覆盖索引。
+    """
+    __tablename__ = 'health_datapoints'
+    __table_args__ = (
+        db.Index('ix_health_datapoints_covering', 'user_id', 'metric', 'ts',
+                 postgresql_include=['value', 'value2']).ddl_if(dialect='postgresql'),
+        {'sqlite_with_rowid': False}
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    metric = db.Column(db.String(32), primary_key=True)
+    ts = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value = db.Column(db.Float, nullable=False)
+    value2 = db.Column(db.Float)  # 血压的舒张压等第二个读数
+
+
+class HealthDatapointRollup(db.Model):
+    """
+    健康数据点的预聚合（按小时、按天），图表按区间查询时读取，不扫描原始数据点
+
+    resolution为聚合粒度（秒），bucket_start为分桶起点，与HealthDatapoint.ts同一时间基准。
+    """
+    __tablename__ = 'health_datapoint_rollups'
+    __table_args__ = ({'sqlite_with_rowid': False},)
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    metric = db.Column(db.String(32), primary_key=True)
+    resolution = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    bucket_start = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value_count = db.Column(db.Integer, nullable=False)
+    value_sum = db.Column(db.Float, nullable=False)
+    value_min = db.Column(db.Float, nullable=False)
+    value_max = db.Column(db.Float, nullable=False)
+    value2_sum = db.Column(db.Float)
+    value2_min = db.Column(db.Float)
+    value2_max = db.Column(db.Float)
+
+
+class HealthStats(db.Model):
+    """
+    健康数据统计结果缓存（趋势、滑动平均、异常提醒），每个用户一行
+
+    由夜间批处理预先计算，写入新数据点时删除，查询时缺失或不是当天计算的则重新计算。
+    """
+    __tablename__ = 'health_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    days = db.Column(db.Integer, nullable=False)  # 统计的天数
+    data = db.Column(db.JSON, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
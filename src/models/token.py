@@ -0,0 +1,15 @@
+from datetime import datetime
+from src.extensions.database import db
+
+class RevokedToken(db.Model):
+    """已撤销的JWT令牌模型"""
+    __tablename__ = 'revoked_tokens'
+    # 各worker按id增量同步撤销记录，清理过期记录后id不能被复用
+    __table_args__ = ({'sqlite_autoincrement': True},)
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)  # access, refresh
+    user_id = db.Column(db.Integer, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
@@ -0,0 +1,17 @@
+from datetime import datetime
+from src.extensions.database import db
+
+class TranscriptCache(db.Model):
+    """语音识别结果缓存模型，按音频内容哈希、格式和语言查找"""
+    __tablename__ = 'transcript_cache'
+    __table_args__ = (
+        db.UniqueConstraint('audio_hash', 'audio_format', 'language', name='uq_transcript_cache_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    audio_hash = db.Column(db.String(64), nullable=False)  # 音频内容的SHA-256
+    audio_format = db.Column(db.String(10), nullable=False)
+    language = db.Column(db.String(10), nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
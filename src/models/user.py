@@ -16,6 +16,8 @@ class User(db.Model):
     height = db.Column(db.Float, default=0)
     weight = db.Column(db.Float, default=0)
     avatar = db.Column(db.String(200), nullable=True)
+    # 头像原图的SHA-256，用于定位各尺寸的缩略图
+    avatar_hash = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
@@ -1,21 +1,32 @@
-from src.routes.auth import auth_bp
-from src.routes.user import user_bp
-from src.routes.health import health_bp
-from src.routes.consult import consult_bp
-from src.routes.article import article_bp
-from src.routes.setting import setting_bp
+import importlib
+
+# 蓝图所在模块、蓝图变量名及URL前缀，模块在get_blueprints被调用时才导入
+BLUEPRINTS = [
+    ('src.routes.auth', 'auth_bp', '/api/auth'),
+    ('src.routes.user', 'user_bp', '/api/user'),
+    ('src.routes.health', 'health_bp', '/api/health'),
+    ('src.routes.consult', 'consult_bp', '/api/consult'),
+    ('src.routes.article', 'article_bp', '/api/articles'),
+    ('src.routes.setting', 'setting_bp', '/api/settings'),
+    ('src.routes.admin', 'admin_bp', '/api/admin'),
+    # get_file_url生成的上传文件URL为 BASE_URL + /static/<上传目录>/<相对路径>
+    ('src.routes.media', 'media_bp', '/api/static')
+]
 
 def get_blueprints():
     """获取所有蓝图及其URL前缀"""
     return [
-        (auth_bp, '/api/auth'),
-        (user_bp, '/api/user'),
-        (health_bp, '/api/health'),
-        (consult_bp, '/api/consult'),
-        (article_bp, '/api/articles'),
-        (setting_bp, '/api/settings')
+        (getattr(importlib.import_module(module_name), name), url_prefix)
+        for module_name, name, url_prefix in BLUEPRINTS
     ]
 
+def __getattr__(name):
+    """按需导入蓝图，兼容 from src.routes import auth_bp 的写法"""
+    for module_name, blueprint_name, _ in BLUEPRINTS:
+        if blueprint_name == name:
+            return getattr(importlib.import_module(module_name), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     'auth_bp',
     'user_bp',
@@ -23,5 +34,7 @@ __all__ = [
     'consult_bp',
     'article_bp',
     'setting_bp',
+    'admin_bp',
+    'media_bp',
     'get_blueprints'
-] 
\ No newline at end of file
+]
@@ -0,0 +1,88 @@
+from flask import Blueprint, Response, request
+import logging
+import os
+
+from src.utils.profiler import get_output_dir, format_stats, is_admin_request, start_sampling
+from src.utils.response import api_response
+from werkzeug.utils import secure_filename
+
+# 创建蓝图
+admin_bp = Blueprint('admin', __name__)
+logger = logging.getLogger(__name__)
+
+@admin_bp.before_request
+def require_admin_token():
+    """管理接口需要开启PROFILER_ENABLED并携带正确的X-Admin-Token"""
+    if not is_admin_request():
+        return api_response(403, 'forbidden'), 403
+
+@admin_bp.route('/profile', methods=['POST'])
+def start_profile():
+    """
+    对处理本请求的worker进行采样分析
+
+    请求体:
+    - seconds: 采样时长（秒），可选
+    - interval: 采样间隔（秒），可选
+
+    返回:
+    - 成功: 进程号和结果文件名，采样在后台进行，结束后可通过 /profiles/<文件名> 获取
+    - 失败: 错误信息
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = start_sampling(data.get('seconds'), data.get('interval'))
+        if filename is None:
+            return api_response(409, 'profile_in_progress')
+
+        return api_response(200, 'success', {
+            'pid': os.getpid(),
+            'file': filename
+        })
+    except (TypeError, ValueError):
+        return api_response(400, 'param_error')
+    except Exception as e:
+        logger.error("启动采样分析失败: %s", e)
+        return api_response(500, 'server_error')
+
+@admin_bp.route('/profiles', methods=['GET'])
+def list_profiles():
+    """
+    列出已生成的分析结果文件
+
+    返回:
+    - 成功: 文件名列表，按生成时间倒序
+    """
+    try:
+        output_dir = get_output_dir()
+        files = sorted(os.listdir(output_dir),
+                       key=lambda name: os.path.getmtime(os.path.join(output_dir, name)),
+                       reverse=True)
+        return api_response(200, 'success', files)
+    except Exception as e:
+        logger.error("获取分析结果列表失败: %s", e)
+        return api_response(500, 'server_error')
+
+@admin_bp.route('/profiles/<filename>', methods=['GET'])
+def get_profile(filename):
+    """
+    获取分析结果
+
+    返回:
+    - .folded: 折叠栈文本，可直接生成火焰图
+    - .prof: 按累计耗时排序的cProfile统计
+    """
+    path = os.path.join(get_output_dir(), secure_filename(filename))
+    if not os.path.isfile(path):
+        return api_response(404, 'not_found')
+
+    try:
+        if path.endswith('.prof'):
+            content = format_stats(path)
+        else:
+            with open(path, encoding='utf-8') as f:
+                content = f.read()
+        return Response(content, mimetype='text/plain')
+    except Exception as e:
+        logger.error("读取分析结果失败: %s", e)
+        return api_response(500, 'server_error')
@@ -64,7 +64,7 @@ def get_articles():
         })
         
     except Exception as e:
-        logger.error(f"获取文章列表异常: {str(e)}")
+        logger.error("获取文章列表异常: %s", e)
         return api_response(500, 'server_error')
 
 @article_bp.route('/<int:article_id>', methods=['GET', 'OPTIONS'])
@@ -98,7 +98,7 @@ def get_article_detail(article_id):
         return api_response(200, 'success', article_dict)
         
     except Exception as e:
-        logger.error(f"获取文章详情异常: {str(e)}")
+        logger.error("获取文章详情异常: %s", e)
         return api_response(500, 'server_error')
 
 @article_bp.route('/categories', methods=['GET', 'OPTIONS'])
@@ -123,7 +123,7 @@ def get_article_categories():
         return api_response(200, 'success', category_list)
         
     except Exception as e:
-        logger.error(f"获取文章分类列表异常: {str(e)}")
+        logger.error("获取文章分类列表异常: %s", e)
         return api_response(500, 'server_error')
 
 @article_bp.route('/tags', methods=['GET', 'OPTIONS'])
@@ -148,7 +148,7 @@ def get_tags():
         return api_response(200, 'success', tag_list)
         
     except Exception as e:
-        logger.error(f"获取标签列表异常: {str(e)}")
+        logger.error("获取标签列表异常: %s", e)
         return api_response(500, 'server_error')
 
 @article_bp.route('/hot', methods=['GET', 'OPTIONS'])
@@ -179,5 +179,5 @@ def get_hot_articles():
         return api_response(200, 'success', article_list)
         
     except Exception as e:
-        logger.error(f"获取热门文章列表异常: {str(e)}")
+        logger.error("获取热门文章列表异常: %s", e)
         return api_response(500, 'server_error') 
\ No newline at end of file
@@ -1,17 +1,76 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token, jwt_required, get_jwt, get_jwt_identity
+)
 from datetime import datetime
 import logging
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
 
 from src.models.user import User
 from src.models.setting import UserSetting
 from src.extensions.database import db
+from src.extensions.limiter import limiter
+from src.extensions.revocation import revocation_store
 from src.utils.response import api_response
 
 # 创建蓝图
 auth_bp = Blueprint('auth', __name__)
 logger = logging.getLogger(__name__)
 
+def _client_ip():
+    """获取客户端IP，用于按IP限流"""
+    return request.remote_addr or 'unknown'
+
+def _rate_limited_response(retry_after):
+    """
+    生成限流拒绝响应
+    
+    Args:
+        retry_after (int): 建议客户端等待的秒数
+    
+    Returns:
+        Response: 带Retry-After头的429响应
+    """
+    response = api_response(429, 'too_many_requests')
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def _create_user(account, password, nickname, phone):
+    """
+    在一个事务中创建用户及其默认设置
+    
+    Args:
+        account (str): 账号
+        password (str): 明文密码
+        nickname (str): 昵称
+        phone (str): 手机号，空字符串按未填写处理
+    
+    Returns:
+        int: 新用户ID
+    
+    Raises:
+        IntegrityError: 账号或手机号已存在
+    """
+    user_id = db.session.execute(
+        insert(User).values(
+            account=account,
+            password_hash=generate_password_hash(password),
+            nickname=nickname,
+            phone=phone or None
+        ).returning(User.id)
+    ).scalar_one()
+    
+    db.session.execute(insert(UserSetting).values(user_id=user_id))
+    db.session.commit()
+    return user_id
+
+def _duplicate_field_message(error):
+    """根据唯一约束冲突信息判断重复的是账号还是手机号"""
+    return 'phone_exists' if 'phone' in str(error.orig) else 'account_exists'
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """
@@ -34,6 +93,11 @@ def login():
         account = data.get('account')
         password = data.get('password')
         
+        # 限流检查，必须在查询用户和哈希密码之前进行
+        retry_after = limiter.check(account, _client_ip())
+        if retry_after:
+            return _rate_limited_response(retry_after)
+        
         # 使用SQL查询用户
         from sqlalchemy import text
         from werkzeug.security import check_password_hash
@@ -48,16 +112,21 @@ def login():
         user_result = db.session.execute(query_sql, {"account": account}).fetchone()
         
         if not user_result:
+            limiter.record_failure(account)
             return api_response(401, 'account_password_error')
         
         # 验证密码
         user_id, user_account, password_hash, nickname, phone = user_result
         
         if not check_password_hash(password_hash, password):
+            limiter.record_failure(account)
             return api_response(401, 'account_password_error')
         
+        limiter.reset(account)
+        
         # 创建JWT令牌
         access_token = create_access_token(identity=str(user_id))
+        refresh_token = create_refresh_token(identity=str(user_id))
         
         # 返回用户信息和令牌
         return api_response(200, 'login_success', {
@@ -65,11 +134,12 @@ def login():
             'account': user_account,
             'nickname': nickname or "",
             'avatar': "",
-            'token': access_token
+            'token': access_token,
+            'refreshToken': refresh_token
         })
         
     except Exception as e:
-        logger.error(f"登录异常: {str(e)}")
+        logger.error("登录异常: %s", e)
         return api_response(500, 'server_error')
 
 @auth_bp.route('/register', methods=['POST'])
@@ -89,14 +159,14 @@ def register():
     - 失败: 错误信息
     """
     try:
-        logger.info("开始处理注册请求")
+        logger.debug("开始处理注册请求")
         data = request.get_json()
-        logger.info(f"请求数据: {data}")
+        logger.debug("请求数据: %s", data)
         
         # 验证必填参数
         required_fields = ['account', 'password', 'confirmPassword', 'nickname', 'phone']
         if not data or not all(field in data for field in required_fields):
-            logger.error(f"缺少必填参数，当前数据: {data}")
+            logger.error("缺少必填参数，当前数据: %s", data)
             return api_response(400, 'param_error')
         
         # 验证密码
@@ -104,111 +174,36 @@ def register():
             logger.error("密码不匹配")
             return api_response(400, 'password_mismatch')
         
-        # 使用直接SQL查询检查账号是否已存在
-        from sqlalchemy import text
-        
+        # 创建用户，账号和手机号的唯一性由数据库约束保证
         try:
-            # 查询用户是否存在
-            check_sql = text("SELECT id FROM users WHERE account = :account")
-            result = db.session.execute(check_sql, {"account": data['account']}).fetchone()
-            
-            if result:
-                logger.error(f"账号 {data['account']} 已存在")
-                return api_response(409, 'account_exists')
-                
-            # 检查手机号是否已存在
-            check_phone_sql = text("SELECT id FROM users WHERE phone = :phone")
-            phone_result = db.session.execute(check_phone_sql, {"phone": data['phone']}).fetchone()
-            
-            if phone_result:
-                logger.error(f"手机号 {data['phone']} 已存在")
-                return api_response(409, 'phone_exists')
-        except Exception as e:
-            logger.error(f"检查用户是否存在时出错: {str(e)}")
-            return api_response(500, 'server_error')
-        
-        # 创建用户
-        try:
-            # 执行SQL插入
-            insert_sql = text("""
-                INSERT INTO users (account, password_hash, nickname, phone)
-                VALUES (:account, :password_hash, :nickname, :phone)
-            """)
-            
-            from werkzeug.security import generate_password_hash
-            password_hash = generate_password_hash(data['password'])
-            
-            db.session.execute(
-                insert_sql, 
-                {
-                    "account": data['account'],
-                    "password_hash": password_hash,
-                    "nickname": data['nickname'],
-                    "phone": data['phone']
-                }
-            )
-            
-            db.session.commit()
-            logger.info(f"用户保存成功")
-            
-            # 获取插入的用户ID
-            get_id_sql = text("SELECT id FROM users WHERE account = :account")
-            user_id_result = db.session.execute(get_id_sql, {"account": data['account']}).fetchone()
-            user_id = user_id_result[0] if user_id_result else None
-            
-            if not user_id:
-                logger.error("创建用户成功但无法获取ID")
-                return api_response(500, 'server_error')
-            
-            # 创建用户设置
-            try:
-                # 确保设置表存在
-                create_settings_table_sql = text("""
-                    CREATE TABLE IF NOT EXISTS user_settings (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        language TEXT DEFAULT 'zh-CN',
-                        push_notification BOOLEAN DEFAULT 1,
-                        FOREIGN KEY (user_id) REFERENCES users (id)
-                    )
-                """)
-                db.session.execute(create_settings_table_sql)
-                
-                # 创建用户设置
-                insert_settings_sql = text("""
-                    INSERT INTO user_settings (user_id, language, push_notification)
-                    VALUES (:user_id, 'zh-CN', 1)
-                """)
-                db.session.execute(insert_settings_sql, {"user_id": user_id})
-                db.session.commit()
-                logger.info(f"用户设置创建成功")
-            except Exception as e:
-                logger.warning(f"创建用户设置失败: {str(e)}")
-                # 继续执行，不因设置创建失败而影响注册流程
-            
-            # 创建JWT令牌
-            access_token = create_access_token(identity=str(user_id))
-            logger.info("JWT令牌创建成功")
-            
-            # 返回用户信息和令牌
-            return api_response(200, 'register_success', {
-                'userId': user_id,
-                'account': data['account'],
-                'nickname': data['nickname'],
-                'token': access_token
-            })
-        except Exception as e:
+            user_id = _create_user(data['account'], data['password'], data['nickname'], data['phone'])
+        except IntegrityError as e:
             db.session.rollback()
-            logger.error(f"创建用户过程中发生错误: {str(e)}")
-            import traceback
-            logger.error(f"详细异常堆栈: {traceback.format_exc()}")
-            return api_response(500, 'server_error')
+            message_key = _duplicate_field_message(e)
+            logger.error("注册信息已存在: %s", message_key)
+            return api_response(409, message_key)
+        
+        logger.debug("用户保存成功")
+        
+        # 创建JWT令牌
+        access_token = create_access_token(identity=str(user_id))
+        refresh_token = create_refresh_token(identity=str(user_id))
+        logger.debug("JWT令牌创建成功")
+        
+        # 返回用户信息和令牌
+        return api_response(200, 'register_success', {
+            'userId': user_id,
+            'account': data['account'],
+            'nickname': data['nickname'],
+            'token': access_token,
+            'refreshToken': refresh_token
+        })
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"注册异常: {str(e)}")
+        logger.error("注册异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return api_response(500, 'server_error')
 
 @auth_bp.route('/reset-password', methods=['POST'])
@@ -232,17 +227,27 @@ def reset_password():
         if not data or not data.get('phone') or not data.get('verifyCode') or not data.get('newPassword'):
             return api_response(400, 'param_error')
         
+        # 限流检查，防止暴力尝试验证码
+        limit_key = f"reset:{data['phone']}"
+        retry_after = limiter.check(limit_key, _client_ip())
+        if retry_after:
+            return _rate_limited_response(retry_after)
+        
         # 查询用户
         user = User.query.filter_by(phone=data['phone']).first()
         if not user:
+            limiter.record_failure(limit_key)
             return api_response(404, 'phone_not_registered')
         
         # 验证码验证（实际项目中需实现）
         # 这里简化处理，假设验证码总是正确的
         verify_code = data.get('verifyCode')
         if not verify_code or verify_code != '1234':  # 测试验证码
+            limiter.record_failure(limit_key)
             return api_response(400, 'param_error')
         
+        limiter.reset(limit_key)
+        
         # 更新密码
         user.password = data['newPassword']
         db.session.commit()
@@ -251,7 +256,36 @@ def reset_password():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"重置密码异常: {str(e)}")
+        logger.error("重置密码异常: %s", e)
+        return api_response(500, 'server_error')
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    刷新令牌接口，每次刷新都会轮换刷新令牌
+    
+    请求头:
+    - Authorization: 刷新令牌
+    
+    返回:
+    - 成功: 新的访问令牌和刷新令牌
+    - 失败: 错误信息
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        # 旧的刷新令牌立即撤销，被盗用的刷新令牌只能使用一次
+        revocation_store.revoke(get_jwt())
+        
+        return api_response(200, 'success', {
+            'token': create_access_token(identity=user_id),
+            'refreshToken': create_refresh_token(identity=user_id)
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error("刷新令牌异常: %s", e)
         return api_response(500, 'server_error')
 
 @auth_bp.route('/logout', methods=['POST'])
@@ -263,12 +297,35 @@ def logout():
     请求头:
     - Authorization: JWT令牌
     
+    请求JSON参数:
+    - refreshToken: 刷新令牌（可选，提供时一并撤销）
+    
     返回:
     - 成功: 成功信息
     """
-    # JWT无状态，服务端不需要实际"退出"操作
-    # 客户端需要自行删除令牌
-    return api_response(200, 'logout_success')
+    try:
+        # 撤销当前访问令牌
+        revocation_store.revoke(get_jwt())
+        
+        data = request.get_json(silent=True) or {}
+        if data.get('refreshToken'):
+            try:
+                refresh_payload = decode_token(data['refreshToken'])
+            except Exception as e:
+                logger.warning("退出时刷新令牌无效: %s", e)
+                refresh_payload = None
+            
+            # 只撤销属于当前用户的刷新令牌
+            if refresh_payload and refresh_payload.get('type') == 'refresh' \
+                    and refresh_payload.get('sub') == get_jwt_identity():
+                revocation_store.revoke(refresh_payload)
+        
+        return api_response(200, 'logout_success')
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error("退出登录异常: %s", e)
+        return api_response(500, 'server_error')
 
 @auth_bp.route('/register-test', methods=['POST'])
 def register_test():
@@ -277,7 +334,7 @@ def register_test():
     """
     try:
         data = request.get_json()
-        logger.info(f"测试注册请求数据: {data}")
+        logger.debug("测试注册请求数据: %s", data)
         
         # 验证必填参数
         if not data or not data.get('account') or not data.get('password'):
@@ -289,116 +346,40 @@ def register_test():
         nickname = data.get('nickname', '')
         phone = data.get('phone', '')
         
-        # 直接使用SQL
-        from sqlalchemy import text
-        
-        # 检查账号是否已存在
-        try:
-            # 尝试创建用户表（如果不存在）
-            create_table_sql = text("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    account TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    nickname TEXT,
-                    phone TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            db.session.execute(create_table_sql)
-            db.session.commit()
-            
-            # 查询用户是否存在
-            check_sql = text("SELECT id FROM users WHERE account = :account")
-            result = db.session.execute(check_sql, {"account": account}).fetchone()
-            
-            if result:
-                return jsonify({"code": 409, "message": "账号已存在", "data": None})
-                
-        except Exception as e:
-            logger.error(f"检查用户出错: {str(e)}")
-            return jsonify({"code": 500, "message": f"检查用户出错: {str(e)}", "data": None})
-        
         # 创建用户
         try:
-            # 执行SQL插入
-            insert_sql = text("""
-                INSERT INTO users (account, password_hash, nickname, phone)
-                VALUES (:account, :password_hash, :nickname, :phone)
-            """)
-            
-            from werkzeug.security import generate_password_hash
-            password_hash = generate_password_hash(password)
-            
-            db.session.execute(
-                insert_sql, 
-                {
-                    "account": account,
-                    "password_hash": password_hash,
-                    "nickname": nickname,
-                    "phone": phone
-                }
-            )
-            
-            db.session.commit()
-            
-            # 获取插入的用户ID
-            get_id_sql = text("SELECT id FROM users WHERE account = :account")
-            user_id_result = db.session.execute(get_id_sql, {"account": account}).fetchone()
-            user_id = user_id_result[0] if user_id_result else None
-            
-            if not user_id:
-                return jsonify({"code": 500, "message": "创建用户失败，无法获取用户ID", "data": None})
-            
-            # 创建用户设置
-            try:
-                # 确保设置表存在
-                create_settings_table_sql = text("""
-                    CREATE TABLE IF NOT EXISTS user_settings (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        language TEXT DEFAULT 'zh-CN',
-                        push_notification BOOLEAN DEFAULT 1,
-                        FOREIGN KEY (user_id) REFERENCES users (id)
-                    )
-                """)
-                db.session.execute(create_settings_table_sql)
-                
-                # 创建用户设置
-                insert_settings_sql = text("""
-                    INSERT INTO user_settings (user_id, language, push_notification)
-                    VALUES (:user_id, 'zh-CN', 1)
-                """)
-                db.session.execute(insert_settings_sql, {"user_id": user_id})
-                db.session.commit()
-                logger.info(f"测试用户设置创建成功")
-            except Exception as e:
-                logger.warning(f"创建测试用户设置失败: {str(e)}")
-                # 继续执行，不因设置创建失败而影响注册流程
-            
-            # 创建JWT令牌
-            access_token = create_access_token(identity=str(user_id))
-            
-            # 返回简化信息
-            return jsonify({
-                "code": 200,
-                "message": "注册成功",
-                "data": {
-                    "userId": user_id,
-                    "account": account,
-                    "token": access_token
-                }
-            })
+            user_id = _create_user(account, password, nickname, phone)
+        except IntegrityError as e:
+            db.session.rollback()
+            if _duplicate_field_message(e) == 'phone_exists':
+                return jsonify({"code": 409, "message": "手机号已存在", "data": None})
+            return jsonify({"code": 409, "message": "账号已存在", "data": None})
         except Exception as e:
             db.session.rollback()
-            logger.error(f"创建用户出错: {str(e)}")
+            logger.error("创建用户出错: %s", e)
             return jsonify({"code": 500, "message": f"创建用户出错: {str(e)}", "data": None})
         
+        # 创建JWT令牌
+        access_token = create_access_token(identity=str(user_id))
+        refresh_token = create_refresh_token(identity=str(user_id))
+        
+        # 返回简化信息
+        return jsonify({
+            "code": 200,
+            "message": "注册成功",
+            "data": {
+                "userId": user_id,
+                "account": account,
+                "token": access_token,
+                "refreshToken": refresh_token
+            }
+        })
+        
     except Exception as e:
         db.session.rollback()
-        logger.error(f"测试注册异常: {str(e)}")
+        logger.error("测试注册异常: %s", e)
         import traceback
-        logger.error(f"测试注册异常堆栈: {traceback.format_exc()}")
+        logger.error("测试注册异常堆栈: %s", traceback.format_exc())
         return jsonify({"code": 500, "message": f"服务器错误: {str(e)}", "data": None})
 
 @auth_bp.route('/login-test', methods=['POST'])
@@ -408,7 +389,7 @@ def login_test():
     """
     try:
         data = request.get_json()
-        logger.info(f"测试登录请求数据: {data}")
+        logger.debug("测试登录请求数据: %s", data)
         
         # 验证必填参数
         if not data or not data.get('account') or not data.get('password'):
@@ -417,6 +398,12 @@ def login_test():
         account = data.get('account')
         password = data.get('password')
         
+        # 限流检查，必须在查询用户和哈希密码之前进行
+        retry_after = limiter.check(account, _client_ip())
+        if retry_after:
+            return jsonify({"code": 429, "message": "请求过于频繁，请稍后再试", "data": None}), 429, \
+                {'Retry-After': str(retry_after)}
+        
         # 直接使用SQL查询用户
         from sqlalchemy import text
         from werkzeug.security import check_password_hash
@@ -431,16 +418,21 @@ def login_test():
         user_result = db.session.execute(query_sql, {"account": account}).fetchone()
         
         if not user_result:
+            limiter.record_failure(account)
             return jsonify({"code": 401, "message": "账号或密码错误", "data": None})
         
         # 验证密码
         user_id, user_account, password_hash, nickname, phone = user_result
         
         if not check_password_hash(password_hash, password):
+            limiter.record_failure(account)
             return jsonify({"code": 401, "message": "账号或密码错误", "data": None})
         
+        limiter.reset(account)
+        
         # 创建JWT令牌
         access_token = create_access_token(identity=str(user_id))
+        refresh_token = create_refresh_token(identity=str(user_id))
         
         # 返回简化信息
         return jsonify({
@@ -450,12 +442,13 @@ def login_test():
                 "userId": user_id,
                 "account": user_account,
                 "nickname": nickname or "",
-                "token": access_token
+                "token": access_token,
+                "refreshToken": refresh_token
             }
         })
         
     except Exception as e:
-        logger.error(f"测试登录异常: {str(e)}")
+        logger.error("测试登录异常: %s", e)
         import traceback
-        logger.error(f"测试登录异常堆栈: {traceback.format_exc()}")
+        logger.error("测试登录异常堆栈: %s", traceback.format_exc())
         return jsonify({"code": 500, "message": f"服务器错误: {str(e)}", "data": None}) 
\ No newline at end of file
@@ -1,19 +1,48 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import time
 
 from src.models.consult import ConsultSession, ConsultMessage
 from src.extensions.database import db
+from src.extensions.summarizer import summarizer
 from src.utils.response import api_response
-from src.utils.ai_service import xunfei_speech_to_text, query_qwen_medical_api
-from src.utils.file_util import allowed_file, save_file, get_file_url
+from src.utils.ai_service import transcribe_audio, query_qwen_medical_api, answer_medical_question
+from src.utils.context_builder import build_context
+from src.utils.file_util import allowed_file, get_file_url, store_upload
+from src.utils.tracing import bind_trace
 
 # 创建蓝图
 consult_bp = Blueprint('consult', __name__)
 logger = logging.getLogger(__name__)
 
+# 生成参数的取值范围（含两端）
+MAX_TOKENS_RANGE = (1, 4096)
+TEMPERATURE_RANGE = (0, 2)
+
+def generation_params(data):
+    """
+    读取并校验请求中的max_tokens和temperature
+    
+    Args:
+        data (dict): 请求JSON
+        
+    Returns:
+        tuple: (max_tokens, temperature, 错误信息)，参数有效时错误信息为None
+    """
+    max_tokens = data.get('max_tokens', 1024)
+    temperature = data.get('temperature', 0.7)
+    low, high = MAX_TOKENS_RANGE
+    if isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or not low <= max_tokens <= high:
+        return None, None, f"max_tokens必须为{low}到{high}之间的整数"
+    low, high = TEMPERATURE_RANGE
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not low <= temperature <= high:
+        return None, None, f"temperature必须为{low}到{high}之间的数字"
+    return max_tokens, float(temperature), None
+
 @consult_bp.route('/sessions', methods=['GET'])
 @jwt_required()
 def get_consult_sessions():
@@ -52,7 +81,7 @@ def get_consult_sessions():
         return api_response(200, 'success', session_list)
         
     except Exception as e:
-        logger.error(f"获取问诊会话列表异常: {str(e)}")
+        logger.error("获取问诊会话列表异常: %s", e)
         return api_response(500, 'server_error')
 
 @consult_bp.route('/sessions/<int:session_id>', methods=['GET'])
@@ -87,7 +116,7 @@ def get_consult_session_detail(session_id):
         return api_response(200, 'success', session_dict)
         
     except Exception as e:
-        logger.error(f"获取问诊会话详情异常: {str(e)}")
+        logger.error("获取问诊会话详情异常: %s", e)
         return api_response(500, 'server_error')
 
 @consult_bp.route('/sessions', methods=['POST'])
@@ -142,7 +171,7 @@ def create_consult_session():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"创建问诊会话异常: {str(e)}")
+        logger.error("创建问诊会话异常: %s", e)
         return api_response(500, 'server_error')
 
 @consult_bp.route('/sessions/<int:session_id>', methods=['PUT'])
@@ -199,7 +228,7 @@ def update_consult_session(session_id):
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"更新问诊会话异常: {str(e)}")
+        logger.error("更新问诊会话异常: %s", e)
         return api_response(500, 'server_error')
 
 @consult_bp.route('/sessions/<int:session_id>/messages', methods=['POST'])
@@ -218,8 +247,8 @@ def send_message(session_id):
     - content: 消息内容
     - content_type: 消息类型（text/audio），默认为text
     - language: 语言（chinese/mongolian），默认为chinese
-    - max_tokens: 回答的最大长度（可选，默认1024）
-    - temperature: 控制回答的随机性（可选，默认0.7）
+    - max_tokens: 回答的最大长度（可选，默认1024，1到4096）
+    - temperature: 控制回答的随机性（可选，默认0.7，0到2）
     
     返回:
     - 成功: 用户消息和AI回复消息
@@ -243,6 +272,12 @@ def send_message(session_id):
         data = request.get_json()
         if not data or not data.get('content'):
             return api_response(400, 'param_error')
+        max_tokens, temperature, error = generation_params(data)
+        if error:
+            return api_response(400, 'param_error', error)
+        
+        # 在保存本条消息前组装历史上下文，本条消息作为当前问题
+        model_query = build_context(session_id, data['content'])
         
         # 创建用户消息
         user_message = ConsultMessage(
@@ -261,12 +296,10 @@ def send_message(session_id):
         
         # 查询医疗大模型
         language = data.get('language', 'chinese')
-        max_tokens = data.get('max_tokens', 1024)
-        temperature = data.get('temperature', 0.7)
         
         # 调用AI服务获取回复
         ai_response = query_qwen_medical_api(
-            data['content'], 
+            model_query, 
             language=language,
             max_tokens=max_tokens,
             temperature=temperature
@@ -287,6 +320,9 @@ def send_message(session_id):
         session.updated_at = datetime.now()
         db.session.commit()
         
+        # 在后台更新会话摘要
+        summarizer.notify(session_id)
+        
         # 返回对话结果
         return api_response(200, 'success', {
             'user_message': user_message.to_dict(),
@@ -296,7 +332,7 @@ def send_message(session_id):
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"发送问诊消息异常: {str(e)}")
+        logger.error("发送问诊消息异常: %s", e)
         return api_response(500, 'server_error')
 
 @consult_bp.route('/sessions/<int:session_id>/audio', methods=['POST'])
@@ -341,16 +377,15 @@ def upload_audio(session_id):
             return api_response(400, 'no_file_selected')
         
         if file and allowed_file(file.filename, {'mp3', 'wav'}):
-            # 保存文件
-            file_path = save_file(file, 'audio')
-            file_url = get_file_url(file_path)
+            # 流式保存文件，相同内容的音频只保存一份
+            stored = store_upload(file, 'audio')
+            file_url = get_file_url(stored.path)
             
-            # 读取文件内容用于语音识别
-            file.seek(0)
-            audio_data = file.read()
-            
-            # 调用语音识别服务
-            recognition_result = xunfei_speech_to_text(audio_data, audio_format=file.filename.split('.')[-1].lower())
+            # 直接把已保存文件的mmap交给语音识别，不再重新读入内存；WAV先转为16kHz单声道PCM，
+            # 同一音频的识别结果按内容哈希缓存
+            with stored.open_buffer() as audio_data:
+                recognition_result = transcribe_audio(audio_data, file.filename.split('.')[-1].lower(),
+                                                      audio_hash=stored.sha256)
             
             if recognition_result['code'] == 0:
                 recognized_text = recognition_result['text']
@@ -371,6 +406,8 @@ def upload_audio(session_id):
                 session.updated_at = datetime.now()
                 db.session.commit()
                 
+                summarizer.notify(session_id)
+                
                 return api_response(200, 'success', {
                     'text': recognized_text,
                     'audio_url': file_url,
@@ -383,7 +420,7 @@ def upload_audio(session_id):
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"语音识别异常: {str(e)}")
+        logger.error("语音识别异常: %s", e)
         return api_response(500, 'server_error')
 
 @consult_bp.route('/test/sessions', methods=['POST'])
@@ -395,7 +432,7 @@ def create_test_session():
     try:
         # 获取当前用户ID
         user_id = get_jwt_identity()
-        logger.info(f"测试创建问诊会话 - 用户ID: {user_id}")
+        logger.debug("测试创建问诊会话 - 用户ID: %s", user_id)
         
         # 获取请求数据
         data = request.get_json()
@@ -406,22 +443,6 @@ def create_test_session():
         from sqlalchemy import text
         
         try:
-            # 确保表存在
-            create_table_sql = text("""
-                CREATE TABLE IF NOT EXISTS consult_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    status TEXT DEFAULT 'active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            db.session.execute(create_table_sql)
-            db.session.commit()
-            logger.info("问诊会话表创建或确认成功")
-            
             # 插入会话数据
             insert_sql = text("""
                 INSERT INTO consult_sessions (user_id, title, description, status)
@@ -447,21 +468,6 @@ def create_test_session():
                 logger.error("创建会话成功但无法获取ID")
                 return jsonify({"code": 500, "message": "服务器错误", "data": None})
             
-            # 创建欢迎消息
-            create_message_table_sql = text("""
-                CREATE TABLE IF NOT EXISTS consult_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id INTEGER NOT NULL,
-                    sender_type TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    content_type TEXT DEFAULT 'text',
-                    media_url TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            db.session.execute(create_message_table_sql)
-            db.session.commit()
-            
             # 插入欢迎消息
             insert_message_sql = text("""
                 INSERT INTO consult_messages (session_id, sender_type, content, content_type)
@@ -488,15 +494,15 @@ def create_test_session():
             
         except Exception as e:
             db.session.rollback()
-            logger.error(f"创建测试会话出错: {str(e)}")
+            logger.error("创建测试会话出错: %s", e)
             import traceback
-            logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+            logger.error("详细异常堆栈: %s", traceback.format_exc())
             return jsonify({"code": 500, "message": f"服务器错误: {str(e)}", "data": None})
             
     except Exception as e:
-        logger.error(f"测试创建会话异常: {str(e)}")
+        logger.error("测试创建会话异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return jsonify({"code": 500, "message": f"服务器错误: {str(e)}", "data": None})
 
 @consult_bp.route('/test/sessions/<int:session_id>/messages', methods=['POST'])
@@ -508,7 +514,7 @@ def send_test_message(session_id):
     try:
         # 获取当前用户ID
         user_id = get_jwt_identity()
-        logger.info(f"测试发送问诊消息 - 用户ID: {user_id}, 会话ID: {session_id}")
+        logger.debug("测试发送问诊消息 - 用户ID: %s, 会话ID: %s", user_id, session_id)
         
         # 获取请求数据
         data = request.get_json()
@@ -531,7 +537,7 @@ def send_test_message(session_id):
             }).fetchone()
             
             if not session_result:
-                logger.error(f"会话不存在或不属于当前用户 - 会话ID: {session_id}, 用户ID: {user_id}")
+                logger.error("会话不存在或不属于当前用户 - 会话ID: %s, 用户ID: %s", session_id, user_id)
                 return jsonify({"code": 404, "message": "会话不存在", "data": None})
             
             # 插入用户消息
@@ -611,15 +617,15 @@ def send_test_message(session_id):
             
         except Exception as e:
             db.session.rollback()
-            logger.error(f"发送测试消息出错: {str(e)}")
+            logger.error("发送测试消息出错: %s", e)
             import traceback
-            logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+            logger.error("详细异常堆栈: %s", traceback.format_exc())
             return jsonify({"code": 500, "message": f"服务器错误: {str(e)}", "data": None})
             
     except Exception as e:
-        logger.error(f"测试发送消息异常: {str(e)}")
+        logger.error("测试发送消息异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return jsonify({"code": 500, "message": f"服务器错误: {str(e)}", "data": None})
 
 @consult_bp.route('/medical-qa', methods=['POST'])
@@ -634,8 +640,8 @@ def medical_qa():
     请求JSON参数:
     - query: 用户的医疗问题
     - language: 语言（chinese/mongolian），默认为chinese
-    - max_tokens: 回答的最大长度（可选，默认1024）
-    - temperature: 控制回答的随机性（可选，默认0.7）
+    - max_tokens: 回答的最大长度（可选，默认1024，1到4096）
+    - temperature: 控制回答的随机性（可选，默认0.7，0到2）
     
     返回:
     - 成功: AI的回复内容
@@ -650,10 +656,11 @@ def medical_qa():
         # 提取参数
         query = data['query']
         language = data.get('language', 'chinese')
-        max_tokens = data.get('max_tokens', 1024)
-        temperature = data.get('temperature', 0.7)
+        max_tokens, temperature, error = generation_params(data)
+        if error:
+            return api_response(400, 'param_error', error)
         
-        # 调用医疗大模型API
+        # 调用医疗大模型API，单个问题每次都实时查询，答案缓存只用于批量问答
         start_time = time.time()
         ai_response = query_qwen_medical_api(
             query, 
@@ -672,5 +679,104 @@ def medical_qa():
         })
         
     except Exception as e:
-        logger.error(f"医疗问答API异常: {str(e)}")
-        return api_response(500, 'server_error') 
\ No newline at end of file
+        logger.error("医疗问答API异常: %s", e)
+        return api_response(500, 'server_error')
+
+
+@consult_bp.route('/medical-qa/batch', methods=['POST'])
+@jwt_required()
+def medical_qa_batch():
+    """
+    批量医疗问答API，以NDJSON流式返回，每个问题完成后立即输出一行
+    
+    问题在QWEN_MAX_CONCURRENCY的并发限制内并行查询；同一批中重复的问题只查询一次，
+    之前回答过的问题直接使用答案缓存。
+    
+    请求头:
+    - Authorization: JWT令牌
+    
+    请求JSON参数:
+    - queries: 问题列表，元素为字符串或{"query": ..., "language": ...}
+    - language: 默认语言（chinese/mongolian），默认为chinese
+    - max_tokens: 回答的最大长度（可选，默认1024，1到4096）
+    - temperature: 控制回答的随机性（可选，默认0.7，0到2）
+    
+    返回:
+    - 成功: application/x-ndjson，每行为{"index", "query", "code", "response", "time_taken", "cached"}，
+      顺序为完成顺序，最后一行为{"done": true, "total", "failed", "time_taken"}
+    - 失败: 错误信息
+    """
+    try:
+        data = request.get_json(silent=True)
+        queries = data.get('queries') if isinstance(data, dict) else None
+        if not isinstance(queries, list) or not queries:
+            return api_response(400, 'param_error', '缺少问题列表')
+        
+        max_queries = current_app.config.get('QWEN_BATCH_MAX_QUERIES', 1000)
+        if len(queries) > max_queries:
+            return api_response(400, 'param_error', f"单次最多{max_queries}个问题")
+        
+        default_language = data.get('language', 'chinese')
+        max_tokens, temperature, error = generation_params(data)
+        if error:
+            return api_response(400, 'param_error', error)
+        
+        # 规范化问题并合并重复项：参数相同的问题只查询一次
+        groups = {}
+        for index, item in enumerate(queries):
+            if isinstance(item, str):
+                item = {'query': item}
+            if not isinstance(item, dict) or not isinstance(item.get('query'), str) or not item['query'].strip():
+                return api_response(400, 'param_error', f"第{index + 1}个问题无效")
+            key = (item['query'], item.get('language', default_language))
+            groups.setdefault(key, []).append(index)
+        
+        app = current_app._get_current_object()
+        workers = min(app.config.get('QWEN_MAX_CONCURRENCY', 10), len(groups))
+        
+        def answer(query, language):
+            with app.app_context():
+                return answer_medical_question(query, language=language, max_tokens=max_tokens, temperature=temperature)
+        
+        def generate():
+            start_time = time.time()
+            failed = 0
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='medical-qa-batch')
+            try:
+                # 在生成器中（仍处于请求上下文）绑定追踪，各问题的span记录到本次请求
+                traced_answer = bind_trace(answer)
+                futures = {executor.submit(traced_answer, query, language): (query, language)
+                           for query, language in groups}
+                for future in as_completed(futures):
+                    query, language = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error("批量医疗问答异常: %s", e)
+                        result = {'code': -1, 'response': '医疗咨询服务异常'}
+                    if result.get('code', -1) != 0:
+                        failed += len(groups[(query, language)])
+                    for index in groups[(query, language)]:
+                        yield json.dumps({
+                            'index': index,
+                            'query': query,
+                            'code': result.get('code', -1),
+                            'response': result.get('response', ''),
+                            'time_taken': result.get('time_taken', 0),
+                            'cached': result.get('cached', False)
+                        }, ensure_ascii=False) + '\n'
+                yield json.dumps({
+                    'done': True,
+                    'total': len(queries),
+                    'failed': failed,
+                    'time_taken': round(time.time() - start_time, 2)
+                }) + '\n'
+            finally:
+                # 客户端提前断开时取消尚未开始的查询
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        logger.error("批量医疗问答API异常: %s", e)
+        return api_response(500, 'server_error')
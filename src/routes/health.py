@@ -1,12 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import hmac
+import io
 import logging
 from datetime import datetime
 
 from src.models.health import HealthReport, HealthReportItem, HealthAdvice
 from src.extensions.database import db
+from src.utils.report_import import import_reports, read_csv, read_ndjson
+from src.utils.report_values import abnormal_condition, report_status
 from src.utils.response import api_response
 from src.utils.ai_service import query_qwen_medical_api
+from src.utils.health_analytics import get_user_stats
+from src.utils.health_data import (
+    METRICS, DatapointError, choose_interval, default_chart, format_ts, ingest_datapoints, parse_timestamp,
+    query_series, to_ts
+)
 
 # 创建蓝图
 health_bp = Blueprint('health', __name__)
@@ -48,7 +57,7 @@ def test_medical_qa():
         return api_response(200, 'success', result)
         
     except Exception as e:
-        logger.error(f"测试医疗问答异常: {str(e)}")
+        logger.error("测试医疗问答异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/reports', methods=['GET', 'OPTIONS'])
@@ -81,7 +90,7 @@ def get_health_reports():
         return api_response(200, 'success', report_list)
         
     except Exception as e:
-        logger.error(f"获取健康报告列表异常: {str(e)}")
+        logger.error("获取健康报告列表异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/reports/<int:report_id>', methods=['GET', 'OPTIONS'])
@@ -120,7 +129,7 @@ def get_health_report_detail(report_id):
         return api_response(200, 'success', report_dict)
         
     except Exception as e:
-        logger.error(f"获取健康报告详情异常: {str(e)}")
+        logger.error("获取健康报告详情异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/reports', methods=['POST', 'OPTIONS'])
@@ -138,11 +147,12 @@ def create_health_report():
     - doctor: 医生姓名
     - hospital: 医院名称
     - suggestion: 医生建议
+    - status: 状态，默认按项目判断
     - items: 报告项目列表
       - name: 项目名称
-      - value: 项目值
-      - reference: 参考范围
-      - status: 状态
+      - value: 项目值，如"5.6 mmol/L"
+      - reference: 参考范围，如"3.9-6.1"、"<5.2"
+      - status: 状态，默认按数值是否超出参考范围判断
     
     返回:
     - 成功: 创建的健康报告
@@ -168,21 +178,24 @@ def create_health_report():
             summary=data.get('summary', ''),
             doctor=data.get('doctor', ''),
             hospital=data.get('hospital', ''),
-            suggestion=data.get('suggestion', ''),
-            status=data.get('status', 'normal')
+            suggestion=data.get('suggestion', '')
         )
         
-        # 添加报告项目
+        # 添加报告项目，未指定状态时按数值和参考范围判断
         items = data.get('items', [])
         for item_data in items:
             item = HealthReportItem(
                 name=item_data.get('name', ''),
                 value=item_data.get('value', ''),
-                reference=item_data.get('reference', ''),
-                status=item_data.get('status', 'normal')
+                reference=item_data.get('reference', '')
             )
+            item.parse_values()
+            item.status = item_data.get('status') or item.derived_status() or 'normal'
             report.items.append(item)
         
+        # 未指定报告状态时，有异常项目的报告为warning
+        report.status = data.get('status') or report_status([item.status for item in report.items])
+        
         # 保存到数据库
         db.session.add(report)
         db.session.commit()
@@ -191,7 +204,116 @@ def create_health_report():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"创建健康报告异常: {str(e)}")
+        logger.error("创建健康报告异常: %s", e)
+        return api_response(500, 'server_error')
+
+IMPORT_TOKEN_HEADER = 'X-Import-Token'
+
+def is_import_partner():
+    """请求是否携带合作医院的导入令牌（REPORT_IMPORT_TOKEN）"""
+    expected = current_app.config.get('REPORT_IMPORT_TOKEN')
+    provided = request.headers.get(IMPORT_TOKEN_HEADER, '')
+    return bool(expected) and hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8'))
+
+@health_bp.route('/reports/import', methods=['POST'])
+@jwt_required(optional=True)
+def import_health_reports():
+    """
+    批量导入健康报告及其项目
+    
+    请求体以流的方式逐条读取和校验，每REPORT_IMPORT_CHUNK_SIZE份报告批量写入并提交一次；
+    无效的报告在errors中给出行号和原因，不影响其他报告。
+    
+    请求头:
+    - Authorization: JWT令牌，只能导入自己的报告
+    - X-Import-Token: 合作医院的导入令牌，携带时每份报告用user_id或account指定所属用户
+    
+    请求体（任选其一）:
+    - application/x-ndjson: 每行一份报告，字段同创建健康报告，另有user_id/account、created_at
+    - text/csv: 每行一个报告项目，report_key相同的相邻行属于同一份报告，项目列为item_name、item_value等
+    - multipart/form-data: file字段上传上述格式的文件，按扩展名（.csv）或format参数区分
+    
+    查询参数:
+    - format: ndjson或csv，默认按Content-Type判断
+    
+    返回:
+    - 成功: {"reports", "items", "failed", "errors": [{"line", "error"}], "errors_truncated", "time_taken"}
+    - 失败: 错误信息
+    """
+    try:
+        user_id = None
+        if not is_import_partner():
+            identity = get_jwt_identity()
+            if identity is None:
+                return api_response(401, 'auth_failed')
+            user_id = int(identity)
+
+        upload = request.files.get('file')
+        if upload is not None:
+            stream, fmt = upload.stream, 'csv' if upload.filename.lower().endswith('.csv') else 'ndjson'
+        else:
+            stream, fmt = request.stream, 'csv' if 'csv' in (request.content_type or '') else 'ndjson'
+        fmt = request.args.get('format', fmt)
+        if fmt not in ('ndjson', 'csv'):
+            return api_response(400, 'param_error', f"不支持的格式: {fmt}")
+
+        lines = io.TextIOWrapper(io.BufferedReader(stream) if upload is None else stream,
+                                 encoding='utf-8-sig', newline='')
+        records = read_csv(lines) if fmt == 'csv' else read_ndjson(lines)
+        return api_response(200, 'success', import_reports(records, user_id=user_id))
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error("导入健康报告异常: %s", e)
+        return api_response(500, 'server_error')
+
+@health_bp.route('/reports/items/abnormal', methods=['GET'])
+@jwt_required()
+def get_abnormal_report_items():
+    """
+    查询用户报告中的异常项目，按报告时间倒序
+    
+    请求头:
+    - Authorization: JWT令牌
+    
+    查询参数:
+    - name: 项目名称，可选
+    - direction: high（高于上限）或low（低于下限），默认包括两者及状态为abnormal的项目
+    - limit: 最多返回的项目数，默认50，最大ABNORMAL_ITEMS_MAX_LIMIT
+    
+    返回:
+    - 成功: 异常项目列表，每项附带report_title和report_created_at
+    - 失败: 错误信息
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        direction = request.args.get('direction')
+        if direction not in (None, 'high', 'low'):
+            return api_response(400, 'param_error', 'direction只能为high或low')
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            return api_response(400, 'param_error', 'limit必须为整数')
+        limit = max(1, min(limit, current_app.config.get('ABNORMAL_ITEMS_MAX_LIMIT', 500)))
+        
+        # 项目名称条件走(name, report_id)索引，报告按(user_id, created_at)索引过滤
+        query = db.session.query(HealthReportItem, HealthReport.title, HealthReport.created_at).join(
+            HealthReport, HealthReportItem.report_id == HealthReport.id
+        ).filter(HealthReport.user_id == user_id, abnormal_condition(direction))
+        name = request.args.get('name')
+        if name:
+            query = query.filter(HealthReportItem.name == name)
+        rows = query.order_by(HealthReport.created_at.desc(), HealthReportItem.id).limit(limit).all()
+        
+        items = [{
+            **item.to_dict(),
+            'report_title': title,
+            'report_created_at': created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else None
+        } for item, title, created_at in rows]
+        return api_response(200, 'success', items)
+        
+    except Exception as e:
+        logger.error("查询异常报告项目异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/reports/<int:report_id>', methods=['PUT', 'OPTIONS'])
@@ -263,7 +385,7 @@ def update_health_report(report_id):
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"更新健康报告异常: {str(e)}")
+        logger.error("更新健康报告异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/reports/<int:report_id>', methods=['DELETE', 'OPTIONS'])
@@ -304,7 +426,7 @@ def delete_health_report(report_id):
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"删除健康报告异常: {str(e)}")
+        logger.error("删除健康报告异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/advice', methods=['GET', 'OPTIONS'])
@@ -337,7 +459,7 @@ def get_health_advice():
         return api_response(200, 'success', result)
         
     except Exception as e:
-        logger.error(f"获取健康建议列表异常: {str(e)}")
+        logger.error("获取健康建议列表异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/advice', methods=['POST', 'OPTIONS'])
@@ -391,18 +513,29 @@ def create_health_advice():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"创建健康建议异常: {str(e)}")
+        logger.error("创建健康建议异常: %s", e)
         return api_response(500, 'server_error')
 
 @health_bp.route('/datapoints', methods=['GET', 'OPTIONS'])
-@jwt_required(optional=True)
+@jwt_required()
 def get_health_datapoints():
     """
     获取健康数据点（体重、血压等）
     
+    不带metric参数时返回最近DATAPOINT_DEFAULT_DAYS天体重、血压、血糖的日均值；
+    带metric参数时按区间降采样，返回每个分桶的最小值、最大值和平均值。
+    
     请求头:
     - Authorization: JWT令牌
     
+    查询参数:
+    - metric: 指标，如weight、blood_pressure、heart_rate
+    - start: 起始时间（ISO 8601或Unix时间戳），默认结束时间前DATAPOINT_DEFAULT_DAYS天
+    - end: 结束时间，默认当前时间
+    - interval: 分桶间隔（秒），默认按points自动选择
+    - points: 期望的最多分桶数，默认200，不超过DATAPOINT_MAX_BUCKETS
+    - days: 不带metric时的天数
+    
     返回:
     - 成功: 健康数据点
     - 失败: 错误信息
@@ -411,29 +544,122 @@ def get_health_datapoints():
         # 处理OPTIONS请求，返回CORS需要的头信息
         return '', 200
         
-    # 模拟数据
-    data = {
-        "weight": [
-            {"date": "2023-01-01", "value": 70.5},
-            {"date": "2023-01-08", "value": 70.2},
-            {"date": "2023-01-15", "value": 69.8},
-            {"date": "2023-01-22", "value": 69.5},
-            {"date": "2023-01-29", "value": 69.0}
-        ],
-        "blood_pressure": [
-            {"date": "2023-01-01", "systolic": 130, "diastolic": 85},
-            {"date": "2023-01-08", "systolic": 128, "diastolic": 83},
-            {"date": "2023-01-15", "systolic": 126, "diastolic": 82},
-            {"date": "2023-01-22", "systolic": 125, "diastolic": 80},
-            {"date": "2023-01-29", "systolic": 122, "diastolic": 78}
-        ],
-        "blood_sugar": [
-            {"date": "2023-01-01", "value": 5.6},
-            {"date": "2023-01-08", "value": 5.5},
-            {"date": "2023-01-15", "value": 5.4},
-            {"date": "2023-01-22", "value": 5.3},
-            {"date": "2023-01-29", "value": 5.2}
-        ]
-    }
-    
-    return api_response(200, 'success', data) 
\ No newline at end of file
+    try:
+        user_id = int(get_jwt_identity())
+        config = current_app.config
+        default_days = config.get('DATAPOINT_DEFAULT_DAYS', 90)
+        max_buckets = config.get('DATAPOINT_MAX_BUCKETS', 1000)
+
+        metric = request.args.get('metric')
+        if not metric:
+            days = request.args.get('days', default_days, type=int)
+            if days is None or not 1 <= days <= max_buckets:
+                return api_response(400, 'param_error')
+            return api_response(200, 'success', default_chart(user_id, days))
+
+        if metric not in METRICS:
+            return api_response(400, 'param_error', f"不支持的指标: {metric}")
+        end = parse_timestamp(request.args['end']) if request.args.get('end') else to_ts(datetime.now())
+        start = parse_timestamp(request.args['start']) if request.args.get('start') else end - default_days * 86400
+        if start >= end:
+            return api_response(400, 'param_error', '起始时间必须早于结束时间')
+
+        points = min(request.args.get('points', 200, type=int) or 200, max_buckets)
+        interval = request.args.get('interval', type=int) or choose_interval(start, end, points)
+        if interval <= 0 or (end - start) / interval > max_buckets:
+            return api_response(400, 'param_error', f"分桶数不能超过{max_buckets}")
+
+        return api_response(200, 'success', {
+            'metric': metric,
+            'interval': interval,
+            'start': format_ts(start),
+            'end': format_ts(end),
+            'points': query_series(user_id, metric, start, end, interval)
+        })
+
+    except DatapointError as e:
+        return api_response(400, 'param_error', str(e))
+    except Exception as e:
+        logger.error("获取健康数据点异常: %s", e)
+        return api_response(500, 'server_error')
+
+@health_bp.route('/datapoints', methods=['POST'])
+@jwt_required()
+def add_health_datapoints():
+    """
+    批量写入健康数据点，用于设备同步
+    
+    同一指标同一时刻的数据点重复上传时覆盖原读数，可以放心重试。无效的数据点被跳过，
+    在rejected中给出其下标和原因，其余数据点照常写入。
+    
+    请求头:
+    - Authorization: JWT令牌
+    
+    请求JSON参数:
+    - points: 数据点列表，最多DATAPOINT_INGEST_MAX_POINTS个
+      - metric: 指标
+      - ts: 时间（ISO 8601或Unix时间戳，秒或毫秒）
+      - value: 读数；血压为systolic和diastolic
+    
+    返回:
+    - 成功: {"accepted": 写入条数, "rejected": [{"index", "error"}]}
+    - 失败: 错误信息
+    """
+    try:
+        user_id = int(get_jwt_identity())
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return api_response(400, 'param_error')
+        items = data.get('points')
+        if not isinstance(items, list) or not items:
+            return api_response(400, 'param_error')
+        max_points = current_app.config.get('DATAPOINT_INGEST_MAX_POINTS', 10000)
+        if len(items) > max_points:
+            return api_response(400, 'param_error', f"单次最多{max_points}个数据点")
+
+        result = ingest_datapoints(user_id, items)
+        db.session.commit()
+        return api_response(200, 'success', result)
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error("写入健康数据点异常: %s", e)
+        return api_response(500, 'server_error')
+
+@health_bp.route('/datapoints/stats', methods=['GET'])
+@jwt_required()
+def get_health_datapoint_stats():
+    """
+    获取健康数据统计：各指标的趋势、滑动平均和超出正常范围的提醒
+    
+    请求头:
+    - Authorization: JWT令牌
+    
+    查询参数:
+    - days: 统计最近多少天，默认HEALTH_STATS_DAYS
+    - metric: 只返回该指标，默认全部
+    
+    返回:
+    - 成功: {指标: 统计结果}
+    - 失败: 错误信息
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        max_days = current_app.config.get('DATAPOINT_MAX_BUCKETS', 1000)
+        days = request.args.get('days', type=int)
+        if days is not None and not 1 <= days <= max_days:
+            return api_response(400, 'param_error')
+        metric = request.args.get('metric')
+        if metric and metric not in METRICS:
+            return api_response(400, 'param_error', f"不支持的指标: {metric}")
+
+        stats = get_user_stats(user_id, days)
+        if metric:
+            stats = {metric: stats[metric]} if metric in stats else {}
+        return api_response(200, 'success', stats)
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error("获取健康数据统计异常: %s", e)
+        return api_response(500, 'server_error')
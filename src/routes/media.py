@@ -0,0 +1,86 @@
+from flask import Blueprint, current_app, send_file
+import logging
+import mimetypes
+import os
+import re
+
+from src.utils.file_util import get_upload_url_path
+from src.utils.response import api_response
+from werkzeug.security import safe_join
+
+# 创建蓝图
+media_bp = Blueprint('media', __name__)
+logger = logging.getLogger(__name__)
+
+# 按内容寻址保存的文件：.../哈希前两位/哈希.扩展名 或 .../哈希前两位/哈希/衍生图
+CONTENT_ADDRESSED = re.compile(r'(?:^|/)([0-9a-f]{2})/(\1[0-9a-f]{62})(?:\.[A-Za-z0-9]+|/([^/]+))$')
+
+def content_etag(relative_path):
+    """
+    从按内容寻址的路径得到强ETag
+
+    Args:
+        relative_path (str): 相对上传目录的路径
+
+    Returns:
+        str: ETag，路径不是按内容寻址时为None
+    """
+    match = CONTENT_ADDRESSED.search(relative_path)
+    if not match:
+        return None
+    content_hash, variant = match.group(2), match.group(3)
+    return f"{content_hash}-{variant}" if variant else content_hash
+
+@media_bp.route('/<path:filename>', methods=['GET', 'HEAD'])
+def serve_upload(filename):
+    """
+    提供上传目录中的文件
+
+    支持Range请求（音频拖动播放）、If-None-Match/If-Modified-Since条件请求。按内容寻址的文件
+    使用内容哈希作为强ETag并可被永久缓存；响应体通过wsgi.file_wrapper交给服务器零拷贝发送，
+    配置USE_X_SENDFILE或MEDIA_ACCEL_REDIRECT_PREFIX后由前端服务器直接发送文件。
+
+    路径参数:
+    - filename: get_file_url生成的URL中 /static/ 之后的部分
+
+    返回:
+    - 成功: 文件内容
+    - 失败: 错误信息
+    """
+    try:
+        # get_file_url生成的路径为 /static/<上传目录>/<相对路径>
+        upload_prefix = get_upload_url_path()[len('/static/'):].strip('/') + '/'
+        if not filename.startswith(upload_prefix):
+            return api_response(404, 'not_found'), 404
+        relative_path = filename[len(upload_prefix):]
+
+        upload_folder = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+        path = safe_join(upload_folder, relative_path)
+        if path is None or not os.path.isfile(path):
+            return api_response(404, 'not_found'), 404
+
+        etag = content_etag(relative_path)
+        max_age = current_app.config.get('MEDIA_IMMUTABLE_MAX_AGE', 31536000) if etag \
+            else current_app.config.get('MEDIA_MAX_AGE', 3600)
+
+        accel_prefix = current_app.config.get('MEDIA_ACCEL_REDIRECT_PREFIX')
+        if accel_prefix:
+            # 交给nginx的internal location发送，Range和条件请求也由nginx处理
+            response = current_app.response_class(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{relative_path}"
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            if etag:
+                response.set_etag(etag)
+        else:
+            response = send_file(path, conditional=True, etag=etag or True, max_age=max_age)
+
+        if etag:
+            # 内容寻址的文件内容永远不变，浏览器在有效期内无需重新验证
+            response.cache_control.immutable = True
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
+
+    except Exception as e:
+        logger.error("读取上传文件异常: %s", e)
+        return api_response(500, 'server_error'), 500
@@ -27,7 +27,7 @@ def get_user_settings():
     try:
         # 获取当前用户ID
         user_id = get_jwt_identity()  # 使用字符串形式的用户ID
-        logger.info(f"获取用户设置 - 用户ID: {user_id}")
+        logger.debug("获取用户设置 - 用户ID: %s", user_id)
         
         # 使用SQL查询用户设置
         from sqlalchemy import text
@@ -40,30 +40,10 @@ def get_user_settings():
         user_exists = db.session.execute(user_exists_sql, {"user_id": user_id}).fetchone()
         
         if not user_exists:
-            logger.error(f"用户不存在 - ID: {user_id}")
+            logger.error("用户不存在 - ID: %s", user_id)
             return api_response(404, 'user_not_found')
         
-        logger.info(f"用户存在，继续查询设置")
-        
-        # 尝试创建设置表
-        try:
-            create_table_sql = text("""
-                CREATE TABLE IF NOT EXISTS user_settings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    language TEXT DEFAULT 'zh-CN',
-                    push_notification BOOLEAN DEFAULT 1,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            """)
-            
-            db.session.execute(create_table_sql)
-            db.session.commit()
-            logger.info("成功创建或确认设置表存在")
-        except Exception as e:
-            logger.error(f"创建设置表失败: {str(e)}")
-            db.session.rollback()
-            raise
+        logger.debug("用户存在，继续查询设置")
         
         # 查询用户设置
         try:
@@ -74,14 +54,14 @@ def get_user_settings():
             """)
             
             setting_result = db.session.execute(settings_sql, {"user_id": user_id}).fetchone()
-            logger.info(f"查询设置结果: {setting_result}")
+            logger.debug("查询设置结果: %s", setting_result)
         except Exception as e:
-            logger.error(f"查询设置失败: {str(e)}")
+            logger.error("查询设置失败: %s", e)
             raise
         
         # 如果设置不存在，创建默认设置
         if not setting_result:
-            logger.info(f"设置不存在，为用户 {user_id} 创建默认设置")
+            logger.info("设置不存在，为用户 %s 创建默认设置", user_id)
             try:
                 insert_sql = text("""
                     INSERT INTO user_settings (user_id, language, push_notification)
@@ -94,9 +74,9 @@ def get_user_settings():
                 
                 # 再次查询
                 setting_result = db.session.execute(settings_sql, {"user_id": user_id}).fetchone()
-                logger.info(f"创建后的设置结果: {setting_result}")
+                logger.debug("创建后的设置结果: %s", setting_result)
             except Exception as e:
-                logger.error(f"创建默认设置失败: {str(e)}")
+                logger.error("创建默认设置失败: %s", e)
                 db.session.rollback()
                 raise
         
@@ -106,13 +86,13 @@ def get_user_settings():
             'push_notification': bool(setting_result[3])
         }
         
-        logger.info(f"返回设置数据: {settings_dict}")
+        logger.debug("返回设置数据: %s", settings_dict)
         return api_response(200, 'success', settings_dict)
         
     except Exception as e:
-        logger.error(f"获取用户设置异常: {str(e)}")
+        logger.error("获取用户设置异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return api_response(500, 'server_error')
 
 @setting_bp.route('', methods=['PUT'])
@@ -221,9 +201,9 @@ def update_user_settings():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"更新用户设置异常: {str(e)}")
+        logger.error("更新用户设置异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return api_response(500, 'server_error')
 
 @setting_bp.route('/test', methods=['GET'])
@@ -233,7 +213,7 @@ def get_test_settings():
     try:
         # 获取当前用户ID
         user_id = get_jwt_identity()
-        logger.info(f"测试获取用户设置 - 用户ID: {user_id}")
+        logger.debug("测试获取用户设置 - 用户ID: %s", user_id)
         
         # 返回固定的测试设置
         settings_dict = {
@@ -241,13 +221,13 @@ def get_test_settings():
             'push_notification': True
         }
         
-        logger.info(f"返回测试设置数据: {settings_dict}")
+        logger.debug("返回测试设置数据: %s", settings_dict)
         return api_response(200, 'success', settings_dict)
         
     except Exception as e:
-        logger.error(f"测试获取用户设置异常: {str(e)}")
+        logger.error("测试获取用户设置异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return api_response(500, 'server_error')
 
 @setting_bp.route('/test', methods=['PUT'])
@@ -257,14 +237,14 @@ def update_test_settings():
     try:
         # 获取当前用户ID
         user_id = get_jwt_identity()
-        logger.info(f"测试更新用户设置 - 用户ID: {user_id}")
+        logger.debug("测试更新用户设置 - 用户ID: %s", user_id)
         
         # 获取请求数据
         data = request.get_json()
         if not data:
             return api_response(400, 'param_error')
         
-        logger.info(f"接收到的更新数据: {data}")
+        logger.debug("接收到的更新数据: %s", data)
         
         # 处理更新
         updated_dict = {
@@ -272,11 +252,11 @@ def update_test_settings():
             'push_notification': data.get('push_notification', True)
         }
         
-        logger.info(f"返回更新后的测试设置数据: {updated_dict}")
+        logger.debug("返回更新后的测试设置数据: %s", updated_dict)
         return api_response(200, 'update_success', updated_dict)
         
     except Exception as e:
-        logger.error(f"测试更新用户设置异常: {str(e)}")
+        logger.error("测试更新用户设置异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return api_response(500, 'server_error') 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, redirect, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import logging
 import os
@@ -9,7 +9,10 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from src.models.user import User
 from src.extensions.database import db
 from src.utils.response import api_response
-from src.utils.file_util import allowed_file, save_file, get_file_url
+from src.utils.file_util import allowed_file, get_file_url
+from src.utils.image_util import (
+    AVATAR_SIZES, IMAGE_FORMATS, InvalidImageError, avatar_variant_path, process_avatar
+)
 
 # 创建蓝图
 user_bp = Blueprint('user', __name__)
@@ -63,7 +66,7 @@ def get_user_profile():
         return api_response(200, 'success', user_dict)
         
     except Exception as e:
-        logger.error(f"获取用户信息异常: {str(e)}")
+        logger.error("获取用户信息异常: %s", e)
         return api_response(500, 'server_error')
 
 @user_bp.route('/profile', methods=['PUT'])
@@ -168,9 +171,9 @@ def update_user_profile():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"更新用户信息异常: {str(e)}")
+        logger.error("更新用户信息异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return api_response(500, 'server_error')
 
 @user_bp.route('/change-password', methods=['POST'])
@@ -240,9 +243,9 @@ def change_password():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"修改密码异常: {str(e)}")
+        logger.error("修改密码异常: %s", e)
         import traceback
-        logger.error(f"详细异常堆栈: {traceback.format_exc()}")
+        logger.error("详细异常堆栈: %s", traceback.format_exc())
         return api_response(500, 'server_error')
 
 @user_bp.route('/avatar', methods=['POST', 'OPTIONS'])
@@ -283,22 +286,83 @@ def upload_avatar():
         if file.filename == '':
             return api_response(400, 'no_file_selected')
         
-        if file and allowed_file(file.filename, {'png', 'jpg', 'jpeg', 'gif'}):
-            # 保存文件
-            file_path = save_file(file, 'avatars')
+        if file and allowed_file(file.filename, {'png', 'jpg', 'jpeg', 'gif', 'webp'}):
+            # 校验并重新编码，生成各尺寸的缩略图，原图不保存
+            try:
+                avatar_hash = process_avatar(file.stream)
+            except InvalidImageError as e:
+                logger.warning("头像图片无效: %s", e)
+                return api_response(400, 'unsupported_file_type')
             
-            # 获取文件URL
-            file_url = get_file_url(file_path)
+            variants = {
+                str(size): {
+                    extension: get_file_url(avatar_variant_path(avatar_hash, size, extension))
+                    for extension in IMAGE_FORMATS
+                } for size in AVATAR_SIZES
+            }
+            # avatar字段保持为单个URL，使用最大尺寸的JPEG兼容旧客户端
+            file_url = variants[str(AVATAR_SIZES[-1])]['jpg']
             
             # 更新用户头像
             user.avatar = file_url
+            user.avatar_hash = avatar_hash
             db.session.commit()
             
-            return api_response(200, 'avatar_upload_success', {'avatar': file_url})
+            return api_response(200, 'avatar_upload_success', {'avatar': file_url, 'variants': variants})
         else:
             return api_response(400, 'unsupported_file_type')
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"上传头像异常: {str(e)}")
-        return api_response(500, 'server_error') 
\ No newline at end of file
+        logger.error("上传头像异常: %s", e)
+        return api_response(500, 'server_error')
+
+
+@user_bp.route('/<int:user_id>/avatar', methods=['GET'])
+def get_avatar(user_id):
+    """
+    获取用户头像的缩略图
+    
+    路径参数:
+    - user_id: 用户ID
+    
+    查询参数:
+    - size: 需要的边长（像素），返回不小于该尺寸的最小缩略图，默认为最大尺寸
+    - format: webp或jpg，不传时根据Accept头选择
+    
+    返回:
+    - 成功: 图片内容
+    - 失败: 错误信息
+    """
+    try:
+        user = db.session.get(User, user_id)
+        if not user:
+            return api_response(404, 'user_not_found')
+        if not user.avatar:
+            return api_response(404, 'not_found')
+        
+        # 旧版上传的头像没有缩略图，直接跳转到原图
+        if not user.avatar_hash:
+            return redirect(user.avatar)
+        
+        size = request.args.get('size', AVATAR_SIZES[-1], type=int)
+        extension = request.args.get('format')
+        if extension == 'jpeg':
+            extension = 'jpg'
+        if extension not in IMAGE_FORMATS:
+            # 只有明确声明支持WebP的客户端才返回WebP，*/*不算
+            extension = 'webp' if 'image/webp' in request.accept_mimetypes.values() else 'jpg'
+        
+        path = os.path.join(
+            os.path.abspath(current_app.config['UPLOAD_FOLDER']),
+            avatar_variant_path(user.avatar_hash, size, extension)
+        )
+        response = send_file(path, mimetype=IMAGE_FORMATS[extension][1], conditional=True, max_age=86400)
+        response.vary.add('Accept')
+        return response
+    
+    except FileNotFoundError:
+        return api_response(404, 'not_found')
+    except Exception as e:
+        logger.error("获取头像异常: %s", e)
+        return api_response(500, 'server_error')
@@ -1,6 +1,6 @@
 from src.utils.response import api_response, get_message
 from src.utils.ai_service import xunfei_speech_to_text, query_qwen_medical_api
-from src.utils.file_util import allowed_file, save_file, get_file_url
+from src.utils.file_util import allowed_file, save_file, store_upload, get_file_url
 
 __all__ = [
     'api_response', 
@@ -9,5 +9,6 @@ __all__ = [
     'query_qwen_medical_api',
     'allowed_file', 
     'save_file', 
+    'store_upload',
     'get_file_url'
 ]
\ No newline at end of file
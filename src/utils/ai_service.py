@@ -4,23 +4,106 @@ import hmac
 import json
 import time
 import urllib.parse
-import requests
 import logging
-import websocket
+import os
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from flask import current_app
 
+from src.extensions.metrics import record_cache, track_upstream
+from src.utils.audio_util import prepare_audio
+from src.utils.cache import TTLCache
+from src.utils.tracing import bind_trace, traced
+from src.utils.transcript_cache import get_cached_transcript, store_transcript
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
-def xunfei_iat_auth(api_key, api_secret):
+# 讯飞语音识别默认地址
+DEFAULT_XUNFEI_IAT_URL = 'wss://iat.cn-huabei-1.xf-yun.com/v1'
+
+_http_session = None
+_http_session_pid = None
+_http_session_lock = threading.Lock()
+
+# 限制每个进程同时发往上游服务的请求数，按(进程号, 服务, 上限)区分
+_upstream_semaphores = {}
+
+# 无会话医疗问答的答案缓存
+answer_cache = TTLCache(max_size=2048)
+
+def get_http_session():
+    """
+    获取当前进程共享的HTTP会话，复用到千问服务的连接
+    
+    会话在首次使用时创建；进程fork后（如gunicorn preload）重新创建，避免多个worker共用同一个连接。
+    
+    Returns:
+        requests.Session: HTTP会话
+    """
+    global _http_session, _http_session_pid
+    
+    if _http_session_pid != os.getpid():
+        with _http_session_lock:
+            if _http_session_pid != os.getpid():
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                pool_size = current_app.config.get('QWEN_POOL_SIZE', 10)
+                session = requests.Session()
+                session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                _http_session = session
+                _http_session_pid = os.getpid()
+    return _http_session
+
+def get_upstream_semaphore(name, limit):
+    """
+    获取当前进程限制某个上游服务并发请求数的信号量
+    
+    Args:
+        name (str): 服务名称
+        limit (int): 最大并发数
+        
+    Returns:
+        threading.BoundedSemaphore: 信号量
+    """
+    key = (os.getpid(), name, limit)
+    semaphore = _upstream_semaphores.get(key)
+    if semaphore is None:
+        with _http_session_lock:
+            semaphore = _upstream_semaphores.setdefault(key, threading.BoundedSemaphore(limit))
+    return semaphore
+
+def get_qwen_semaphore():
+    """
+    获取限制千问并发请求数的信号量，大小为QWEN_MAX_CONCURRENCY
+    
+    Returns:
+        threading.BoundedSemaphore: 信号量
+    """
+    return get_upstream_semaphore('qwen', current_app.config.get('QWEN_MAX_CONCURRENCY', 10))
+
+def get_xunfei_semaphore():
+    """
+    获取限制讯飞并发识别数的信号量，大小为XUNFEI_MAX_CONCURRENCY
+    
+    Returns:
+        threading.BoundedSemaphore: 信号量
+    """
+    return get_upstream_semaphore('xunfei', current_app.config.get('XUNFEI_MAX_CONCURRENCY', 4))
+
+def xunfei_iat_auth(api_key, api_secret, host='iat.cn-huabei-1.xf-yun.com', path='/v1'):
     """
     生成讯飞语音识别API的鉴权参数
     
     Args:
         api_key: 讯飞API Key
         api_secret: 讯飞API Secret
+        host: 语音识别服务的主机名，参与签名
+        path: 请求路径，参与签名
         
     Returns:
         dict: 鉴权参数
@@ -30,7 +113,7 @@ def xunfei_iat_auth(api_key, api_secret):
     date = now.strftime('%a, %d %b %Y %H:%M:%S GMT')
     
     # 构建signature_origin
-    signature_origin = f"host: iat.cn-huabei-1.xf-yun.com\ndate: {date}\nGET /v1 HTTP/1.1"
+    signature_origin = f"host: {host}\ndate: {date}\nGET {path} HTTP/1.1"
     
     # 使用hmac-sha256计算签名
     signature_sha = hmac.new(api_secret.encode('utf-8'), 
@@ -45,21 +128,26 @@ def xunfei_iat_auth(api_key, api_secret):
     return {
         "authorization": authorization,
         "date": date,
-        "host": "iat.cn-huabei-1.xf-yun.com"
+        "host": host
     }
 
-def xunfei_speech_to_text(audio_data, audio_format="mp3"):
+@traced('xunfei.speech_to_text')
+def xunfei_speech_to_text(audio_data, audio_format="mp3", language="zh_cn"):
     """
     讯飞语音识别API，将音频转换为文本
     
     Args:
         audio_data (bytes): 音频数据
         audio_format (str): 音频格式，支持pcm/mp3
+        language (str): 识别语言，默认zh_cn
         
     Returns:
         dict: 识别结果，包含code和text字段
     """
     try:
+        # 按需导入，避免每个worker启动时都加载WebSocket客户端
+        import websocket
+        
         api_key = current_app.config.get('XUNFEI_API_KEY')
         api_secret = current_app.config.get('XUNFEI_API_SECRET')
         
@@ -67,67 +155,76 @@ def xunfei_speech_to_text(audio_data, audio_format="mp3"):
             logger.error("缺少讯飞API配置")
             return {"code": -1, "text": "讯飞API配置错误"}
             
-        # 获取鉴权参数
-        auth_params = xunfei_iat_auth(api_key, api_secret)
+        # 获取鉴权参数，签名中的主机名和路径取自配置的服务地址
+        iat_url = current_app.config.get('XUNFEI_IAT_URL') or DEFAULT_XUNFEI_IAT_URL
+        parsed_url = urllib.parse.urlsplit(iat_url)
+        auth_params = xunfei_iat_auth(api_key, api_secret, parsed_url.hostname, parsed_url.path or '/')
         
         # 构建WebSocket URL
-        url = "wss://iat.cn-huabei-1.xf-yun.com/v1?" + urllib.parse.urlencode({
+        url = iat_url + "?" + urllib.parse.urlencode({
             "authorization": auth_params["authorization"],
             "date": auth_params["date"],
             "host": auth_params["host"]
         })
         
-        # 使用WebSocket客户端连接并发送数据
-        recognition_result = ""
-        
-        def on_message(ws, message):
-            nonlocal recognition_result
-            response = json.loads(message)
-            if response.get("code") == 0:
-                data = response.get("data", {})
-                if data.get("status") == 2:  # 识别结束
-                    result = data.get("result", {})
-                    recognition_result = result.get("text", "")
-        
-        def on_error(ws, error):
-            logger.error(f"WebSocket错误: {error}")
-        
-        def on_close(ws, close_status_code, close_msg):
-            logger.info(f"WebSocket连接关闭: {close_status_code}, {close_msg}")
-        
-        def on_open(ws):
-            # 组装发送的数据
-            data = {
-                "common": {
-                    "app_id": api_key
-                },
-                "business": {
-                    "language": "zh_cn",
-                    "domain": "iat",
-                    "accent": "mandarin",
-                    "format": audio_format
-                },
-                "data": {
-                    "status": 0,  # 0：第一帧音频；1：中间帧；2：最后一帧
-                    "format": audio_format,
-                    "audio": base64.b64encode(audio_data).decode('utf-8'),
-                    "encoding": "raw"
-                }
+        # 组装发送的数据
+        data = {
+            "common": {
+                "app_id": api_key
+            },
+            "business": {
+                "language": language,
+                "domain": "iat",
+                "accent": "mandarin",
+                "format": audio_format
+            },
+            "data": {
+                "status": 0,  # 0：第一帧音频；1：中间帧；2：最后一帧
+                "format": audio_format,
+                "audio": base64.b64encode(audio_data).decode('utf-8'),
+                "encoding": "raw"
             }
-            ws.send(json.dumps(data))
-            
-            # 发送结束帧
-            data["data"]["status"] = 2
-            data["data"]["audio"] = ""
-            ws.send(json.dumps(data))
-        
-        # 建立WebSocket连接
-        ws = websocket.WebSocketApp(url,
-                                    on_message=on_message,
-                                    on_error=on_error,
-                                    on_close=on_close)
-        ws.on_open = on_open
-        ws.run_forever(ping_interval=10)
+        }
+        
+        # 连接、握手和每次接收都受套接字超时限制，整个识别过程不超过XUNFEI_TIMEOUT
+        timeout = current_app.config.get('XUNFEI_TIMEOUT', 30)
+        recognition_result = ""
+        with get_xunfei_semaphore(), track_upstream('xunfei') as call:
+            deadline = time.monotonic() + timeout
+            try:
+                ws = websocket.create_connection(url, timeout=timeout)
+                try:
+                    ws.send(json.dumps(data))
+                    
+                    # 发送结束帧
+                    data["data"]["status"] = 2
+                    data["data"]["audio"] = ""
+                    ws.send(json.dumps(data))
+                    
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise websocket.WebSocketTimeoutException("识别结果超时")
+                        ws.settimeout(remaining)
+                        response = json.loads(ws.recv())
+                        if response.get("code") != 0:
+                            logger.error("讯飞语音识别错误: %s, %s", response.get("code"), response.get("message"))
+                            break
+                        result_data = response.get("data", {})
+                        if result_data.get("status") == 2:  # 识别结束
+                            recognition_result = result_data.get("result", {}).get("text", "")
+                            break
+                finally:
+                    # 等待服务端关闭帧的时间也计入超时
+                    ws.close(timeout=max(deadline - time.monotonic(), 0))
+            except (websocket.WebSocketTimeoutException, TimeoutError) as e:
+                logger.error("讯飞语音识别超时（%s秒）: %s", timeout, e)
+                call['outcome'] = 'timeout'
+            except websocket.WebSocketException as e:
+                logger.error("WebSocket错误: %s", e)
+                call['outcome'] = 'error'
+            if not recognition_result and call['outcome'] == 'ok':
+                call['outcome'] = 'error'
         
         if recognition_result:
             return {"code": 0, "text": recognition_result}
@@ -135,10 +232,64 @@ def xunfei_speech_to_text(audio_data, audio_format="mp3"):
             return {"code": -1, "text": "语音识别失败"}
             
     except Exception as e:
-        logger.error(f"语音识别异常: {str(e)}")
+        logger.error("语音识别异常: %s", e)
         logger.error(traceback.format_exc())
         return {"code": -1, "text": f"语音识别异常: {str(e)}"}
 
+def transcribe_audio(audio_data, audio_format, language="zh_cn", audio_hash=None):
+    """
+    识别上传的语音：先预处理为16kHz单声道PCM并按语音活动切分为语句，
+    各语句在XUNFEI_MAX_CONCURRENCY的并发限制内并行识别，再按原顺序拼接
+    
+    传入audio_hash时先查识别结果缓存，同一音频重复上传或客户端重试时不再调用讯飞。
+    
+    Args:
+        audio_data: 音频数据，bytes或mmap
+        audio_format (str): 上传文件的扩展名
+        language (str): 识别语言，默认zh_cn
+        audio_hash (str): 音频内容的SHA-256，可选
+        
+    Returns:
+        dict: 识别结果，包含code和text字段，命中缓存时cached为True
+    """
+    if audio_hash:
+        cached = get_cached_transcript(audio_hash, audio_format, language)
+        if cached is not None:
+            return {"code": 0, "text": cached, "cached": True}
+    
+    result = _recognize_audio(audio_data, audio_format, language)
+    if audio_hash and result['code'] == 0:
+        store_transcript(audio_hash, audio_format, language, result['text'])
+    return result
+
+def _recognize_audio(audio_data, audio_format, language):
+    prepared = prepare_audio(audio_data, audio_format)
+    if not prepared.chunks:
+        return {"code": -1, "text": "未检测到语音"}
+    logger.info("语音预处理: %s字节 -> %s字节，%s段", prepared.original_size, prepared.size, len(prepared.chunks))
+    
+    if len(prepared.chunks) == 1:
+        return xunfei_speech_to_text(prepared.chunks[0], prepared.audio_format, language)
+    
+    app = current_app._get_current_object()
+    
+    # 工作线程中识别的span记录到当前请求的追踪里
+    @bind_trace
+    def recognize(chunk):
+        with app.app_context():
+            return xunfei_speech_to_text(chunk, prepared.audio_format, language)
+    
+    # 线程数与并发上限一致，实际并发由信号量控制
+    workers = min(app.config.get('XUNFEI_MAX_CONCURRENCY', 4), len(prepared.chunks))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asr') as executor:
+        results = list(executor.map(recognize, prepared.chunks))
+    
+    failed = next((result for result in results if result['code'] != 0), None)
+    if failed is not None:
+        return failed
+    return {"code": 0, "text": ''.join(result['text'] for result in results)}
+
+@traced('qwen.medical_qa')
 def query_qwen_medical_api(query, language="chinese", max_tokens=1024, temperature=0.7):
     """
     查询千问医疗大模型API
@@ -156,9 +307,13 @@ def query_qwen_medical_api(query, language="chinese", max_tokens=1024, temperatu
         # 关键点：这里决定是否使用模拟数据
         use_mock = current_app.config.get('USE_MOCK_MEDICAL_MODEL', False)
         if use_mock:
-            return generate_mock_response(query, language)
+            with get_qwen_semaphore():
+                return generate_mock_response(query, language)
+        
+        # 真实API调用部分，按需导入HTTP客户端
+        import requests
         
-        # 真实API调用部分
+        session = get_http_session()
         api_url = current_app.config.get('QWEN_API_URL')
         if not api_url:
             logger.error("缺少千问API配置")
@@ -175,12 +330,20 @@ def query_qwen_medical_api(query, language="chinese", max_tokens=1024, temperatu
         
         # 发送请求到千问API
         start_time = time.time()
-        response = requests.post(
-            f"{api_url}/api/medical_qa",
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=30
-        )
+        with get_qwen_semaphore(), track_upstream('qwen') as call:
+            try:
+                response = session.post(
+                    f"{api_url}/api/medical_qa",
+                    headers={"Content-Type": "application/json"},
+                    json=payload,
+                    timeout=(current_app.config.get('QWEN_CONNECT_TIMEOUT', 5),
+                             current_app.config.get('QWEN_API_TIMEOUT', 30))
+                )
+            except requests.exceptions.Timeout:
+                call['outcome'] = 'timeout'
+                raise
+            if response.status_code != 200:
+                call['outcome'] = 'error'
         time_taken = time.time() - start_time
         
         # 处理响应
@@ -197,6 +360,31 @@ def query_qwen_medical_api(query, language="chinese", max_tokens=1024, temperatu
     except Exception as e:
         return {"code": -1, "response": f"医疗咨询服务异常: {str(e)}"}
 
+def answer_medical_question(query, language="chinese", max_tokens=1024, temperature=0.7):
+    """
+    批量问答使用的无会话医疗问答，相同参数的问题在ANSWER_CACHE_TTL秒内直接返回缓存的答案
+    
+    Args:
+        query (str): 用户查询内容
+        language (str): 语言，支持chinese和mongolian
+        max_tokens (int): 最大生成token数
+        temperature (float): 温度参数
+        
+    Returns:
+        dict: 查询结果，cached表示是否来自缓存
+    """
+    key = (' '.join(query.split()), language, max_tokens, temperature)
+    cached = answer_cache.get(key)
+    record_cache('medical_answer', cached is not None)
+    if cached is not None:
+        return {**cached, "cached": True}
+    
+    result = query_qwen_medical_api(query, language=language, max_tokens=max_tokens, temperature=temperature)
+    # 只缓存成功的回答
+    if result.get('code') == 0:
+        answer_cache.set(key, result, current_app.config.get('ANSWER_CACHE_TTL', 3600))
+    return {**result, "cached": False}
+
 def generate_mock_response(query, language="chinese"):
     """
     生成模拟的医疗大模型响应（用于测试或离线环境）
@@ -208,7 +396,10 @@ def generate_mock_response(query, language="chinese"):
     Returns:
         dict: 模拟的查询结果
     """
-    time.sleep(1)  # 模拟网络延迟
+    # 模拟网络延迟
+    latency = current_app.config.get('MOCK_MEDICAL_MODEL_LATENCY', 1)
+    if latency:
+        time.sleep(latency)
     
     mock_responses = {
         "chinese": {
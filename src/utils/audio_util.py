@@ -0,0 +1,286 @@
+import io
+import logging
+import math
+import sys
+import warnings
+import wave
+from array import array
+
+from flask import current_app
+
+from src.utils.tracing import traced
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        import audioop
+except ImportError:  # Python 3.13起标准库不再提供audioop，使用下面的纯Python实现
+    audioop = None
+
+logger = logging.getLogger(__name__)
+
+# 语音识别使用的采样率、位深和声道数
+TARGET_RATE = 16000
+TARGET_WIDTH = 2
+
+# 静音检测的帧长（毫秒）
+FRAME_MS = 20
+
+# 8位PCM为无符号数，翻转最高位即得到有符号数
+_UNSIGNED_TO_SIGNED = bytes((value ^ 0x80) for value in range(256))
+
+
+class PreparedAudio:
+    """
+    预处理后的音频
+
+    Attributes:
+        audio_format (str): 传给语音识别的格式，pcm为16kHz单声道16位PCM
+        chunks (list): 按时间顺序的语句分段，每段不超过AUDIO_MAX_CHUNK_SECONDS
+        duration (float): 解码后的时长（秒），无法解码的格式为None
+        original_size (int): 原始数据字节数
+    """
+
+    def __init__(self, audio_format, chunks, duration=None, original_size=0):
+        self.audio_format = audio_format
+        self.chunks = chunks
+        self.duration = duration
+        self.original_size = original_size
+
+    @property
+    def size(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+
+def to_16bit(pcm, width):
+    """
+    把任意位深的小端PCM转换为16位，只保留高位字节，不经过逐样本的Python循环
+
+    Args:
+        pcm (bytes): PCM数据
+        width (int): 每个样本的字节数（1-4）
+
+    Returns:
+        bytes: 16位PCM
+    """
+    if width == 2:
+        return bytes(pcm)
+    count = len(pcm) // width
+    out = bytearray(count * 2)
+    if width == 1:
+        out[1::2] = bytes(pcm[:count]).translate(_UNSIGNED_TO_SIGNED)
+    else:
+        out[0::2] = pcm[width - 2:count * width:width]
+        out[1::2] = pcm[width - 1:count * width:width]
+    return bytes(out)
+
+
+def _samples(pcm):
+    samples = array('h')
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+
+def _to_bytes(samples):
+    if sys.byteorder == 'big':
+        samples = array('h', samples)
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def to_mono(pcm, channels):
+    """
+    把16位PCM混合为单声道
+
+    Args:
+        pcm (bytes): 16位交错PCM
+        channels (int): 声道数
+
+    Returns:
+        bytes: 单声道16位PCM
+    """
+    if channels == 1:
+        return pcm
+    if channels == 2 and audioop is not None:
+        return audioop.tomono(pcm, 2, 0.5, 0.5)
+    samples = _samples(pcm)
+    frames = len(samples) // channels
+    mixed = array('h', (
+        int(sum(samples[i * channels:(i + 1) * channels]) / channels) for i in range(frames)
+    ))
+    return _to_bytes(mixed)
+
+
+def resample(pcm, rate, target_rate=TARGET_RATE):
+    """
+    对单声道16位PCM重采样
+
+    Args:
+        pcm (bytes): 单声道16位PCM
+        rate (int): 原采样率
+        target_rate (int): 目标采样率
+
+    Returns:
+        bytes: 重采样后的PCM
+    """
+    if rate == target_rate or not pcm:
+        return pcm
+    if audioop is not None:
+        return audioop.ratecv(pcm, 2, 1, rate, target_rate, None)[0]
+    # 线性插值
+    samples = _samples(pcm)
+    count = max(1, int(len(samples) * target_rate / rate))
+    step = rate / target_rate
+    last = len(samples) - 1
+    output = array('h')
+    for i in range(count):
+        position = i * step
+        index = int(position)
+        fraction = position - index
+        following = samples[min(index + 1, last)]
+        output.append(int(samples[index] + (following - samples[index]) * fraction))
+    return _to_bytes(output)
+
+
+def rms(pcm):
+    """计算16位PCM的均方根音量"""
+    if not pcm:
+        return 0
+    if audioop is not None:
+        return audioop.rms(pcm, 2)
+    samples = _samples(pcm)
+    return int(math.sqrt(sum(sample * sample for sample in samples) / len(samples)))
+
+
+def frame_bytes(rate=TARGET_RATE, frame_ms=FRAME_MS):
+    return rate * frame_ms // 1000 * TARGET_WIDTH
+
+
+def split_chunks(pcm, max_seconds, rate=TARGET_RATE):
+    """
+    按最大时长把PCM切块，切分点对齐到帧
+
+    Returns:
+        list: PCM分块
+    """
+    size = max(frame_bytes(rate), int(max_seconds * 1000) // FRAME_MS * frame_bytes(rate))
+    return [pcm[start:start + size] for start in range(0, len(pcm), size)] or [b'']
+
+
+def detect_voiced_regions(pcm, threshold, min_silence_ms, rate=TARGET_RATE):
+    """
+    基于帧能量的语音活动检测
+
+    Args:
+        pcm (bytes): 单声道16位PCM
+        threshold (int): 均方根音量不低于该值的帧视为语音
+        min_silence_ms (int): 语音之间的静音至少这么长才断开
+        rate (int): 采样率
+
+    Returns:
+        list: 语音区间[(起始字节, 结束字节)]，按时间顺序
+    """
+    size = frame_bytes(rate)
+    max_gap = max(1, min_silence_ms // FRAME_MS)
+    regions = []
+    start = end = None
+    for offset in range(0, len(pcm), size):
+        if rms(pcm[offset:offset + size]) < threshold:
+            continue
+        if start is not None and (offset - end) // size >= max_gap:
+            regions.append((start, end))
+            start = None
+        if start is None:
+            start = offset
+        end = min(offset + size, len(pcm))
+    if start is not None:
+        regions.append((start, end))
+    return regions
+
+
+def segment_utterances(pcm, threshold, min_silence_ms, target_seconds, max_seconds,
+                       rate=TARGET_RATE, padding_ms=200):
+    """
+    按静音把录音切分为语句，用于并行识别
+
+    相邻语句合并到不超过target_seconds，避免产生大量很短的识别请求；
+    单个语句超过max_seconds时再按时长切开。每段两端保留padding_ms的静音。
+
+    Returns:
+        list: PCM分段，按时间顺序；全部为静音时为空列表
+    """
+    bytes_per_second = rate * TARGET_WIDTH
+    padding = padding_ms // FRAME_MS * frame_bytes(rate)
+    target = int(target_seconds * bytes_per_second)
+
+    merged = []
+    for start, end in detect_voiced_regions(pcm, threshold, min_silence_ms, rate):
+        if merged and end - merged[-1][0] <= target:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    segments = []
+    for start, end in merged:
+        segment = pcm[max(0, start - padding):end + padding]
+        segments.extend(split_chunks(segment, max_seconds, rate))
+    return segments
+
+
+def decode_wav(data):
+    """
+    解码WAV为16kHz单声道16位PCM
+
+    Args:
+        data: WAV数据，bytes或mmap
+
+    Returns:
+        bytes: PCM
+
+    Raises:
+        wave.Error: 不是可解码的PCM WAV
+    """
+    source = data if hasattr(data, 'seek') else io.BytesIO(data)
+    source.seek(0)
+    with wave.open(source, 'rb') as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    return resample(to_mono(to_16bit(frames, width), channels), rate)
+
+
+@traced('audio.prepare')
+def prepare_audio(data, audio_format):
+    """
+    语音识别前的预处理：WAV解码为16kHz单声道PCM，按语音活动切分为语句
+
+    标准库无法解码的格式（mp3等）原样返回，由讯飞直接识别。
+
+    Args:
+        data: 音频数据，bytes或mmap
+        audio_format (str): 上传文件的扩展名
+
+    Returns:
+        PreparedAudio: 预处理结果
+    """
+    config = current_app.config
+    original_size = len(data)
+    if audio_format != 'wav':
+        return PreparedAudio(audio_format, [data], original_size=original_size)
+
+    try:
+        pcm = decode_wav(data)
+    except (wave.Error, EOFError) as e:
+        # 压缩编码的WAV等，交给讯飞按原格式识别
+        logger.warning("WAV解码失败，按原格式识别: %s", e)
+        return PreparedAudio(audio_format, [data], original_size=original_size)
+
+    chunks = segment_utterances(
+        pcm,
+        config.get('AUDIO_SILENCE_THRESHOLD', 500),
+        config.get('AUDIO_VAD_MIN_SILENCE_MS', 400),
+        config.get('AUDIO_VAD_TARGET_SECONDS', 15),
+        config.get('AUDIO_MAX_CHUNK_SECONDS', 55)
+    )
+    return PreparedAudio('pcm', chunks, len(pcm) / (TARGET_RATE * TARGET_WIDTH), original_size)
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    带过期时间的进程内LRU缓存，线程安全
+
+    超过max_size时淘汰最久未使用的条目；过期的条目在读取时删除。
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键，需可哈希
+            default: 未命中或已过期时的返回值
+
+        Returns:
+            缓存的值或default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键，需可哈希
+            value: 缓存的值
+            ttl (float): 有效期（秒），不大于0时不缓存
+        """
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
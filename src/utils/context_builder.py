@@ -0,0 +1,222 @@
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import select
+
+from src.extensions.database import db
+from src.extensions.metrics import record_cache
+from src.models.consult import ConsultMessage, ConsultSession
+
+logger = logging.getLogger(__name__)
+
+# 对话中各角色的标签，system消息不进入上下文
+ROLE_LABELS = {
+    'user': '用户',
+    'ai': '医生'
+}
+
+# 摘要中每条消息保留的最大字符数
+SUMMARY_SNIPPET_CHARS = {
+    'user': 60,
+    'ai': 30
+}
+
+_ASCII_RUN = re.compile(r'[\x00-\x7f]+')
+
+
+def estimate_tokens(text):
+    """
+    快速估算文本的token数
+
+    中文、蒙古文等非ASCII字符按每字一个token计，ASCII片段按每4个字符一个token计，
+    不需要加载分词器，误差对预算控制来说足够小。
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        int: 估算的token数
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(len(run) for run in _ASCII_RUN.findall(text))
+    return len(text) - ascii_chars + (ascii_chars + 3) // 4
+
+
+def fetch_recent_messages(session_id, limit):
+    """
+    用一次查询取会话中最近的消息，走(session_id, created_at)索引
+
+    Args:
+        session_id (int): 会话ID
+        limit (int): 最多返回的消息数
+
+    Returns:
+        list: (id, sender_type, content)元组，按时间正序
+    """
+    query = select(ConsultMessage.id, ConsultMessage.sender_type, ConsultMessage.content).where(
+        ConsultMessage.session_id == session_id,
+        ConsultMessage.sender_type.in_(list(ROLE_LABELS))
+    )
+    query = query.order_by(ConsultMessage.created_at.desc(), ConsultMessage.id.desc()).limit(limit)
+    return list(reversed(db.session.execute(query).all()))
+
+
+def _summary_line(sender_type, content):
+    limit = SUMMARY_SNIPPET_CHARS.get(sender_type, 30)
+    snippet = ' '.join(content.split())
+    if len(snippet) > limit:
+        snippet = snippet[:limit] + '…'
+    return f"{ROLE_LABELS[sender_type]}：{snippet}"
+
+
+def _trim_summary(lines, token_budget):
+    # 超出预算时丢弃最早的内容，保留最近的摘要
+    total = sum(estimate_tokens(line) for line in lines)
+    while lines and total > token_budget:
+        total -= estimate_tokens(lines.pop(0))
+    return lines
+
+
+def extend_summary(summary, messages, token_budget):
+    """
+    把新消息追加到已有摘要中，超出预算时丢弃最早的部分
+
+    Args:
+        summary (str): 已有摘要，每行一条
+        messages (list): 按时间正序的(id, sender_type, content)
+        token_budget (int): 摘要的token预算
+
+    Returns:
+        str: 新的摘要
+    """
+    lines = summary.split('\n') if summary else []
+    lines += [_summary_line(sender_type, content) for _, sender_type, content in messages]
+    return '\n'.join(_trim_summary(lines, token_budget))
+
+
+class SummaryCache:
+    """
+    会话滚动摘要的进程内缓存
+
+    每个会话缓存"截至某条消息为止"的摘要。需要更靠后的摘要时只查询新增的消息并追加，
+    不重新扫描整个历史；摘要超过预算时丢弃最早的部分，长会话的摘要大小保持不变。
+    缓存未命中时从会话行上持久化的摘要（由后台摘要任务维护）开始追加。
+    """
+
+    def __init__(self, max_sessions=1000):
+        self.max_sessions = max_sessions
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id, until_id, token_budget):
+        """
+        获取会话中ID小于until_id的消息的摘要
+
+        Args:
+            session_id (int): 会话ID
+            until_id (int): 摘要覆盖到该消息之前
+            token_budget (int): 摘要的token预算
+
+        Returns:
+            str: 摘要文本，没有更早的消息时为空字符串
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+        record_cache('context_summary', entry is not None and entry[0] >= until_id)
+
+        if entry is None:
+            row = db.session.execute(
+                select(ConsultSession.summary, ConsultSession.summarized_until).where(ConsultSession.id == session_id)
+            ).first()
+            entry = (row.summarized_until or 0, row.summary or '') if row else (0, '')
+
+        # 已覆盖到更靠后的位置时直接使用，与最近消息少量重叠不影响预算控制
+        covered_id, summary = entry
+        if covered_id < until_id:
+            rows = db.session.execute(
+                select(ConsultMessage.id, ConsultMessage.sender_type, ConsultMessage.content).where(
+                    ConsultMessage.session_id == session_id,
+                    ConsultMessage.id >= covered_id,
+                    ConsultMessage.id < until_id,
+                    ConsultMessage.sender_type.in_(list(ROLE_LABELS))
+                ).order_by(ConsultMessage.id)
+            ).all()
+            summary = extend_summary(summary, rows, token_budget)
+            covered_id = until_id
+
+        with self._lock:
+            self._entries[session_id] = (covered_id, summary)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+        return summary
+
+    def invalidate(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+# 全局摘要缓存
+summary_cache = SummaryCache()
+
+
+def build_context(session_id, query, max_messages=None, token_budget=None, summary_budget=None):
+    """
+    组装发送给模型的多轮对话上下文
+
+    取最近max_messages条消息，从新到旧在token预算内尽量保留；更早的消息以滚动摘要的
+    形式出现在最前面。会话没有历史消息时直接返回query。
+
+    Args:
+        session_id (int): 会话ID
+        query (str): 本次提问
+        max_messages (int): 最多取的历史消息数，默认CONTEXT_MAX_MESSAGES
+        token_budget (int): 整个上下文的token预算，默认CONTEXT_TOKEN_BUDGET
+        summary_budget (int): 摘要的token预算，默认CONTEXT_SUMMARY_TOKENS
+
+    Returns:
+        str: 发送给模型的查询文本
+    """
+    config = current_app.config
+    max_messages = max_messages or config.get('CONTEXT_MAX_MESSAGES', 20)
+    token_budget = token_budget or config.get('CONTEXT_TOKEN_BUDGET', 1500)
+    summary_budget = summary_budget or config.get('CONTEXT_SUMMARY_TOKENS', 300)
+
+    history = fetch_recent_messages(session_id, max_messages)
+    if not history:
+        return query
+
+    # 取满max_messages条说明可能还有更早的消息，为摘要预留预算
+    reserved = summary_budget if len(history) == max_messages else 0
+    remaining = token_budget - estimate_tokens(query) - reserved
+    kept = []
+    for message_id, sender_type, content in reversed(history):
+        line = f"{ROLE_LABELS[sender_type]}：{content}"
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            break
+        kept.append((message_id, line))
+        remaining -= cost
+    kept.reverse()
+    remaining += reserved
+
+    # 最早保留的消息之前还有消息时，用摘要代替
+    first_kept_id = kept[0][0] if kept else history[-1][0] + 1
+    summary = ''
+    if remaining > 0 and (len(kept) < len(history) or reserved):
+        lines = summary_cache.get(session_id, first_kept_id, summary_budget).split('\n')
+        summary = '\n'.join(_trim_summary(lines, min(summary_budget, remaining)))
+
+    parts = []
+    if summary:
+        parts.append(f"之前的对话摘要：\n{summary}")
+    if kept:
+        parts.append("最近的对话：\n" + '\n'.join(line for _, line in kept))
+    parts.append(f"当前问题：{query}")
+    return '\n\n'.join(parts)
@@ -0,0 +1,63 @@
+import logging
+
+from sqlalchemy import select
+
+from src.extensions.database import db
+from src.models.article import Article
+from src.utils.image_util import open_image_source, process_cover
+
+logger = logging.getLogger(__name__)
+
+
+def process_article_cover(article):
+    """
+    为文章封面生成衍生图和模糊占位图，结果写入cover_variants（不提交事务）
+
+    Args:
+        article (Article): 文章
+
+    Returns:
+        bool: 是否处理成功，没有封面或封面无法读取时为False
+    """
+    if not article.cover_image:
+        return False
+    try:
+        with open_image_source(article.cover_image) as stream:
+            article.cover_variants = process_cover(stream)
+        return True
+    except Exception as e:
+        # 图片无效、文件不存在或下载失败时跳过，不影响其他文章
+        logger.warning("处理文章%s的封面失败: %s", article.id, e)
+        return False
+
+
+def process_pending_covers(article_ids=None, force=False, batch_size=50):
+    """
+    处理尚未生成衍生图的文章封面，导入文章后或回填历史数据时调用
+
+    Args:
+        article_ids (list): 只处理这些文章，默认全部
+        force (bool): 已处理过的封面也重新生成
+        batch_size (int): 每处理多少篇提交一次
+
+    Returns:
+        tuple: (成功数, 失败数)
+    """
+    query = select(Article.id).where(Article.cover_image.isnot(None), Article.cover_image != '')
+    if not force:
+        query = query.where(Article.cover_variants.is_(None))
+    if article_ids:
+        query = query.where(Article.id.in_(article_ids))
+    ids = db.session.execute(query.order_by(Article.id)).scalars().all()
+
+    succeeded = failed = 0
+    for start in range(0, len(ids), batch_size):
+        for article in db.session.execute(
+            select(Article).where(Article.id.in_(ids[start:start + batch_size]))
+        ).scalars():
+            if process_article_cover(article):
+                succeeded += 1
+            else:
+                failed += 1
+        db.session.commit()
+    return succeeded, failed
@@ -1,7 +1,15 @@
+import hashlib
+import mmap
 import os
-import uuid
+import tempfile
+from contextlib import contextmanager
 from flask import current_app
-from werkzeug.utils import secure_filename
+
+from src.utils.tracing import traced
+
+# 进程的umask，导入时读取一次（os.umask只能先设置再恢复，运行中读取不是线程安全的）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 def allowed_file(filename, allowed_extensions=None):
     """
@@ -20,6 +28,112 @@ def allowed_file(filename, allowed_extensions=None):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
+class StoredFile:
+    """
+    按内容寻址保存的上传文件
+
+    Attributes:
+        path (str): 相对上传目录的路径，可直接传给get_file_url
+        absolute_path (str): 文件的绝对路径
+        sha256 (str): 文件内容的SHA-256
+        size (int): 文件字节数
+        deduplicated (bool): 相同内容的文件已存在，本次没有写入新文件
+    """
+
+    def __init__(self, path, absolute_path, sha256, size, deduplicated):
+        self.path = path
+        self.absolute_path = absolute_path
+        self.sha256 = sha256
+        self.size = size
+        self.deduplicated = deduplicated
+
+    @contextmanager
+    def open_buffer(self):
+        """
+        以只读mmap打开文件，供语音识别等下游直接使用，不把文件整体读入内存
+
+        Yields:
+            mmap.mmap: 文件内容，空文件时为b''
+        """
+        if self.size == 0:
+            yield b''
+            return
+        with open(self.absolute_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield buffer
+
+
+@traced('file.save')
+def store_upload(file, folder=None):
+    """
+    流式保存上传的文件，边写入边计算哈希，按内容寻址去重
+
+    文件分块写入目标目录下的临时文件，完成后以"哈希前两位/哈希.扩展名"命名；
+    相同内容的文件已存在时丢弃临时文件，重复上传不占用额外的磁盘空间。
+
+    Args:
+        file: 文件对象
+        folder (str): 子文件夹名
+
+    Returns:
+        StoredFile: 保存结果
+    """
+    # 扩展名取自原始文件名：secure_filename会去掉非ASCII字符，"录音.mp3"只剩"mp3"；
+    # 扩展名已由allowed_file校验，这里只保留字母数字，不让它影响保存路径
+    filename = file.filename or ''
+    extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    if not (extension.isascii() and extension.isalnum()):
+        extension = ''
+    chunk_size = current_app.config.get('UPLOAD_CHUNK_SIZE', 64 * 1024)
+
+    # 确定保存路径
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    save_path = os.path.join(upload_folder, folder) if folder else upload_folder
+
+    # 确保目录存在
+    os.makedirs(save_path, exist_ok=True)
+
+    # 写入临时文件，同时计算哈希
+    digest = hashlib.sha256()
+    size = 0
+    stream = getattr(file, 'stream', file)
+    with tempfile.NamedTemporaryFile(dir=save_path, prefix='.upload-', delete=False) as temp:
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            temp.close()
+            os.unlink(temp.name)
+            raise
+
+    sha256 = digest.hexdigest()
+    unique_filename = f"{sha256}.{extension}" if extension else sha256
+    relative_path = os.path.join(sha256[:2], unique_filename)
+    file_path = os.path.join(save_path, relative_path)
+
+    deduplicated = os.path.exists(file_path)
+    if deduplicated:
+        os.unlink(temp.name)
+    else:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # 临时文件创建时为0600，改为普通文件的权限，nginx等以其他用户运行的服务器才能读取
+        os.chmod(temp.name, 0o666 & ~_UMASK)
+        # 同名即同内容，并发上传同一文件时原子替换也是安全的
+        os.replace(temp.name, file_path)
+
+    return StoredFile(
+        os.path.join(folder, relative_path) if folder else relative_path,
+        os.path.abspath(file_path),
+        sha256,
+        size,
+        deduplicated
+    )
+
 def save_file(file, folder=None):
     """
     保存上传的文件
@@ -31,26 +145,19 @@ def save_file(file, folder=None):
     Returns:
         str: 保存后的文件路径
     """
-    filename = secure_filename(file.filename)
-    # 使用UUID生成唯一文件名
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-    
-    # 确定保存路径
+    return store_upload(file, folder).path
+
+def get_upload_url_path():
+    """
+    获取上传文件URL中、文件相对路径之前的部分（不含BASE_URL）
+
+    Returns:
+        str: 如 /static/uploads
+    """
     upload_folder = current_app.config['UPLOAD_FOLDER']
-    if folder:
-        save_path = os.path.join(upload_folder, folder)
-    else:
-        save_path = upload_folder
-        
-    # 确保目录存在
-    os.makedirs(save_path, exist_ok=True)
-    
-    # 保存文件
-    file_path = os.path.join(save_path, unique_filename)
-    file.save(file_path)
-    
-    # 返回相对路径
-    return os.path.join(folder, unique_filename) if folder else unique_filename
+    if upload_folder.startswith('static/'):
+        return upload_folder.replace('static/', '/static/', 1)
+    return f"/static/{upload_folder}"
 
 def get_file_url(file_path):
     """
@@ -66,10 +173,4 @@ def get_file_url(file_path):
     if base_url.endswith('/'):
         base_url = base_url[:-1]
         
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    if upload_folder.startswith('static/'):
-        upload_url = upload_folder.replace('static/', '/static/', 1)
-    else:
-        upload_url = f"/static/{upload_folder}"
-        
-    return f"{base_url}{upload_url}/{file_path}" 
\ No newline at end of file
+    return f"{base_url}{get_upload_url_path()}/{file_path}" 
\ No newline at end of file
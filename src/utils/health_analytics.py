@@ -0,0 +1,320 @@
+import logging
+import math
+import time
+from datetime import datetime
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.extensions.database import db
+from src.extensions.metrics import record_cache
+from src.models.health import HealthDatapointRollup, HealthStats
+from src.utils.health_data import METRICS, align, to_ts
+from src.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+# 每个指标最多返回的异常提醒条数（最近的）
+MAX_ALERTS = 20
+
+# 每周变化量不超过平均值的该比例时，趋势视为平稳
+FLAT_TREND_RATIO = 0.005
+
+
+def _load_daily(user_ids, start, end):
+    """
+    读取按天的预聚合，按(用户, 指标, 日期)排序后转为NumPy列
+
+    Returns:
+        dict: 各列的数组，没有数据时为None
+    """
+    rollup = HealthDatapointRollup
+    rows = db.session.execute(
+        select(
+            rollup.user_id, rollup.metric, rollup.bucket_start, rollup.value_count,
+            rollup.value_sum, rollup.value_min, rollup.value_max,
+            rollup.value2_sum, rollup.value2_min, rollup.value2_max
+        ).where(
+            rollup.user_id.in_(user_ids), rollup.resolution == DAY,
+            rollup.bucket_start >= start, rollup.bucket_start < end
+        ).order_by(rollup.user_id, rollup.metric, rollup.bucket_start)
+    ).all()
+    if not rows:
+        return None
+
+    user_id, metric, bucket, count, *values = zip(*rows)
+    names, metric_code = np.unique(np.array(metric, dtype=object), return_inverse=True)
+    # None转换为NaN，单读数指标的第二组列全为NaN
+    total, low, high, total2, low2, high2 = (np.array(column, dtype=float) for column in values)
+    return {
+        'user_id': np.array(user_id, dtype=np.int64),
+        'names': names,
+        'metric': metric_code,
+        'bucket': np.array(bucket, dtype=np.int64),
+        'count': np.array(count, dtype=float),
+        'fields': ((total, low, high), (total2, low2, high2))
+    }
+
+
+def _normal_ranges(names):
+    """各指标两个读数的正常范围，形状为(指标数, 2, 2)，不检查的读数为(-inf, inf)"""
+    ranges = np.tile([-np.inf, np.inf], (len(names), 2, 1))
+    for index, name in enumerate(names):
+        for field_index, bounds in enumerate(METRICS.get(name, {}).get('normal') or ()):
+            ranges[index, field_index] = bounds
+    return ranges
+
+
+def _rolling_mean(total, count, position, window):
+    """
+    按记录数加权的滑动平均：每一行取同一序列中(日期-window, 日期]内的所有行
+
+    position为"序列号 * 间距 + 日期序号"，同一序列内递增，不同序列之间的间距大于窗口，
+    用searchsorted找到窗口左端，再用前缀和相减，不需要逐行循环。
+    """
+    left = np.searchsorted(position, position - (window - 1), side='left')
+    index = np.arange(len(position))
+    total_prefix = np.concatenate(([0.0], np.cumsum(total)))
+    count_prefix = np.concatenate(([0.0], np.cumsum(count)))
+    window_count = count_prefix[index + 1] - count_prefix[left]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (total_prefix[index + 1] - total_prefix[left]) / window_count
+
+
+def _trend_slopes(x, y, valid, starts):
+    """对每个序列的日均值做最小二乘直线拟合，返回每天的斜率，少于两天的序列为NaN"""
+    weight = valid.astype(float)
+    y = np.where(valid, y, 0.0)
+    n = np.add.reduceat(weight, starts)
+    sum_x = np.add.reduceat(weight * x, starts)
+    sum_y = np.add.reduceat(y, starts)
+    sum_xx = np.add.reduceat(weight * x * x, starts)
+    sum_xy = np.add.reduceat(x * y, starts)
+    denominator = n * sum_xx - sum_x * sum_x
+    slope = np.full(len(starts), np.nan)
+    np.divide(n * sum_xy - sum_x * sum_y, denominator, out=slope, where=denominator > 0)
+    return slope
+
+
+def _number(value, digits=2):
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else round(value, digits)
+
+
+@traced('health.stats')
+def compute_stats(user_ids, days=None, now=None):
+    """
+    计算用户最近days天各指标的统计结果
+
+    所有用户、所有指标的序列放在同一组NumPy数组中，用reduceat按序列分段计算，
+    计算量与数据行数成正比，没有逐行的Python循环；只有组装返回结果时按序列循环。
+
+    Args:
+        user_ids (list): 用户ID
+        days (int): 统计的天数，默认HEALTH_STATS_DAYS
+        now (datetime): 当前时间，默认datetime.now()
+
+    Returns:
+        dict: {用户ID: {指标: 统计结果}}，统计结果包括读数条数、有数据的天数、各读数的最新值、
+            平均值、最小值、最大值、每周变化量和趋势、按天的滑动平均，以及超出正常范围的日期
+    """
+    config = current_app.config
+    days = days or config.get('HEALTH_STATS_DAYS', 90)
+    rolling_days = config.get('HEALTH_STATS_ROLLING_DAYS', 7)
+    end = align(to_ts(now or datetime.now()), DAY) + DAY
+    start = end - days * DAY
+
+    result = {user_id: {} for user_id in user_ids}
+    daily = _load_daily(user_ids, start, end) if user_ids else None
+    if daily is None:
+        return result
+
+    # 按(用户, 指标)切分序列
+    user_id, metric, bucket, count = daily['user_id'], daily['metric'], daily['bucket'], daily['count']
+    boundary = (user_id[1:] != user_id[:-1]) | (metric[1:] != metric[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(boundary) + 1))
+    ends = np.concatenate((starts[1:], [len(bucket)])) - 1
+    series_of_row = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(bucket))))
+
+    day_index = ((bucket - start) // DAY).astype(float)
+    position = series_of_row * (days + rolling_days + 1) + day_index
+    dates = np.datetime_as_string(bucket.astype('datetime64[s]'), unit='D')
+
+    normal = _normal_ranges(daily['names'])
+
+    field_results = []
+    alert_rows = []
+    for field_index, (total, low, high) in enumerate(daily['fields']):
+        valid = ~np.isnan(total)
+        field_count = np.where(valid, count, 0.0)
+        safe_total = np.where(valid, total, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            average = safe_total / field_count
+            mean = np.add.reduceat(safe_total, starts) / np.add.reduceat(field_count, starts)
+        rolling = _rolling_mean(safe_total, field_count, position, rolling_days)
+        slope = _trend_slopes(day_index, average, valid, starts)
+        field_results.append({
+            'valid': np.add.reduceat(valid.astype(int), starts) > 0,
+            'latest': average[ends],
+            'mean': mean,
+            'min': np.fmin.reduceat(low, starts),
+            'max': np.fmax.reduceat(high, starts),
+            'slope': slope * 7,
+            'rolling': np.round(rolling, 2)
+        })
+
+        # 当天读数的最大值高于正常上限或最小值低于正常下限
+        lower, upper = normal[metric, field_index, 0], normal[metric, field_index, 1]
+        too_high = valid & (high > upper)
+        too_low = valid & (low < lower)
+        for kind, mask, values in (('high', too_high, high), ('low', too_low, low)):
+            rows = np.flatnonzero(mask)
+            alert_rows.append((rows, field_index, kind, values[rows]))
+
+    # 按序列收集异常提醒
+    alerts_by_series = {}
+    for rows, field_index, kind, values in alert_rows:
+        for row, series, value in zip(rows.tolist(), series_of_row[rows].tolist(), values.tolist()):
+            alerts_by_series.setdefault(series, []).append((row, field_index, kind, value))
+
+    total_count = np.add.reduceat(count, starts)
+    for series, (first, last) in enumerate(zip(starts.tolist(), ends.tolist())):
+        name = daily['names'][metric[first]]
+        spec = METRICS.get(name)
+        if spec is None:
+            continue
+        fields = {}
+        for field_index, field in enumerate(spec['fields']):
+            stats = field_results[field_index]
+            if not stats['valid'][series]:
+                continue
+            weekly = _number(stats['slope'][series], 3)
+            mean = _number(stats['mean'][series])
+            if weekly is None:
+                trend = None
+            elif abs(weekly) <= FLAT_TREND_RATIO * abs(mean or 0):
+                trend = 'flat'
+            else:
+                trend = 'up' if weekly > 0 else 'down'
+            fields[field] = {
+                'latest': _number(stats['latest'][series]),
+                'mean': mean,
+                'min': _number(stats['min'][series]),
+                'max': _number(stats['max'][series]),
+                'weekly_change': weekly,
+                'trend': trend,
+                'rolling': [None if math.isnan(value) else value
+                            for value in stats['rolling'][first:last + 1].tolist()]
+            }
+
+        alerts = sorted(alerts_by_series.get(series, []))
+        result[int(user_id[first])][name] = {
+            'count': int(total_count[series]),
+            'days': last - first + 1,
+            'first': str(dates[first]),
+            'last': str(dates[last]),
+            'dates': dates[first:last + 1].tolist(),
+            'fields': fields,
+            'alert_days': len({row for row, _, _, _ in alerts}),
+            'alerts': [
+                {'date': str(dates[row]), 'field': spec['fields'][field_index], 'kind': kind, 'value': _number(value)}
+                for row, field_index, kind, value in alerts[-MAX_ALERTS:]
+            ]
+        }
+    return result
+
+
+def _save_stats(rows):
+    """写入统计结果缓存，rows为HealthStats的列值，已有的行先删除（不提交事务）"""
+    if not rows:
+        return
+    db.session.execute(delete(HealthStats).where(HealthStats.user_id.in_([row['user_id'] for row in rows])))
+    db.session.execute(insert(HealthStats), rows)
+
+
+def get_user_stats(user_id, days=None):
+    """
+    获取用户的统计结果，默认天数的结果使用缓存
+
+    缓存在写入新数据点时删除，不是当天计算的（统计窗口已经移动）重新计算。
+
+    Args:
+        user_id (int): 用户ID
+        days (int): 统计的天数，默认HEALTH_STATS_DAYS，其他天数每次重新计算
+
+    Returns:
+        dict: {指标: 统计结果}，格式见compute_stats
+    """
+    default_days = current_app.config.get('HEALTH_STATS_DAYS', 90)
+    days = days or default_days
+    now = datetime.now()
+    if days != default_days:
+        return compute_stats([user_id], days, now)[user_id]
+
+    cached = db.session.get(HealthStats, user_id)
+    hit = cached is not None and cached.days == days and cached.computed_at.date() == now.date()
+    record_cache('health_stats', hit)
+    if hit:
+        return cached.data
+
+    data = compute_stats([user_id], days, now)[user_id]
+    values = {'days': days, 'data': data, 'computed_at': now}
+    try:
+        result = db.session.execute(
+            update(HealthStats).where(HealthStats.user_id == user_id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(HealthStats).values(user_id=user_id, **values))
+        db.session.commit()
+    except IntegrityError:
+        # 并发请求刚写入了同一用户的结果
+        db.session.rollback()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("保存健康数据统计缓存失败: %s", e)
+    return data
+
+
+def refresh_all_stats(days=None, batch_size=None):
+    """
+    为统计窗口内有数据的所有用户重新计算统计结果，由夜间批处理调用
+
+    每批batch_size个用户读取一次预聚合、计算一次并提交一次。
+
+    Args:
+        days (int): 统计的天数，默认HEALTH_STATS_DAYS
+        batch_size (int): 每批的用户数，默认HEALTH_STATS_BATCH_USERS
+
+    Returns:
+        int: 计算的用户数
+    """
+    config = current_app.config
+    days = days or config.get('HEALTH_STATS_DAYS', 90)
+    batch_size = batch_size or config.get('HEALTH_STATS_BATCH_USERS', 500)
+    now = datetime.now()
+    start = align(to_ts(now), DAY) + DAY - days * DAY
+
+    user_ids = db.session.execute(
+        select(HealthDatapointRollup.user_id).distinct()
+        .where(HealthDatapointRollup.resolution == DAY, HealthDatapointRollup.bucket_start >= start)
+        .order_by(HealthDatapointRollup.user_id)
+    ).scalars().all()
+
+    started = time.perf_counter()
+    for offset in range(0, len(user_ids), batch_size):
+        batch = user_ids[offset:offset + batch_size]
+        stats = compute_stats(batch, days, now)
+        _save_stats([
+            {'user_id': user_id, 'days': days, 'data': data, 'computed_at': now}
+            for user_id, data in stats.items()
+        ])
+        db.session.commit()
+        logger.info("已计算%d/%d个用户的健康数据统计", offset + len(batch), len(user_ids))
+
+    logger.info("健康数据统计完成: %d个用户，耗时%.1f秒", len(user_ids), time.perf_counter() - started)
+    return len(user_ids)
@@ -0,0 +1,414 @@
+import calendar
+import logging
+import math
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, literal, literal_column, select, tuple_
+
+from src.extensions.database import db
+from src.models.health import HealthDatapoint, HealthDatapointRollup, HealthStats
+from src.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# 支持的指标：字段名（一个或两个读数）、各读数的合理范围（超出视为无效数据）、
+# 各读数的正常范围（超出时生成提醒，None表示不检查）、默认图表中保留的小数位数
+METRICS = {
+    'weight': {'fields': ('value',), 'ranges': ((1, 500),), 'normal': None, 'precision': 1},
+    'blood_pressure': {'fields': ('systolic', 'diastolic'), 'ranges': ((30, 300), (20, 200)),
+                       'normal': ((90, 140), (60, 90)), 'precision': 0},
+    'blood_sugar': {'fields': ('value',), 'ranges': ((0.5, 50),), 'normal': ((3.9, 7.8),), 'precision': 1},
+    'heart_rate': {'fields': ('value',), 'ranges': ((20, 300),), 'normal': ((50, 100),), 'precision': 0},
+    'spo2': {'fields': ('value',), 'ranges': ((50, 100),), 'normal': ((95, 100),), 'precision': 0},
+    'temperature': {'fields': ('value',), 'ranges': ((30, 45),), 'normal': ((36, 37.3),), 'precision': 1},
+    'steps': {'fields': ('value',), 'ranges': ((0, 200000),), 'normal': None, 'precision': 0}
+}
+
+# GET /api/health/datapoints 不带metric参数时返回的指标
+DEFAULT_CHART_METRICS = ('weight', 'blood_pressure', 'blood_sugar')
+
+# 预聚合的粒度（秒），从细到粗
+ROLLUP_RESOLUTIONS = (3600, 86400)
+
+# 自动选择分桶间隔时的候选值（秒），超过最后一档时取整天数
+NICE_INTERVALS = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400)
+
+# 分桶对齐的起点：1970-01-05是周一，按周分桶时从周一开始，按天及更细的粒度不受影响
+BUCKET_ORIGIN = 4 * 86400
+
+# 同一次同步中两段受影响的时间相距不超过该值（秒）时合并为一次重算
+ROLLUP_MERGE_GAP = 7 * 86400
+
+# 最早接受的数据点时间（2000-01-01）：SQL中的取模对负数向零截断，与Python的align不一致，
+# 早于分桶起点的数据点会落入错误的分桶
+EARLIEST_TS = 946684800
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class DatapointError(ValueError):
+    """数据点或查询参数无效"""
+
+
+def to_ts(value):
+    """本地时间转换为数据点使用的秒数"""
+    return calendar.timegm(value.timetuple())
+
+
+def from_ts(ts):
+    """数据点使用的秒数转换为本地时间"""
+    return _EPOCH + timedelta(seconds=ts)
+
+
+def format_ts(ts):
+    return from_ts(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_timestamp(value):
+    """
+    解析时间：数字为Unix时间戳（秒或毫秒），字符串为ISO 8601格式，带时区的换算为本地时间
+
+    Returns:
+        int: 数据点使用的秒数
+
+    Raises:
+        DatapointError: 无法解析
+    """
+    if isinstance(value, bool):
+        raise DatapointError(f"无效的时间: {value}")
+    if isinstance(value, (int, float)):
+        seconds = value / 1000 if value > 1e11 else value
+        try:
+            return to_ts(datetime.fromtimestamp(seconds))
+        except (OverflowError, OSError, ValueError) as e:
+            raise DatapointError(f"无效的时间: {value}") from e
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.strip())
+        except ValueError as e:
+            raise DatapointError(f"无效的时间: {value}") from e
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return to_ts(parsed)
+    raise DatapointError(f"无效的时间: {value}")
+
+
+def _reading(item, field, bounds):
+    value = item.get(field)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise DatapointError(f"{field}必须为数字")
+    low, high = bounds
+    if not low <= value <= high:
+        raise DatapointError(f"{field}超出范围[{low}, {high}]")
+    return float(value)
+
+
+def normalize_point(item, now_ts=None):
+    """
+    校验并规范化一个数据点
+
+    Args:
+        item (dict): {"metric", "ts"（或"date"）, "value"}，血压为{"systolic", "diastolic"}，
+            也可用"value"/"value2"
+        now_ts (int): 当前时间，晚于它一天以上或早于EARLIEST_TS的数据点视为无效
+
+    Returns:
+        tuple: (metric, ts, value, value2)
+
+    Raises:
+        DatapointError: 数据点无效
+    """
+    if not isinstance(item, dict):
+        raise DatapointError("数据点必须为对象")
+    metric = item.get('metric')
+    spec = METRICS.get(metric)
+    if spec is None:
+        raise DatapointError(f"不支持的指标: {metric}")
+
+    raw_ts = item.get('ts', item.get('date'))
+    if raw_ts is None:
+        raise DatapointError("缺少时间")
+    ts = parse_timestamp(raw_ts)
+    now_ts = now_ts if now_ts is not None else to_ts(datetime.now())
+    if ts > now_ts + 86400:
+        raise DatapointError("时间晚于当前时间")
+    if ts < EARLIEST_TS:
+        raise DatapointError("时间早于2000-01-01")
+
+    fields = spec['fields']
+    if len(fields) == 2 and fields[0] not in item and 'value' in item:
+        item = {fields[0]: item.get('value'), fields[1]: item.get('value2')}
+    values = [_reading(item, field, bounds) for field, bounds in zip(fields, spec['ranges'])]
+    return metric, ts, values[0], values[1] if len(values) > 1 else None
+
+
+def _upsert_rows(rows, batch_size):
+    """按(user_id, metric, ts)写入数据点，已存在时覆盖读数"""
+    table = HealthDatapoint.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['user_id', 'metric', 'ts'],
+            set_={'value': statement.excluded.value, 'value2': statement.excluded.value2}
+        )
+    else:
+        statement = None
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if statement is not None:
+            db.session.execute(statement, batch)
+            continue
+        keys = [(row['user_id'], row['metric'], row['ts']) for row in batch]
+        db.session.execute(delete(table).where(tuple_(table.c.user_id, table.c.metric, table.c.ts).in_(keys)))
+        db.session.execute(insert(table), batch)
+
+
+def _bucket(column, interval):
+    # 常量直接写入SQL，SELECT和GROUP BY中的表达式完全相同，PostgreSQL才能识别为同一分组列
+    origin, interval = literal_column(str(int(BUCKET_ORIGIN))), literal_column(str(int(interval)))
+    return (column - (column - origin) % interval).label('bucket')
+
+
+def align(ts, interval):
+    """把时间向下对齐到分桶起点"""
+    return ts - (ts - BUCKET_ORIGIN) % interval
+
+
+def _merge_ranges(timestamps, size, max_gap=ROLLUP_MERGE_GAP):
+    """
+    把受影响的分桶合并为若干连续区间，相距较近的区间合并，减少重算语句的条数
+
+    Returns:
+        list: [(起点, 终点)]，左闭右开
+    """
+    ranges = []
+    for bucket in sorted({align(ts, size) for ts in timestamps}):
+        if ranges and bucket - ranges[-1][1] <= max_gap:
+            ranges[-1][1] = bucket + size
+        else:
+            ranges.append([bucket, bucket + size])
+    return [tuple(item) for item in ranges]
+
+
+def refresh_rollups(user_id, metric, timestamps):
+    """
+    重算包含这些时间的预聚合：小时聚合由原始数据点计算，天聚合由小时聚合计算
+
+    先删除区间内的聚合再整体重算，重复同步、覆盖读数后结果仍然正确。
+
+    Args:
+        user_id (int): 用户ID
+        metric (str): 指标
+        timestamps (iterable): 写入的数据点时间
+    """
+    point = HealthDatapoint
+    rollup = HealthDatapointRollup
+    source_resolution = None
+    for resolution in ROLLUP_RESOLUTIONS:
+        for start, end in _merge_ranges(timestamps, resolution):
+            db.session.execute(delete(rollup).where(
+                rollup.user_id == user_id, rollup.metric == metric, rollup.resolution == resolution,
+                rollup.bucket_start >= start, rollup.bucket_start < end
+            ))
+            if source_resolution is None:
+                bucket = _bucket(point.ts, resolution)
+                query = select(
+                    point.user_id, point.metric, literal(resolution), bucket,
+                    func.count(point.value), func.sum(point.value), func.min(point.value), func.max(point.value),
+                    func.sum(point.value2), func.min(point.value2), func.max(point.value2)
+                ).where(
+                    point.user_id == user_id, point.metric == metric, point.ts >= start, point.ts < end
+                ).group_by(point.user_id, point.metric, bucket)
+            else:
+                bucket = _bucket(rollup.bucket_start, resolution)
+                query = select(
+                    rollup.user_id, rollup.metric, literal(resolution), bucket,
+                    func.sum(rollup.value_count), func.sum(rollup.value_sum),
+                    func.min(rollup.value_min), func.max(rollup.value_max),
+                    func.sum(rollup.value2_sum), func.min(rollup.value2_min), func.max(rollup.value2_max)
+                ).where(
+                    rollup.user_id == user_id, rollup.metric == metric, rollup.resolution == source_resolution,
+                    rollup.bucket_start >= start, rollup.bucket_start < end
+                ).group_by(rollup.user_id, rollup.metric, bucket)
+            db.session.execute(insert(rollup).from_select([
+                'user_id', 'metric', 'resolution', 'bucket_start',
+                'value_count', 'value_sum', 'value_min', 'value_max', 'value2_sum', 'value2_min', 'value2_max'
+            ], query))
+        source_resolution = resolution
+
+
+def rebuild_rollups(user_id=None):
+    """
+    按原始数据点重建全部预聚合，用于导入历史数据后
+
+    Args:
+        user_id (int): 只重建该用户的，默认全部用户
+
+    Returns:
+        int: 重建的(用户, 指标)序列数
+    """
+    query = select(
+        HealthDatapoint.user_id, HealthDatapoint.metric, func.min(HealthDatapoint.ts), func.max(HealthDatapoint.ts)
+    ).group_by(HealthDatapoint.user_id, HealthDatapoint.metric)
+    if user_id is not None:
+        query = query.where(HealthDatapoint.user_id == user_id)
+    series = db.session.execute(query).all()
+    for series_user_id, metric, first, last in series:
+        # 首尾之间按合并间隔取点，整个区间合并为一次重算
+        refresh_rollups(series_user_id, metric, [*range(first, last, ROLLUP_MERGE_GAP), last])
+    return len(series)
+
+
+@traced('health.ingest')
+def ingest_datapoints(user_id, items):
+    """
+    批量写入设备同步的数据点，更新预聚合并使该用户缓存的统计结果失效，由调用方提交事务
+
+    同一批次中同一指标同一时刻的数据点以最后一个为准，与已有数据点重复时覆盖。
+
+    Args:
+        user_id (int): 用户ID
+        items (list): 数据点，格式见normalize_point
+
+    Returns:
+        dict: {"accepted": 写入条数, "rejected": [{"index", "error"}]}
+    """
+    now_ts = to_ts(datetime.now())
+    points = {}
+    rejected = []
+    for index, item in enumerate(items):
+        try:
+            metric, ts, value, value2 = normalize_point(item, now_ts)
+        except DatapointError as e:
+            rejected.append({'index': index, 'error': str(e)})
+            continue
+        points[(metric, ts)] = {'user_id': user_id, 'metric': metric, 'ts': ts, 'value': value, 'value2': value2}
+
+    if points:
+        _upsert_rows(list(points.values()), current_app.config.get('DATAPOINT_INSERT_BATCH', 1000))
+        by_metric = {}
+        for metric, ts in points:
+            by_metric.setdefault(metric, []).append(ts)
+        for metric, timestamps in by_metric.items():
+            refresh_rollups(user_id, metric, timestamps)
+        # 缓存的统计结果随新数据失效，下次查询时重新计算
+        db.session.execute(delete(HealthStats).where(HealthStats.user_id == user_id))
+
+    return {'accepted': len(points), 'rejected': rejected}
+
+
+def choose_interval(start, end, max_buckets):
+    """
+    选择分桶间隔，使区间内的分桶数不超过max_buckets
+
+    Returns:
+        int: 间隔（秒）
+    """
+    needed = max(1, math.ceil((end - start) / max(1, max_buckets)))
+    for interval in NICE_INTERVALS:
+        if interval >= needed:
+            return interval
+    return math.ceil(needed / 86400) * 86400
+
+
+def _source_resolution(interval):
+    """能整除分桶间隔的最粗的预聚合粒度，没有时为None（读取原始数据点）"""
+    return next((resolution for resolution in reversed(ROLLUP_RESOLUTIONS) if interval % resolution == 0), None)
+
+
+@traced('health.series')
+def query_series(user_id, metric, start, end, interval):
+    """
+    按区间查询数据点并降采样，间隔为整小时或整天时读取预聚合
+
+    区间两端向外对齐到分桶边界，返回与[start, end)有交集的完整分桶，没有数据的分桶不返回。
+
+    Args:
+        user_id (int): 用户ID
+        metric (str): 指标
+        start (int): 起始时间（含）
+        end (int): 结束时间（不含）
+        interval (int): 分桶间隔（秒）
+
+    Returns:
+        list: [{"ts", "count", "sum", "avg", "min", "max"}]，两个读数的指标另有"avg2"、"min2"、"max2"
+    """
+    start = align(start, interval)
+    end = align(end - 1, interval) + interval
+    resolution = _source_resolution(interval)
+    if resolution is None:
+        table = HealthDatapoint
+        bucket = _bucket(table.ts, interval)
+        columns = (
+            func.count(table.value), func.sum(table.value), func.min(table.value), func.max(table.value),
+            func.sum(table.value2), func.min(table.value2), func.max(table.value2)
+        )
+        conditions = (table.ts >= start, table.ts < end)
+    else:
+        table = HealthDatapointRollup
+        bucket = _bucket(table.bucket_start, interval)
+        columns = (
+            func.sum(table.value_count), func.sum(table.value_sum),
+            func.min(table.value_min), func.max(table.value_max),
+            func.sum(table.value2_sum), func.min(table.value2_min), func.max(table.value2_max)
+        )
+        conditions = (table.resolution == resolution, table.bucket_start >= start, table.bucket_start < end)
+
+    rows = db.session.execute(
+        select(bucket, *columns)
+        .where(table.user_id == user_id, table.metric == metric, *conditions)
+        .group_by(bucket)
+        .order_by(bucket)
+    ).all()
+
+    two_values = len(METRICS[metric]['fields']) == 2
+    series = []
+    for bucket_start, count, total, low, high, total2, low2, high2 in rows:
+        entry = {
+            'ts': format_ts(bucket_start),
+            'count': count,
+            'sum': total,
+            'avg': total / count,
+            'min': low,
+            'max': high
+        }
+        if two_values:
+            entry.update({'avg2': total2 / count if total2 is not None else None, 'min2': low2, 'max2': high2})
+        series.append(entry)
+    return series
+
+
+def _round(value, precision):
+    if value is None:
+        return None
+    return int(round(value)) if precision == 0 else round(value, precision)
+
+
+def default_chart(user_id, days):
+    """
+    首页图表数据：最近days天各指标的日均值，格式与原模拟数据相同
+
+    Returns:
+        dict: {"weight": [{"date", "value"}], "blood_pressure": [{"date", "systolic", "diastolic"}], ...}
+    """
+    end = align(to_ts(datetime.now()), 86400) + 86400
+    start = end - days * 86400
+    chart = {}
+    for metric in DEFAULT_CHART_METRICS:
+        spec = METRICS[metric]
+        fields = spec['fields']
+        entries = []
+        for bucket in query_series(user_id, metric, start, end, 86400):
+            entry = {'date': bucket['ts'][:10], fields[0]: _round(bucket['avg'], spec['precision'])}
+            if len(fields) == 2:
+                entry[fields[1]] = _round(bucket['avg2'], spec['precision'])
+            entries.append(entry)
+        chart[metric] = entries
+    return chart
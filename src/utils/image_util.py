@@ -0,0 +1,355 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from src.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# 头像缩略图的边长（像素）
+AVATAR_SIZES = (64, 128, 256)
+
+# 文章封面衍生图的宽度档位（像素）
+COVER_WIDTHS = (320, 640, 960, 1280)
+
+# 模糊占位图（LQIP）的宽度（像素）
+LQIP_WIDTH = 16
+
+# 输出格式：扩展名 -> (Pillow格式名, MIME类型)
+IMAGE_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpg': ('JPEG', 'image/jpeg')
+}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class InvalidImageError(ValueError):
+    """上传的内容不是可以处理的图片"""
+
+
+def get_image_executor():
+    """
+    获取当前进程的图片处理线程池，大小为IMAGE_WORKERS
+
+    Pillow在缩放和编码时释放GIL，多个尺寸和格式可以并行生成。
+
+    Returns:
+        ThreadPoolExecutor: 线程池
+    """
+    global _executor, _executor_pid
+
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=current_app.config.get('IMAGE_WORKERS', 4),
+                                               thread_name_prefix='image')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def hash_stream(stream, chunk_size=64 * 1024):
+    """
+    分块计算流的SHA-256，完成后回到起始位置
+
+    Args:
+        stream: 可seek的二进制流
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def load_image(stream, max_pixels=None):
+    """
+    解码并校验图片，按EXIF方向旋转，去掉EXIF等元数据
+
+    Args:
+        stream: 图片的二进制流
+        max_pixels (int): 允许的最大像素数，默认IMAGE_MAX_PIXELS
+
+    Returns:
+        PIL.Image.Image: RGB或RGBA图片
+
+    Raises:
+        InvalidImageError: 不是图片、图片损坏或尺寸过大
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    max_pixels = max_pixels or current_app.config.get('IMAGE_MAX_PIXELS', 40_000_000)
+    try:
+        image = Image.open(stream)
+        width, height = image.size
+        # 只读取了文件头，解码前先检查尺寸，防止解压炸弹
+        if width * height > max_pixels:
+            raise InvalidImageError(f"图片尺寸过大: {width}x{height}")
+        image.load()
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise InvalidImageError(f"无法解析图片: {e}") from e
+
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    mode = 'RGBA' if has_alpha else 'RGB'
+    # 重新构造图片，不带原图的EXIF、ICC等信息
+    clean = Image.new(mode, image.size)
+    clean.paste(image.convert(mode))
+    return clean
+
+
+def render_variant(image, size, extension, quality=None):
+    """
+    把图片居中裁成正方形并缩放到指定边长后编码
+
+    Args:
+        image (PIL.Image.Image): load_image返回的图片
+        size (int): 边长（像素），图片比它小时不放大
+        extension (str): 输出格式，IMAGE_FORMATS中的扩展名
+        quality (int): 编码质量，默认IMAGE_QUALITY
+
+    Returns:
+        bytes: 编码后的图片
+    """
+    from PIL import Image, ImageOps
+
+    quality = quality or current_app.config.get('IMAGE_QUALITY', 80)
+    fmt = IMAGE_FORMATS[extension][0]
+    side = min(size, *image.size)
+    variant = ImageOps.fit(image, (side, side), method=Image.LANCZOS)
+    if fmt == 'JPEG' and variant.mode == 'RGBA':
+        # JPEG不支持透明，铺在白色背景上
+        background = Image.new('RGB', variant.size, (255, 255, 255))
+        background.paste(variant, mask=variant.split()[3])
+        variant = background
+
+    output = io.BytesIO()
+    variant.save(output, fmt, quality=quality, optimize=fmt == 'JPEG', progressive=fmt == 'JPEG')
+    return output.getvalue()
+
+
+def render_width(image, width, extension, quality=None):
+    """
+    按宽度等比缩放后编码，图片比目标宽度窄时不放大
+
+    Args:
+        image (PIL.Image.Image): load_image返回的图片
+        width (int): 目标宽度（像素）
+        extension (str): 输出格式，IMAGE_FORMATS中的扩展名
+        quality (int): 编码质量，默认IMAGE_QUALITY
+
+    Returns:
+        bytes: 编码后的图片
+    """
+    from PIL import Image
+
+    quality = quality or current_app.config.get('IMAGE_QUALITY', 80)
+    fmt = IMAGE_FORMATS[extension][0]
+    width = min(width, image.width)
+    height = max(1, round(image.height * width / image.width))
+    variant = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+    if fmt == 'JPEG' and variant.mode == 'RGBA':
+        background = Image.new('RGB', variant.size, (255, 255, 255))
+        background.paste(variant, mask=variant.split()[3])
+        variant = background
+
+    output = io.BytesIO()
+    variant.save(output, fmt, quality=quality, optimize=fmt == 'JPEG', progressive=fmt == 'JPEG')
+    return output.getvalue()
+
+
+def render_lqip(image):
+    """
+    生成模糊占位图，以data URI形式内嵌在接口数据中
+
+    Args:
+        image (PIL.Image.Image): load_image返回的图片
+
+    Returns:
+        str: data:image/webp;base64,...，通常只有几百字节
+    """
+    from PIL import ImageFilter
+
+    height = max(1, round(image.height * LQIP_WIDTH / image.width))
+    tiny = image.resize((LQIP_WIDTH, height)).filter(ImageFilter.GaussianBlur(1))
+    output = io.BytesIO()
+    tiny.save(output, 'WEBP', quality=40)
+    return 'data:image/webp;base64,' + base64.b64encode(output.getvalue()).decode('ascii')
+
+
+def variant_filename(size, extension):
+    return f"{size}.{extension}"
+
+
+def _write_variants(target_dir, jobs):
+    """
+    在线程池中并行生成并写入衍生图
+
+    Args:
+        target_dir (str): 输出目录
+        jobs (list): (文件名, 返回图片字节的函数)
+    """
+    os.makedirs(target_dir, exist_ok=True)
+
+    def write(name, render):
+        data = render()
+        # 先写临时文件再改名，读到的衍生图总是完整的
+        path = os.path.join(target_dir, name)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    executor = get_image_executor()
+    futures = [executor.submit(write, name, render) for name, render in jobs]
+    for future in futures:
+        future.result()
+
+
+@traced('image.avatar')
+def process_avatar(stream, folder='avatars'):
+    """
+    处理上传的头像：校验并重新编码，生成各尺寸的WebP和JPEG缩略图
+
+    缩略图保存在"folder/哈希前两位/哈希/"目录下，哈希为原图内容的SHA-256；
+    同一张图片再次上传时直接复用已有的缩略图。原图不保存。
+
+    Args:
+        stream: 上传文件的二进制流，需可seek
+        folder (str): 上传目录下的子目录
+
+    Returns:
+        str: 原图内容的SHA-256，用于定位缩略图
+
+    Raises:
+        InvalidImageError: 图片无效
+    """
+    image_hash = hash_stream(stream)
+    relative_dir = os.path.join(folder, image_hash[:2], image_hash)
+    target_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], relative_dir)
+    names = [variant_filename(size, extension) for size in AVATAR_SIZES for extension in IMAGE_FORMATS]
+    if all(os.path.exists(os.path.join(target_dir, name)) for name in names):
+        return image_hash
+
+    image = load_image(stream)
+    quality = current_app.config.get('IMAGE_QUALITY', 80)
+    _write_variants(target_dir, [
+        (variant_filename(size, extension),
+         lambda size=size, extension=extension: render_variant(image, size, extension, quality))
+        for size in AVATAR_SIZES for extension in IMAGE_FORMATS
+    ])
+    return image_hash
+
+
+def avatar_variant_path(image_hash, size, extension, folder='avatars'):
+    """
+    获取不小于所需尺寸的最小缩略图的相对路径
+
+    Args:
+        image_hash (str): process_avatar返回的哈希
+        size (int): 需要的边长，超过最大尺寸时返回最大的缩略图
+        extension (str): IMAGE_FORMATS中的扩展名
+
+    Returns:
+        str: 相对上传目录的路径
+    """
+    chosen = next((candidate for candidate in AVATAR_SIZES if candidate >= size), AVATAR_SIZES[-1])
+    return os.path.join(folder, image_hash[:2], image_hash, variant_filename(chosen, extension))
+
+
+@traced('image.cover')
+def process_cover(stream, folder='covers'):
+    """
+    处理文章封面：按COVER_WIDTHS生成等比缩放的WebP和JPEG衍生图，并生成模糊占位图
+
+    衍生图保存在"folder/哈希前两位/哈希/宽度.扩展名"，比原图宽的档位不生成。
+
+    Args:
+        stream: 封面图片的二进制流，需可seek
+        folder (str): 上传目录下的子目录
+
+    Returns:
+        dict: {"hash", "width", "height", "widths", "lqip"}，保存到Article.cover_variants
+
+    Raises:
+        InvalidImageError: 图片无效
+    """
+    image_hash = hash_stream(stream)
+    image = load_image(stream)
+    # 至少保留一个档位；原图比最小档位还窄时按原图宽度输出
+    widths = [width for width in COVER_WIDTHS if width < image.width] + [min(image.width, COVER_WIDTHS[-1])]
+    widths = sorted(set(widths))
+
+    target_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], folder, image_hash[:2], image_hash)
+    quality = current_app.config.get('IMAGE_QUALITY', 80)
+    jobs = [
+        (variant_filename(width, extension),
+         lambda width=width, extension=extension: render_width(image, width, extension, quality))
+        for width in widths for extension in IMAGE_FORMATS
+        if not os.path.exists(os.path.join(target_dir, variant_filename(width, extension)))
+    ]
+    if jobs:
+        _write_variants(target_dir, jobs)
+
+    return {
+        'hash': image_hash,
+        'width': image.width,
+        'height': image.height,
+        'widths': widths,
+        'lqip': render_lqip(image)
+    }
+
+
+def cover_variant_path(image_hash, width, extension, folder='covers'):
+    """
+    获取封面衍生图的相对路径
+
+    Returns:
+        str: 相对上传目录的路径
+    """
+    return os.path.join(folder, image_hash[:2], image_hash, variant_filename(width, extension))
+
+
+def open_image_source(source):
+    """
+    打开封面等图片来源：本服务上传目录的URL映射为本地文件，其他http(s)地址下载到内存，
+    其余按本地路径处理
+
+    Args:
+        source (str): 图片URL或路径
+
+    Returns:
+        二进制流，调用方负责关闭
+    """
+    from src.utils.file_util import get_file_url
+
+    upload_prefix = get_file_url('')
+    if source.startswith(upload_prefix):
+        return open(os.path.join(current_app.config['UPLOAD_FOLDER'], source[len(upload_prefix):]), 'rb')
+
+    if source.startswith(('http://', 'https://')):
+        import requests
+
+        max_bytes = current_app.config.get('MAX_CONTENT_LENGTH') or 16 * 1024 * 1024
+        buffer = io.BytesIO()
+        with requests.get(source, stream=True, timeout=(5, 30)) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(64 * 1024):
+                buffer.write(chunk)
+                if buffer.tell() > max_bytes:
+                    raise InvalidImageError(f"图片超过{max_bytes}字节: {source}")
+        buffer.seek(0)
+        return buffer
+
+    return open(source, 'rb')
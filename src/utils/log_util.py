@@ -0,0 +1,176 @@
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# 文本格式日志
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 需要脱敏的字段名（小写）
+SENSITIVE_KEYS = {
+    'password', 'confirmpassword', 'newpassword', 'oldpassword', 'password_hash',
+    'token', 'refreshtoken', 'access_token', 'refresh_token', 'verifycode',
+    'authorization', 'api_key', 'api_secret'
+}
+
+REDACTED = '***'
+
+# LogRecord自带的属性，其余属性视为通过extra传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_queue_handler = None
+_listener = None
+
+
+def redact(value):
+    """
+    递归地将字典中的敏感字段替换为***
+
+    Args:
+        value (Any): 日志参数
+
+    Returns:
+        Any: 脱敏后的副本，非容器类型原样返回
+    """
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in SENSITIVE_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    """对日志参数和extra字段中的敏感信息脱敏"""
+
+    def filter(self, record):
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        elif record.args:
+            record.args = tuple(redact(arg) for arg in record.args)
+
+        for key, value in list(record.__dict__.items()):
+            if key in _RECORD_ATTRS:
+                continue
+            record.__dict__[key] = REDACTED if key.lower() in SENSITIVE_KEYS else redact(value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """将日志记录格式化为单行JSON，extra传入的字段作为顶层字段输出"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    只把日志记录放入队列的处理器
+
+    标准QueueHandler会在调用线程中格式化消息；这里只把异常堆栈转成文本，
+    消息拼接和JSON序列化都交给后台线程完成，请求线程只付出一次入队的开销。
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_log_levels(value):
+    """
+    解析按模块设置的日志级别
+
+    Args:
+        value (str | dict): 形如 "sqlalchemy.engine=WARNING,src.routes.auth=DEBUG"
+
+    Returns:
+        dict: 日志记录器名称到级别的映射
+    """
+    if isinstance(value, dict):
+        return value
+    levels = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(app):
+    """
+    配置应用日志
+
+    根记录器已有处理器时（宿主程序已配置或重复创建应用）只更新级别，不重复添加处理器。
+    LOG_ASYNC开启时，日志经队列由后台线程写出，请求线程不会阻塞在I/O上。
+    """
+    global _queue_handler, _listener
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    for name, level in parse_log_levels(app.config.get('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level)
+
+    if root_logger.handlers:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    if app.config.get('LOG_ASYNC', True):
+        log_queue = queue.SimpleQueue()
+        handler = _queue_handler = DeferredQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = stream_handler
+
+    handler.addFilter(RedactingFilter())
+    root_logger.addHandler(handler)
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener_after_fork():
+    # 后台线程不会被fork复制（如gunicorn preload），子进程中需要重新启动
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(_stop_listener)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,204 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# 管理员令牌请求头及按请求开启cProfile的请求头
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+PROFILE_HEADER = 'X-Profile'
+
+_app_config = {}
+_sampling_lock = threading.Lock()
+
+
+def _frame_label(code):
+    path = code.co_filename
+    cwd = os.getcwd()
+    if path.startswith(cwd + os.sep):
+        path = os.path.relpath(path, cwd)
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    采样分析器
+
+    按固定间隔读取进程内所有线程的调用栈（sys._current_frames），不插桩、开销与
+    采样频率成正比。结果为折叠栈格式（每行"帧;帧;帧 次数"），可直接交给
+    flamegraph.pl或speedscope生成火焰图。
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+
+    def run(self, duration):
+        """
+        在当前线程中采样duration秒
+
+        Args:
+            duration (float): 采样时长（秒）
+
+        Returns:
+            str: 折叠栈文本
+        """
+        own_thread = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        return self.collapsed()
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def get_output_dir():
+    """获取分析结果目录，不存在时创建"""
+    path = _app_config.get('PROFILER_OUTPUT_DIR', 'profiles')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def start_sampling(duration=None, interval=None):
+    """
+    在后台线程中对当前worker采样，结果写入PROFILER_OUTPUT_DIR
+
+    Args:
+        duration (float): 采样时长（秒），默认PROFILER_DEFAULT_SECONDS
+        interval (float): 采样间隔（秒），默认PROFILER_SAMPLE_INTERVAL
+
+    Returns:
+        str | None: 结果文件名；已有采样在进行时返回None
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        return None
+
+    duration = min(float(duration or _app_config.get('PROFILER_DEFAULT_SECONDS', 10)),
+                   _app_config.get('PROFILER_MAX_SECONDS', 60))
+    interval = float(interval or _app_config.get('PROFILER_SAMPLE_INTERVAL', 0.005))
+    filename = f"sample_{os.getpid()}_{int(time.time())}.folded"
+    path = os.path.join(get_output_dir(), filename)
+
+    def run():
+        try:
+            profiler = SamplingProfiler(interval)
+            output = profiler.run(duration)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(output)
+            logger.info("采样分析完成: %s，共 %s 次采样", path, profiler.samples)
+        except Exception as e:
+            logger.error("采样分析失败: %s", e)
+        finally:
+            _sampling_lock.release()
+
+    threading.Thread(target=run, daemon=True, name='sampling-profiler').start()
+    logger.info("开始采样分析，pid=%s，时长 %s 秒", os.getpid(), duration)
+    return filename
+
+
+def _handle_signal(signum, frame):
+    start_sampling()
+
+
+def install_signal_handler():
+    """
+    注册采样分析的信号处理器（默认SIGUSR2），只能在主线程中调用
+
+    gunicorn worker启动时会重置信号处理器，需在post_worker_init钩子中再次调用
+    """
+    if not _app_config.get('PROFILER_ENABLED'):
+        return
+    signal_name = _app_config.get('PROFILER_SIGNAL', 'SIGUSR2')
+    signum = getattr(signal, signal_name, None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return
+    signal.signal(signum, _handle_signal)
+
+
+def is_admin_request():
+    """
+    检查请求是否携带正确的管理员令牌
+
+    Returns:
+        bool: 分析功能已开启且令牌正确
+    """
+    expected = _app_config.get('PROFILER_ADMIN_TOKEN')
+    provided = request.headers.get(ADMIN_TOKEN_HEADER, '')
+    return bool(_app_config.get('PROFILER_ENABLED') and expected) and \
+        hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8'))
+
+
+def format_stats(path, limit=50):
+    """
+    将cProfile结果文件格式化为按累计耗时排序的文本
+
+    Args:
+        path (str): .prof文件路径
+        limit (int): 输出的函数数
+
+    Returns:
+        str: pstats文本
+    """
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+def _start_request_profile():
+    if request.headers.get(PROFILE_HEADER) and is_admin_request():
+        g.profile = cProfile.Profile()
+        g.profile.enable()
+
+
+def _finish_request_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile.disable()
+    filename = f"request_{os.getpid()}_{int(time.time() * 1000)}.prof"
+    profile.dump_stats(os.path.join(get_output_dir(), filename))
+    response.headers['X-Profile-File'] = filename
+    return response
+
+
+def setup_profiler(app):
+    """
+    配置性能分析
+
+    PROFILER_ENABLED开启后：向worker发送信号或调用/api/admin/profile接口触发采样分析；
+    请求携带X-Profile头和正确的X-Admin-Token时，该请求在cProfile下执行，
+    结果文件名通过X-Profile-File响应头返回。钩子注册在应用上，覆盖所有蓝图。
+    """
+    _app_config.clear()
+    _app_config.update({key: value for key, value in app.config.items() if key.startswith('PROFILER_')})
+    if not app.config.get('PROFILER_ENABLED'):
+        return
+
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
+    install_signal_handler()
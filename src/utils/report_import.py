@@ -0,0 +1,312 @@
+import csv
+import json
+import logging
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from src.extensions.database import db
+from src.models.health import HealthReport, HealthReportItem
+from src.models.user import User
+from src.utils.report_values import item_status, parse_item, report_status
+from src.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# 报告的字段及最大长度，None表示不限
+REPORT_FIELDS = {
+    'title': 100,
+    'summary': 200,
+    'doctor': 50,
+    'hospital': 100,
+    'suggestion': None,
+    'status': 20
+}
+
+# 报告项目的字段及最大长度
+ITEM_FIELDS = {
+    'name': 50,
+    'value': 50,
+    'reference': 50,
+    'status': 20
+}
+
+# CSV中报告项目的列名前缀：item_name、item_value等
+CSV_ITEM_PREFIX = 'item_'
+
+
+class ReportImportError(ValueError):
+    """导入的报告无效"""
+
+
+def read_ndjson(lines):
+    """
+    逐行解析NDJSON，每行一份报告
+
+    Yields:
+        tuple: (行号, 报告, 错误信息)，解析失败时报告为None
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line), None
+        except ValueError as e:
+            yield number, None, f"JSON格式错误: {e}"
+
+
+def read_csv(lines):
+    """
+    逐行解析CSV，每行一个报告项目，report_key相同的相邻行属于同一份报告
+
+    报告的列为user_id或account、title、summary等，项目的列为item_name、item_value、
+    item_reference、item_status；没有report_key列时每行是一份报告。
+
+    Yields:
+        tuple: (报告第一行的行号, 报告, 错误信息)
+    """
+    reader = csv.DictReader(lines)
+    record = key = first_line = None
+    for row in reader:
+        number = reader.line_num
+        row_key = row.get('report_key') or f"line-{number}"
+        if record is not None and row_key != key:
+            yield first_line, record, None
+            record = None
+        if record is None:
+            record = {
+                name: value for name, value in row.items()
+                if name and not name.startswith(CSV_ITEM_PREFIX) and name != 'report_key' and value not in (None, '')
+            }
+            record['items'] = []
+            key, first_line = row_key, number
+        if row.get(f"{CSV_ITEM_PREFIX}name"):
+            record['items'].append({field: row.get(f"{CSV_ITEM_PREFIX}{field}") for field in ITEM_FIELDS})
+    if record is not None:
+        yield first_line, record, None
+
+
+def _text(data, field, max_length, required=False):
+    value = data.get(field)
+    if value is None or value == '':
+        if required:
+            raise ReportImportError(f"缺少{field}")
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        raise ReportImportError(f"{field}必须为字符串")
+    value = value.strip()
+    if max_length and len(value) > max_length:
+        raise ReportImportError(f"{field}超过{max_length}个字符")
+    return value
+
+
+def validate_report(record, user_id=None, max_items=None):
+    """
+    校验并规范化一份导入的报告
+
+    Args:
+        record (dict): 报告，字段同POST /api/health/reports，另有user_id或account指定所属用户、
+            created_at（ISO 8601）指定报告时间
+        user_id (int): 指定时所有报告都属于该用户，记录中的user_id必须与之相同
+        max_items (int): 每份报告最多的项目数
+
+    Returns:
+        dict: 报告各列的值、items以及用于确定用户的user_id或account
+
+    Raises:
+        ReportImportError: 报告无效
+    """
+    if not isinstance(record, dict):
+        raise ReportImportError("报告必须为对象")
+
+    report = {field: _text(record, field, max_length, required=field == 'title')
+              for field, max_length in REPORT_FIELDS.items()}
+
+    created_at = record.get('created_at')
+    if created_at:
+        try:
+            report['created_at'] = datetime.fromisoformat(str(created_at).strip())
+        except ValueError as e:
+            raise ReportImportError(f"无效的created_at: {created_at}") from e
+        if report['created_at'].tzinfo is not None:
+            report['created_at'] = report['created_at'].astimezone().replace(tzinfo=None)
+    else:
+        report['created_at'] = datetime.now()
+
+    raw_user_id = record.get('user_id')
+    if raw_user_id not in (None, ''):
+        try:
+            report['user_id'] = int(raw_user_id)
+        except (TypeError, ValueError) as e:
+            raise ReportImportError(f"无效的user_id: {raw_user_id}") from e
+    if user_id is not None:
+        if report.get('user_id', user_id) != user_id:
+            raise ReportImportError("不能导入其他用户的报告")
+        report['user_id'] = user_id
+    elif 'user_id' not in report:
+        report['account'] = _text(record, 'account', 50)
+        if not report['account']:
+            raise ReportImportError("缺少user_id或account")
+
+    items = record.get('items') or []
+    if not isinstance(items, list):
+        raise ReportImportError("items必须为数组")
+    if max_items and len(items) > max_items:
+        raise ReportImportError(f"项目数超过{max_items}")
+    report['items'] = []
+    for index, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise ReportImportError(f"第{index}个项目必须为对象")
+        try:
+            cleaned = {field: _text(item, field, max_length, required=field == 'name')
+                       for field, max_length in ITEM_FIELDS.items()}
+        except ReportImportError as e:
+            raise ReportImportError(f"第{index}个项目: {e}") from e
+        cleaned['value'] = cleaned['value'] or ''
+        cleaned['reference'] = cleaned['reference'] or ''
+        # 批量插入不经过ORM事件，数值列在这里解析；未指定状态时按数值判断
+        cleaned.update(parse_item(cleaned['value'], cleaned['reference']))
+        cleaned['status'] = cleaned['status'] or item_status(
+            cleaned['value_num'], cleaned['ref_low'], cleaned['ref_high']) or 'normal'
+        report['items'].append(cleaned)
+    report['status'] = report['status'] or report_status([item['status'] for item in report['items']])
+    return report
+
+
+def _item_row(item, report_id):
+    """报告项目对应的health_report_items行，包括解析出的数值列"""
+    return {'report_id': report_id, **item}
+
+
+class ImportResult:
+    """导入结果：成功的报告数和项目数、失败的报告数以及逐条错误"""
+
+    def __init__(self, max_errors):
+        self.reports = 0
+        self.items = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+
+    def fail(self, line, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'error': message})
+
+    def to_dict(self):
+        return {
+            'reports': self.reports,
+            'items': self.items,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'time_taken': round(time.perf_counter() - self.started, 3)
+        }
+
+
+def _flush(chunk, result):
+    """
+    在一个事务中写入一批报告：先批量确定用户，再用executemany插入报告和项目
+
+    Args:
+        chunk (list): [(行号, validate_report的结果)]
+        result (ImportResult): 导入结果
+    """
+    user_ids = {report['user_id'] for _, report in chunk if 'user_id' in report}
+    accounts = {report['account'] for _, report in chunk if 'account' in report}
+    known_ids = set(db.session.execute(select(User.id).where(User.id.in_(user_ids))).scalars()) if user_ids else set()
+    account_ids = dict(db.session.execute(
+        select(User.account, User.id).where(User.account.in_(accounts))
+    ).all()) if accounts else {}
+
+    lines, report_rows, items = [], [], []
+    for line, report in chunk:
+        user_id = account_ids.get(report['account']) if 'account' in report else report['user_id']
+        if user_id is None or ('account' not in report and user_id not in known_ids):
+            result.fail(line, "用户不存在")
+            continue
+        lines.append(line)
+        report_rows.append({
+            'user_id': user_id,
+            **{field: report[field] for field in REPORT_FIELDS},
+            'has_read': False,
+            'created_at': report['created_at']
+        })
+        items.append(report['items'])
+    if not report_rows:
+        return
+
+    try:
+        report_ids = db.session.execute(
+            insert(HealthReport).returning(HealthReport.id, sort_by_parameter_order=True), report_rows
+        ).scalars().all()
+        item_rows = [_item_row(item, report_id) for report_id, report_items in zip(report_ids, items)
+                     for item in report_items]
+        if item_rows:
+            db.session.execute(insert(HealthReportItem), item_rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("批量写入健康报告失败: %s", e)
+        for line in lines:
+            result.fail(line, "写入数据库失败")
+        return
+
+    result.reports += len(report_rows)
+    result.items += len(item_rows)
+
+
+@traced('health.import_reports')
+def import_reports(records, user_id=None, chunk_size=None):
+    """
+    流式导入健康报告：逐条校验，每chunk_size份报告批量写入并提交一次
+
+    无效的报告记录错误后跳过，不影响同一批中的其他报告；某一批写入数据库失败时只有该批报告失败。
+    遇到无法解码的内容时停止读取，已读取的报告照常写入，错误记录在errors中。
+
+    Args:
+        records (iterable): read_ndjson或read_csv产生的(行号, 报告, 错误信息)
+        user_id (int): 指定时所有报告都属于该用户
+        chunk_size (int): 每个事务写入的报告数，默认REPORT_IMPORT_CHUNK_SIZE
+
+    Returns:
+        dict: {"reports", "items", "failed", "errors": [{"line", "error"}], "errors_truncated", "time_taken"}
+    """
+    config = current_app.config
+    chunk_size = chunk_size or config.get('REPORT_IMPORT_CHUNK_SIZE', 500)
+    max_items = config.get('REPORT_IMPORT_MAX_ITEMS', 200)
+    result = ImportResult(config.get('REPORT_IMPORT_MAX_ERRORS', 1000))
+
+    chunk = []
+    records = iter(records)
+    line = 0
+    while True:
+        try:
+            line, record, error = next(records)
+        except StopIteration:
+            break
+        except UnicodeDecodeError:
+            # 请求体是边读边解码的，之前的批次可能已经提交：记录错误并停止读取，仍然返回已导入的结果
+            result.fail(line + 1, "此处之后的内容不是UTF-8编码，未导入")
+            break
+        if error is None:
+            try:
+                chunk.append((line, validate_report(record, user_id, max_items)))
+            except ReportImportError as e:
+                error = str(e)
+        if error is not None:
+            result.fail(line, error)
+        if len(chunk) >= chunk_size:
+            _flush(chunk, result)
+            chunk = []
+    if chunk:
+        _flush(chunk, result)
+
+    logger.info("健康报告导入完成: 成功%d份，失败%d份", result.reports, result.failed)
+    return result.to_dict()
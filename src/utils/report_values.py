@@ -0,0 +1,180 @@
+import logging
+import re
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, case, exists, or_, select, update
+
+from src.extensions.database import db
+from src.models.health import HealthReport, HealthReportItem
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = r'[-+]?\d+(?:\.\d+)?'
+# 单位以字母（含汉字）、%、µ或×开头，"135/85"、"3.9-6.1"、"1+"这类值不解析为数值
+_UNIT = r'(?:((?:[^\W\d_]|[%µμ×]).*?))?'
+# 值中表示偏高偏低的箭头，解析前去掉
+_ARROWS = re.compile(r'[↑↓]')
+
+# 区间参考值：3.9-6.1、3.9~6.1 mmol/L
+_RANGE = re.compile(rf'^\s*({_NUMBER})\s*(?:-|~|～|–|—|至|到)\s*({_NUMBER})\s*{_UNIT}\s*$')
+# 单侧参考值：<5.2、≥60
+_BOUND = re.compile(rf'^\s*(<=|>=|≤|≥|<|>|＜|＞)\s*({_NUMBER})\s*{_UNIT}\s*$')
+# 数值：5.6、5.6 mmol/L、<0.5
+_VALUE = re.compile(rf'^\s*(?:<=|>=|≤|≥|<|>|＜|＞)?\s*({_NUMBER})\s*{_UNIT}\s*$')
+
+_UPPER_BOUNDS = ('<=', '≤', '<', '＜')
+
+# 单位列的长度
+UNIT_MAX_LENGTH = 20
+
+# 有项目超出参考范围的报告状态
+ABNORMAL_REPORT_STATUS = 'warning'
+
+
+def _unit(text):
+    text = (text or '').strip()
+    return text if text and len(text) <= UNIT_MAX_LENGTH else None
+
+
+def parse_value(value):
+    """
+    解析项目值
+
+    Returns:
+        tuple: (数值, 单位)，不是单个数值时为(None, None)
+    """
+    match = _VALUE.match(_ARROWS.sub('', value or ''))
+    if not match:
+        return None, None
+    return float(match.group(1)), _unit(match.group(2))
+
+
+def parse_reference(reference):
+    """
+    解析参考范围
+
+    Returns:
+        tuple: (下限, 上限, 单位)，单侧范围缺少的一端为None，无法解析时全为None
+    """
+    reference = reference or ''
+    match = _RANGE.match(reference)
+    if match:
+        low, high = sorted((float(match.group(1)), float(match.group(2))))
+        return low, high, _unit(match.group(3))
+    match = _BOUND.match(reference)
+    if match:
+        bound = float(match.group(2))
+        if match.group(1) in _UPPER_BOUNDS:
+            return None, bound, _unit(match.group(3))
+        return bound, None, _unit(match.group(3))
+    return None, None, None
+
+
+def parse_item(value, reference):
+    """
+    把项目的值和参考范围解析为数值列
+
+    Returns:
+        dict: {"value_num", "ref_low", "ref_high", "unit"}，单位优先取值中的
+    """
+    value_num, value_unit = parse_value(value)
+    ref_low, ref_high, reference_unit = parse_reference(reference)
+    return {
+        'value_num': value_num,
+        'ref_low': ref_low,
+        'ref_high': ref_high,
+        'unit': value_unit or reference_unit
+    }
+
+
+def item_status(value_num, ref_low, ref_high):
+    """
+    按数值判断项目状态
+
+    Returns:
+        str: abnormal或normal，没有数值或参考范围时为None
+    """
+    if value_num is None or (ref_low is None and ref_high is None):
+        return None
+    if (ref_high is not None and value_num > ref_high) or (ref_low is not None and value_num < ref_low):
+        return 'abnormal'
+    return 'normal'
+
+
+def report_status(item_statuses):
+    """有异常项目的报告为ABNORMAL_REPORT_STATUS，否则为normal"""
+    return ABNORMAL_REPORT_STATUS if 'abnormal' in item_statuses else 'normal'
+
+
+def abnormal_condition(direction=None):
+    """
+    异常项目的查询条件
+
+    Args:
+        direction (str): high只查高于上限的，low只查低于下限的，默认两者以及状态为abnormal的
+
+    Returns:
+        SQL条件表达式
+    """
+    item = HealthReportItem
+    high = and_(item.ref_high.isnot(None), item.value_num > item.ref_high)
+    low = and_(item.ref_low.isnot(None), item.value_num < item.ref_low)
+    if direction == 'high':
+        return high
+    if direction == 'low':
+        return low
+    return or_(item.status == 'abnormal', high, low)
+
+
+def refresh_report_statuses(report_ids=None):
+    """
+    按项目重新计算报告状态，每份报告通过report_id索引查找是否存在异常项目（不提交事务）
+
+    Args:
+        report_ids (list): 只更新这些报告，默认全部
+
+    Returns:
+        int: 更新的报告数
+    """
+    has_abnormal = exists().where(HealthReportItem.report_id == HealthReport.id, abnormal_condition())
+    statement = update(HealthReport).values(
+        status=case((has_abnormal, ABNORMAL_REPORT_STATUS), else_='normal')
+    ).execution_options(synchronize_session=False)
+    if report_ids is not None:
+        statement = statement.where(HealthReport.id.in_(report_ids))
+    return db.session.execute(statement).rowcount
+
+
+def backfill_report_items(batch_size=None):
+    """
+    为已有的报告项目解析数值列，按id分批处理并提交，可以重复执行
+
+    Args:
+        batch_size (int): 每批的项目数，默认REPORT_ITEM_BACKFILL_BATCH
+
+    Returns:
+        int: 处理的项目数
+    """
+    batch_size = batch_size or current_app.config.get('REPORT_ITEM_BACKFILL_BATCH', 1000)
+    table = HealthReportItem.__table__
+    statement = update(table).where(table.c.id == bindparam('item_id')).values(
+        value_num=bindparam('value_num'), ref_low=bindparam('ref_low'),
+        ref_high=bindparam('ref_high'), unit=bindparam('unit')
+    )
+    last_id = 0
+    processed = 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.value, table.c.reference)
+            .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(statement, [
+            {'item_id': item_id, **parse_item(value, reference)} for item_id, value, reference in rows
+        ])
+        db.session.commit()
+        last_id = rows[-1][0]
+        processed += len(rows)
+        logger.info("已解析%d个报告项目", processed)
+    return processed
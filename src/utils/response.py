@@ -1,6 +1,8 @@
 from flask import jsonify, request
 from datetime import datetime
 
+from src.utils.tracing import get_request_id
+
 # 语言映射
 LANGUAGE_MESSAGES = {
     'zh-CN': {
@@ -26,7 +28,11 @@ LANGUAGE_MESSAGES = {
         'update_success': '更新成功',
         'login_success': '登录成功',
         'register_success': '注册成功',
-        'logout_success': '退出成功'
+        'logout_success': '退出成功',
+        'too_many_requests': '请求过于频繁，请稍后再试',
+        'forbidden': '没有权限执行此操作',
+        'not_found': '资源不存在',
+        'profile_in_progress': '已有性能分析正在进行'
     },
     'mn-MN': {
         'success': 'Амжилттай',
@@ -51,7 +57,11 @@ LANGUAGE_MESSAGES = {
         'update_success': 'Амжилттай шинэчлэгдсэн',
         'login_success': 'Амжилттай нэвтэрсэн',
         'register_success': 'Амжилттай бүртгүүлсэн',
-        'logout_success': 'Амжилттай гарсан'
+        'logout_success': 'Амжилттай гарсан',
+        'too_many_requests': 'Хэт олон хүсэлт илгээсэн байна, түр хүлээгээд дахин оролдоно уу',
+        'forbidden': 'Энэ үйлдлийг хийх эрхгүй байна',
+        'not_found': 'Нөөц олдсонгүй',
+        'profile_in_progress': 'Гүйцэтгэлийн шинжилгээ аль хэдийн явагдаж байна'
     }
 }
 
@@ -88,5 +98,6 @@ def api_response(code, message_key, data=None):
         "code": code,
         "message": get_message(message_key),
         "data": data,
-        "timestamp": int(datetime.now().timestamp() * 1000)
+        "timestamp": int(datetime.now().timestamp() * 1000),
+        "requestId": get_request_id()
     }) 
\ No newline at end of file
@@ -0,0 +1,358 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 客户端传入的请求ID只接受安全字符，避免注入响应头和日志
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,128}$')
+_TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+# SQL语句在span属性中保留的最大长度
+MAX_STATEMENT_LENGTH = 500
+
+# 当前线程/协程正在执行的span，用于确定子span的父级
+_current_span = contextvars.ContextVar('current_span', default=None)
+# 线程池任务所属的追踪，由bind_trace设置（工作线程中没有请求上下文，取不到g.trace）
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+_exporter = None
+_sample_rate = 1.0
+_server_timing = True
+_engine_listeners_installed = False
+
+
+class Span:
+    """一段计时的操作，字段与OpenTelemetry的span一致"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes',
+                 'start_ns', 'end_ns', 'error', 'kind')
+
+    # OpenTelemetry的SpanKind
+    KIND_INTERNAL = 1
+    KIND_SERVER = 2
+
+    def __init__(self, trace_id, name, parent_id=None, attributes=None, kind=KIND_INTERNAL):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self.kind = kind
+
+    def end(self):
+        self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class Trace:
+    """一个请求内收集的所有span"""
+
+    def __init__(self, trace_id, root, sampled):
+        self.trace_id = trace_id
+        self.root = root
+        self.sampled = sampled
+        self.spans = [root]
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class SpanExporter:
+    """
+    把span以OTLP/JSON格式写到文件或标准输出
+
+    每个请求输出一行ExportTraceServiceRequest，OpenTelemetry Collector的
+    otlpjsonfile接收器可以直接读取。写入由后台线程完成，不占用请求线程。
+    """
+
+    def __init__(self, target, service_name):
+        self.target = target
+        self.resource = {'attributes': [_otlp_attribute('service.name', service_name)]}
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        # 进程fork后后台线程不会被复制，按进程号懒启动
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.SimpleQueue()
+                    threading.Thread(target=self._run, args=(self._queue,), daemon=True,
+                                     name='span-exporter').start()
+                    self._pid = os.getpid()
+        self._queue.put(spans)
+
+    def _serialize(self, spans):
+        return json.dumps({
+            'resourceSpans': [{
+                'resource': self.resource,
+                'scopeSpans': [{
+                    'scope': {'name': 'nomad-health'},
+                    'spans': [span.to_otlp() for span in spans]
+                }]
+            }]
+        }, ensure_ascii=False)
+
+    def _run(self, span_queue):
+        stream = sys.stdout if self.target == 'stdout' else None
+        while True:
+            spans = span_queue.get()
+            try:
+                line = self._serialize(spans) + '\n'
+                if stream is not None:
+                    stream.write(line)
+                    stream.flush()
+                else:
+                    with open(self.target, 'a', encoding='utf-8') as f:
+                        f.write(line)
+            except Exception as e:
+                logger.warning("导出追踪数据失败: %s", e)
+
+
+def _active_trace():
+    trace = g.get('trace') if has_request_context() else None
+    return trace if trace is not None else _current_trace.get()
+
+
+def bind_trace(func):
+    """
+    把函数绑定到当前请求的追踪，用于提交到线程池的任务
+
+    任务中的span以提交时所在的span为父级，记录到同一个追踪里；不在请求中时原样返回函数。
+
+    Args:
+        func (callable): 在工作线程中执行的函数
+
+    Returns:
+        callable: 包装后的函数
+    """
+    trace = _active_trace()
+    if trace is None:
+        return func
+    parent = _current_span.get() or trace.root
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # 工作线程会被复用，执行完毕后恢复原值
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+    return wrapper
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    记录一段操作的耗时，在请求之外调用时不做任何事
+
+    Args:
+        name (str): span名称，点号前的部分作为Server-Timing中的分组名，如db.query归入db
+        **attributes: span属性
+    """
+    trace = _active_trace()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get() or trace.root
+    current = Span(trace.trace_id, name, parent.span_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = str(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+        trace.add(current)
+
+
+def traced(name):
+    """将整个函数调用记录为一个span的装饰器"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **{'code.function': func.__qualname__}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_request_id():
+    """
+    获取当前请求的ID
+
+    Returns:
+        str | None: 请求ID，不在请求上下文中时为None
+    """
+    if has_request_context():
+        return g.get('request_id')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _active_trace()
+    if trace is None:
+        return
+    parent = _current_span.get() or trace.root
+    conn.info.setdefault('trace_spans', []).append(Span(
+        trace.trace_id, 'db.query', parent.span_id,
+        {'db.system': conn.engine.dialect.name, 'db.statement': statement[:MAX_STATEMENT_LENGTH]}
+    ))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('trace_spans')
+    trace = _active_trace()
+    if spans and trace is not None:
+        current = spans.pop()
+        current.end()
+        trace.add(current)
+
+
+def _handle_db_error(exception_context):
+    spans = exception_context.connection.info.get('trace_spans') if exception_context.connection else None
+    trace = _active_trace()
+    if spans and trace is not None:
+        current = spans.pop()
+        current.error = str(exception_context.original_exception)
+        current.end()
+        trace.add(current)
+
+
+def _start_trace():
+    incoming_id = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming_id if _REQUEST_ID_PATTERN.match(incoming_id) else uuid.uuid4().hex
+
+    # 延续上游传入的W3C traceparent
+    match = _TRACEPARENT_PATTERN.match(request.headers.get('traceparent', ''))
+    trace_id, parent_id = (match.group(1), match.group(2)) if match else (uuid.uuid4().hex, None)
+
+    # 请求的根span是SERVER，延续上游traceparent时它的父级在上游服务中
+    root = Span(trace_id, f"{request.method} {request.path}", parent_id, {
+        'http.method': request.method,
+        'http.target': request.path,
+        'request.id': g.request_id
+    }, kind=Span.KIND_SERVER)
+    g.trace = Trace(trace_id, root, random.random() < _sample_rate)
+
+
+def _server_timing_header(trace):
+    totals = {}
+    for item in trace.spans[1:]:
+        if item.end_ns is None:
+            continue
+        group = item.name.split('.', 1)[0]
+        duration, count = totals.get(group, (0, 0))
+        totals[group] = (duration + item.duration_ms, count + 1)
+
+    entries = [f'{group};dur={duration:.1f};desc="{count}"' for group, (duration, count) in totals.items()]
+    entries.append(f"total;dur={trace.root.duration_ms:.1f}")
+    return ', '.join(entries)
+
+
+def _finish_trace(response):
+    trace = g.get('trace')
+    if trace is None:
+        return response
+
+    root = trace.root
+    if request.url_rule is not None:
+        root.name = f"{request.method} {request.url_rule.rule}"
+        root.attributes['http.route'] = request.url_rule.rule
+    root.attributes['http.status_code'] = response.status_code
+
+    response.headers['X-Request-ID'] = g.request_id
+    if response.is_streamed:
+        # 流式响应的内容在after_request之后才生成，其中线程池任务的span要等发送完毕再导出
+        response.call_on_close(lambda: _end_trace(trace))
+    else:
+        _end_trace(trace)
+    if _server_timing:
+        response.headers['Server-Timing'] = _server_timing_header(trace)
+    return response
+
+
+def _end_trace(trace):
+    trace.root.end()
+    if _exporter is not None and trace.sampled:
+        _exporter.export(list(trace.spans))
+
+
+def setup_tracing(app):
+    """
+    配置请求追踪
+
+    每个请求分配请求ID（优先沿用客户端的X-Request-ID），SQL执行及用traced/span
+    标记的操作记录为子span；响应附带X-Request-ID和Server-Timing头，
+    TRACE_EXPORTER为stdout或文件路径时按采样率导出span。
+    """
+    global _exporter, _sample_rate, _server_timing, _engine_listeners_installed
+
+    target = app.config.get('TRACE_EXPORTER') or 'none'
+    _exporter = None if target == 'none' else SpanExporter(target, app.config.get('TRACE_SERVICE_NAME', 'nomad-health'))
+    _sample_rate = app.config.get('TRACE_SAMPLE_RATE', 1.0)
+    _server_timing = app.config.get('SERVER_TIMING_ENABLED', True)
+
+    if not _engine_listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_db_error)
+        _engine_listeners_installed = True
+
+    app.before_request(_start_trace)
+    app.after_request(_finish_trace)
@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.extensions.database import db
+from src.extensions.metrics import record_cache
+from src.models.transcript import TranscriptCache
+
+logger = logging.getLogger(__name__)
+
+# 清理过期记录的间隔（秒）
+PURGE_INTERVAL = 3600
+
+_next_purge = 0
+_purge_lock = threading.Lock()
+
+
+def get_cached_transcript(audio_hash, audio_format, language):
+    """
+    查找未过期的识别结果
+
+    Args:
+        audio_hash (str): 音频内容的SHA-256
+        audio_format (str): 音频格式
+        language (str): 识别语言
+
+    Returns:
+        str: 识别文本，未命中时为None
+    """
+    text = db.session.execute(
+        select(TranscriptCache.text).where(
+            TranscriptCache.audio_hash == audio_hash,
+            TranscriptCache.audio_format == audio_format,
+            TranscriptCache.language == language,
+            TranscriptCache.expires_at > datetime.now()
+        )
+    ).scalar()
+    record_cache('transcript', text is not None)
+    return text
+
+
+def store_transcript(audio_hash, audio_format, language, text):
+    """
+    保存识别结果，已有记录（包括已过期的）时覆盖，有效期为TRANSCRIPT_CACHE_TTL秒
+
+    Args:
+        audio_hash (str): 音频内容的SHA-256
+        audio_format (str): 音频格式
+        language (str): 识别语言
+        text (str): 识别文本
+    """
+    ttl = current_app.config.get('TRANSCRIPT_CACHE_TTL', 7 * 24 * 3600)
+    if ttl <= 0:
+        return
+    now = datetime.now()
+    values = {'text': text, 'created_at': now, 'expires_at': now + timedelta(seconds=ttl)}
+    key = {'audio_hash': audio_hash, 'audio_format': audio_format, 'language': language}
+
+    try:
+        result = db.session.execute(
+            update(TranscriptCache).filter_by(**key).values(**values).execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.add(TranscriptCache(**key, **values))
+        db.session.commit()
+    except IntegrityError:
+        # 并发请求刚写入了同一条记录，结果相同，直接使用对方的
+        db.session.rollback()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("保存语音识别缓存失败: %s", e)
+        return
+
+    _purge_expired()
+
+
+def _purge_expired():
+    global _next_purge
+
+    now = time.time()
+    if now < _next_purge:
+        return
+    with _purge_lock:
+        if now < _next_purge:
+            return
+        _next_purge = now + PURGE_INTERVAL
+    try:
+        db.session.execute(delete(TranscriptCache).where(TranscriptCache.expires_at <= datetime.now()))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("清理过期的语音识别缓存失败: %s", e)
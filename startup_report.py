@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+启动性能报告：在全新的Python进程中多次导入并创建应用，统计导入耗时和冷启动耗时
+
+用法:
+    python startup_report.py --runs 5
+    python startup_report.py --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# 在子进程中执行的测量代码
+MEASURE_CODE = """
+import json, time
+started = time.perf_counter()
+from src.app import create_app
+app = create_app()
+result = dict(app.extensions['startup'])
+result['cold_start_ms'] = round((time.perf_counter() - started) * 1000, 1)
+print(json.dumps(result))
+"""
+
+def measure_once():
+    """启动一个新进程测量一次，返回各项耗时（毫秒）"""
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_CODE],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='应用启动性能报告')
+    parser.add_argument('--runs', type=int, default=5, help='测量次数')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+    args = parser.parse_args()
+    
+    runs = [measure_once() for _ in range(args.runs)]
+    report = {}
+    for key in ['import_ms', 'create_app_ms', 'cold_start_ms', 'process_ms']:
+        values = [run[key] for run in runs]
+        report[key] = {
+            'median': statistics.median(values),
+            'min': min(values),
+            'max': max(values)
+        }
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    
+    labels = {
+        'import_ms': '模块导入',
+        'create_app_ms': '创建应用',
+        'cold_start_ms': '导入+创建',
+        'process_ms': '进程总耗时'
+    }
+    print(f"启动耗时（{args.runs}次，单位毫秒）")
+    for key, label in labels.items():
+        stats = report[key]
+        print(f"  {label:<8} 中位数 {stats['median']:>8}  最小 {stats['min']:>8}  最大 {stats['max']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import upgrade
+from src.models.article import Article
+from src.utils.cover_util import process_pending_covers
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads')
+    })
+    with app.app_context():
+        upgrade()
+        yield app
+
+
+def add_article(cover_image):
+    article = Article(title='高血压的预防', content='内容', cover_image=cover_image)
+    db.session.add(article)
+    db.session.commit()
+    return article
+
+
+def test_cover_derivatives_and_lqip(app, tmp_path):
+    cover = tmp_path / 'cover.png'
+    Image.new('RGB', (1000, 500), (30, 120, 200)).save(cover)
+    article = add_article(str(cover))
+    broken = add_article(str(tmp_path / 'missing.jpg'))
+
+    assert process_pending_covers() == (1, 1)
+    db.session.refresh(article)
+    assert article.cover_variants['widths'] == [320, 640, 960, 1000]
+
+    data = app.test_client().get('/api/articles').get_json()['data']['articles']
+    item = next(entry for entry in data if entry['id'] == article.id)
+    assert item['cover_image'] == str(cover)
+    assert item['cover']['srcset'].count('w, ') == 3 and item['cover']['srcset'].endswith(' 1000w')
+    assert (item['cover']['width'], item['cover']['height']) == (1000, 500)
+    lqip = base64.b64decode(item['cover']['lqip'].split(',', 1)[1])
+    assert Image.open(io.BytesIO(lqip)).size == (16, 8)
+    assert next(entry for entry in data if entry['id'] == broken.id)['cover'] is None
+
+    variant = app.config['UPLOAD_FOLDER'] + '/' + item['cover']['srcset_webp'].split(' ')[0].split('/uploads/', 1)[1]
+    assert Image.open(variant).size == (320, 160)
+
+    # 更换封面后等待重新处理
+    article.cover_image = str(tmp_path / 'other.png')
+    db.session.commit()
+    assert article.cover_variants is None
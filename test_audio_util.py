@@ -0,0 +1,121 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import io
+import math
+import struct
+import time
+import wave
+
+import pytest
+
+from src.app import create_app
+from src.utils import audio_util
+from src.utils.audio_util import TARGET_RATE, prepare_audio, to_16bit
+
+
+def make_wav(seconds, rate=44100, channels=2, width=2, silence=0.5, frequency=440):
+    """前后各silence秒静音，中间为正弦波"""
+    scale = (1 << (8 * width - 1)) - 1
+    frames = bytearray()
+    total = int((seconds + 2 * silence) * rate)
+    for i in range(total):
+        t = i / rate
+        value = int(0.5 * scale * math.sin(2 * math.pi * frequency * t)) if silence <= t < silence + seconds else 0
+        sample = (value + 128 if width == 1 else value).to_bytes(4, 'little', signed=width != 1)[:width]
+        frames += sample * channels
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+    return output.getvalue()
+
+
+@pytest.fixture
+def app():
+    app = create_app({'TESTING': True, 'AUDIO_MAX_CHUNK_SECONDS': 1})
+    with app.app_context():
+        yield app
+
+
+def test_to_16bit_keeps_high_bytes():
+    assert to_16bit(struct.pack('<i', 0x12345678), 4) == struct.pack('<h', 0x1234)
+    assert to_16bit(b'\x00\x34\x12', 3) == struct.pack('<h', 0x1234)
+    assert to_16bit(bytes([128, 255]), 1) == struct.pack('<hh', 0, 127 << 8)
+
+
+@pytest.mark.parametrize('use_audioop', [True, False])
+def test_stereo_wav_is_downmixed_trimmed_and_chunked(app, monkeypatch, use_audioop):
+    if not use_audioop:
+        monkeypatch.setattr(audio_util, 'audioop', None)
+    data = make_wav(2.5)
+    prepared = prepare_audio(data, 'wav')
+
+    assert prepared.audio_format == 'pcm'
+    assert 3.4 <= prepared.duration <= 3.6
+    # 去掉首尾静音后为2.5秒加两端各0.2秒的余量，再按1秒切块
+    assert [len(chunk) for chunk in prepared.chunks][:2] == [TARGET_RATE * 2] * 2
+    assert 2.8 <= prepared.size / (TARGET_RATE * 2) <= 3.0
+    assert prepared.size < prepared.original_size / 4
+
+
+def test_silence_and_unsupported_formats(app):
+    assert prepare_audio(make_wav(0, silence=1), 'wav').chunks == []
+    mp3 = b'ID3' + b'\x00' * 100
+    prepared = prepare_audio(mp3, 'mp3')
+    assert prepared.audio_format == 'mp3' and prepared.chunks == [mp3]
+
+
+def make_utterances(durations, gap=0.6, rate=16000):
+    """单声道录音：每段语句之间间隔gap秒静音"""
+    frames = bytearray()
+    silence = b'\x00\x00' * int(gap * rate)
+    for duration in durations:
+        frames += silence
+        frames += b''.join(
+            int(8000 * math.sin(2 * math.pi * 300 * i / rate)).to_bytes(2, 'little', signed=True)
+            for i in range(int(duration * rate))
+        )
+    frames += silence
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+    return output.getvalue()
+
+
+def test_utterances_are_recognized_in_parallel_and_in_order():
+    from benchmarks import xunfei_standin
+    from src.utils.ai_service import transcribe_audio
+
+    server = xunfei_standin.start_server(latency=0.4)
+    try:
+        app = create_app({
+            'TESTING': True,
+            'XUNFEI_IAT_URL': server.url,
+            'XUNFEI_API_KEY': 'key',
+            'XUNFEI_API_SECRET': 'secret',
+            'XUNFEI_MAX_CONCURRENCY': 4,
+            'AUDIO_VAD_TARGET_SECONDS': 1
+        })
+        with app.app_context():
+            started = time.time()
+            result = transcribe_audio(make_utterances([0.5, 0.8, 0.3, 0.6]), 'wav')
+            elapsed = time.time() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result['code'] == 0
+    assert server.stats['sessions'] == 4
+    # 每段识别结果为"识别到N字节音频"，N随语句长度（含两端各0.2秒余量）变化，拼接顺序与录音一致
+    sizes = [int(part) for part in result['text'].replace('识别到', ' ').replace('字节音频', '').split()]
+    assert sizes == [int((duration + 0.4) * 16000) * 2 for duration in [0.5, 0.8, 0.3, 0.6]]
+    assert elapsed < 4 * 0.4
@@ -0,0 +1,114 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import time
+import uuid
+
+import pytest
+
+from src.app import create_app
+from src.extensions.revocation import BloomFilter, RevocationStore
+from src.migrations import upgrade
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        upgrade()
+    return app.test_client()
+
+
+def revoke(store, expires_in):
+    jti = str(uuid.uuid4())
+    store.revoke({'jti': jti, 'type': 'access', 'sub': '1', 'exp': int(time.time()) + expires_in})
+    return jti
+
+
+def register(client, account='tester', phone='13800000000'):
+    response = client.post('/api/auth/register', json={
+        'account': account,
+        'password': 'secret123',
+        'confirmPassword': 'secret123',
+        'nickname': '测试用户',
+        'phone': phone
+    })
+    return response.get_json()
+
+
+def auth_header(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_refresh_rotates_refresh_token(client):
+    tokens = register(client)['data']
+
+    response = client.post('/api/auth/refresh', headers=auth_header(tokens['refreshToken']))
+    result = response.get_json()
+    assert result['code'] == 200
+    assert result['data']['refreshToken'] != tokens['refreshToken']
+
+    # 旧的刷新令牌已被轮换，不能再次使用
+    response = client.post('/api/auth/refresh', headers=auth_header(tokens['refreshToken']))
+    assert response.status_code == 401
+
+    response = client.get('/api/user/profile', headers=auth_header(result['data']['token']))
+    assert response.get_json()['code'] == 200
+
+
+def test_logout_revokes_access_and_refresh_tokens(client):
+    tokens = register(client)['data']
+
+    response = client.post('/api/auth/logout', headers=auth_header(tokens['token']),
+                           json={'refreshToken': tokens['refreshToken']})
+    assert response.get_json()['code'] == 200
+
+    assert client.get('/api/user/profile', headers=auth_header(tokens['token'])).status_code == 401
+    assert client.post('/api/auth/refresh', headers=auth_header(tokens['refreshToken'])).status_code == 401
+
+
+def test_register_reports_duplicate_account_and_phone(client):
+    assert register(client)['code'] == 200
+    assert register(client, phone='13900000000')['code'] == 409
+    assert register(client, account='another')['message'] == '该手机号已被注册'
+
+    # 冲突的注册不能留下半条记录，新账号仍可正常注册并拥有默认设置
+    tokens = register(client, account='another', phone='13900000000')['data']
+    response = client.get('/api/settings', headers=auth_header(tokens['token']))
+    assert response.get_json()['data'] == {'language': 'zh-CN', 'push_notification': True}
+
+
+def test_other_workers_see_revocations_after_purging_the_newest_row(client):
+    app = client.application
+    with app.app_context():
+        store = app.extensions['revocation_store']
+        # 另一个worker的撤销列表
+        other = RevocationStore(app)
+        app.extensions['revocation_store'] = store
+
+        revoke(store, 3600)
+        revoke(store, -10)
+        # 首次同步时清理掉已过期的最新一条记录
+        assert not other.is_revoked('unknown')
+
+        jti = revoke(store, 3600)
+        other._next_sync = 0
+        assert other.is_revoked(jti)
@@ -0,0 +1,90 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import io
+
+import pytest
+from flask_jwt_extended import create_access_token
+from PIL import Image
+
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import upgrade
+from src.models.user import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads')
+    })
+    with app.app_context():
+        upgrade()
+        user = User(account='tester', nickname='测试', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        app.config['TEST_TOKEN'] = create_access_token(identity=str(user.id))
+        app.config['TEST_USER_ID'] = user.id
+    return app
+
+
+def make_photo():
+    # 竖拍照片：像素为横向，EXIF方向标记为旋转90度，并带有GPS等元数据
+    image = Image.new('RGB', (1200, 800), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'TestCamera'
+    output = io.BytesIO()
+    image.save(output, 'JPEG', exif=exif.tobytes(), quality=95)
+    return output.getvalue()
+
+
+def upload(app, data, filename='photo.jpg'):
+    return app.test_client().post(
+        '/api/user/avatar',
+        data={'avatar': (io.BytesIO(data), filename)},
+        headers={'Authorization': f"Bearer {app.config['TEST_TOKEN']}"}
+    ).get_json()
+
+
+def test_avatar_variants_are_generated_without_exif(app, tmp_path):
+    photo = make_photo()
+    result = upload(app, photo)
+    assert result['code'] == 200
+    assert set(result['data']['variants']) == {'64', '128', '256'}
+
+    client = app.test_client()
+    user_id = app.config['TEST_USER_ID']
+    response = client.get(f"/api/user/{user_id}/avatar?size=50", headers={'Accept': 'image/webp,*/*'})
+    assert response.mimetype == 'image/webp'
+    thumbnail = Image.open(io.BytesIO(response.data))
+    assert thumbnail.size == (64, 64)
+    assert len(response.data) < len(photo) / 20
+
+    response = client.get(f"/api/user/{user_id}/avatar?size=200")
+    assert response.mimetype == 'image/jpeg'
+    thumbnail = Image.open(io.BytesIO(response.data))
+    assert thumbnail.size == (256, 256)
+    assert not thumbnail.getexif()
+
+    # 同一张图片再次上传时复用已有的缩略图
+    assert upload(app, photo)['data'] == result['data']
+
+
+def test_invalid_avatar_is_rejected(app):
+    assert upload(app, b'not an image')['code'] == 400
+
+
+def test_missing_avatar_is_distinguished_from_missing_user(app):
+    client = app.test_client()
+    no_avatar = client.get(f"/api/user/{app.config['TEST_USER_ID']}/avatar").get_json()
+    no_user = client.get('/api/user/9999/avatar').get_json()
+    assert no_avatar['code'] == no_user['code'] == 404
+    assert no_avatar['message'] == '资源不存在'
+    assert no_user['message'] != no_avatar['message']
@@ -0,0 +1,45 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from benchmarks.run import InProcessClient, create_benchmark_app, percentile, run_benchmarks
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0
+
+
+def test_benchmark_runs_in_process(tmp_path):
+    app, counts = create_benchmark_app(tmp_path / 'bench.db', {
+        'users': 3, 'sessions_per_user': 2, 'messages': 60, 'articles': 12, 'reports_per_user': 2
+    })
+    assert counts['messages'] == 60
+
+    results = run_benchmarks(lambda: InProcessClient(app),
+                             ['article.list', 'consult.session_detail', 'consult.send_message'],
+                             concurrency=2, total=6, user_count=3)
+
+    for stats in results.values():
+        assert stats['requests'] == 6
+        assert stats['errors'] == 0
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] <= stats['max_ms']
+
+
+def test_benchmark_covers_uploads_and_token_rotation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app, _ = create_benchmark_app(tmp_path / 'bench.db', {
+        'users': 2, 'sessions_per_user': 1, 'messages': 10, 'articles': 2, 'reports_per_user': 1
+    })
+
+    results = run_benchmarks(lambda: InProcessClient(app), [
+        'auth.refresh', 'auth.logout', 'user.upload_avatar', 'user.avatar', 'media.static',
+        'health.import_reports', 'health.delete_report', 'consult.medical_qa_batch'
+    ], concurrency=2, total=4, user_count=2)
+
+    assert {name: stats['errors'] for name, stats in results.items()} == dict.fromkeys(results, 0)
@@ -2,6 +2,7 @@ import os
 import json
 import time
 from src.app import create_app
+from src.migrations import upgrade
 from flask_jwt_extended import create_access_token
 
 # 强制使用真实API
@@ -9,6 +10,8 @@ os.environ['USE_MOCK_MEDICAL_MODEL'] = 'false'
 
 # 创建应用实例
 app = create_app()
+with app.app_context():
+    upgrade()
 
 # 测试函数
 def test_consult_api():
@@ -0,0 +1,117 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect
+
+from src.app import create_app
+from src.extensions.database import db
+from src.extensions.summarizer import summarizer
+from src.migrations import upgrade
+from src.models.consult import ConsultMessage, ConsultSession
+from src.models.user import User
+from src.utils.context_builder import build_context, estimate_tokens, summary_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        upgrade()
+        yield app
+
+
+def add_session(message_count):
+    user = User(account=f"user{message_count}", nickname='测试', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    session = ConsultSession(user_id=user.id, title='问诊')
+    db.session.add(session)
+    db.session.flush()
+    started = datetime.now() - timedelta(hours=1)
+    db.session.add_all([
+        ConsultMessage(
+            session_id=session.id,
+            sender_type='user' if i % 2 == 0 else 'ai',
+            content=f"第{i}条消息" + '内容' * 20,
+            created_at=started + timedelta(seconds=i)
+        ) for i in range(message_count)
+    ])
+    db.session.commit()
+    return session.id
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('高血压') == 3
+    assert estimate_tokens('blood pressure') == 4
+    assert estimate_tokens('血压 120/80') == 2 + 2
+
+
+def test_message_index_created(app):
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('consult_messages')}
+    assert 'ix_consult_messages_session_created' in indexes
+
+
+def test_short_session_keeps_full_history(app):
+    session_id = add_session(4)
+    context = build_context(session_id, '还需要吃药吗')
+    assert '之前的对话摘要' not in context
+    assert context.count('第') == 4
+    assert context.endswith('当前问题：还需要吃药吗')
+
+
+def test_long_session_is_bounded_by_budget(app):
+    session_id = add_session(400)
+    context = build_context(session_id, '还需要吃药吗', max_messages=20, token_budget=500, summary_budget=120)
+
+    assert estimate_tokens(context) <= 500 + 20
+    assert '第399条消息' in context
+    assert '之前的对话摘要' in context
+    # 摘要只保留最近的部分，最早的消息被丢弃
+    assert '第0条消息' not in context
+
+
+def test_summary_is_extended_incrementally(app):
+    session_id = add_session(60)
+    summary_cache.invalidate(session_id)
+    build_context(session_id, '问题', max_messages=10)
+    covered_before = summary_cache._entries[session_id][0]
+
+    db.session.add(ConsultMessage(session_id=session_id, sender_type='user', content='新的问题'))
+    db.session.add(ConsultMessage(session_id=session_id, sender_type='ai', content='新的回答'))
+    db.session.commit()
+    build_context(session_id, '问题', max_messages=10)
+
+    assert summary_cache._entries[session_id][0] > covered_before
+
+
+def test_background_summary_is_persisted_incrementally(app):
+    session_id = add_session(25)
+    summarizer.notify(session_id)
+    summarizer.wait()
+
+    session = db.session.get(ConsultSession, session_id)
+    db.session.refresh(session)
+    assert '第24条消息' in session.summary
+    assert estimate_tokens(session.summary) <= app.config['CONTEXT_SUMMARY_TOKENS']
+    assert session.to_dict()['description'] == session.summary
+    covered = session.summarized_until
+
+    # 新消息不足阈值时不更新
+    db.session.add(ConsultMessage(session_id=session_id, sender_type='user', content='新的问题'))
+    db.session.commit()
+    assert not summarizer.update(session_id, every=10)
+    assert summarizer.update(session_id, every=1)
+    db.session.refresh(session)
+    assert session.summarized_until > covered
+    assert session.summary.endswith('用户：新的问题')
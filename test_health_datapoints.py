@@ -0,0 +1,197 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import upgrade
+from src.models.health import HealthDatapoint, HealthDatapointRollup, HealthStats
+from src.models.user import User
+from src.utils.health_analytics import get_user_stats, refresh_all_stats
+from src.utils.health_data import ingest_datapoints, rebuild_rollups
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        upgrade()
+    return app
+
+
+@pytest.fixture
+def headers(app):
+    with app.app_context():
+        user = User(account='tester', nickname='测试', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+    return {'Authorization': f'Bearer {token}'}
+
+
+def post_points(app, headers, points):
+    return app.test_client().post('/api/health/datapoints', json={'points': points}, headers=headers).get_json()
+
+
+def test_ingest_upserts_and_rejects_invalid_points(app, headers):
+    day = (datetime.now() - timedelta(days=2)).replace(hour=8, minute=0, second=0, microsecond=0)
+    result = post_points(app, headers, [
+        {'metric': 'weight', 'ts': day.isoformat(), 'value': 70.5},
+        {'metric': 'blood_pressure', 'ts': day.isoformat(), 'systolic': 130, 'diastolic': 85},
+        {'metric': 'weight', 'ts': day.isoformat(), 'value': 999},
+        {'metric': 'unknown', 'ts': day.isoformat(), 'value': 1},
+        {'metric': 'weight', 'value': 70}
+    ])
+    assert result['code'] == 200
+    assert result['data']['accepted'] == 2
+    assert [item['index'] for item in result['data']['rejected']] == [2, 3, 4]
+
+    # 设备重试同步时覆盖原读数，不产生重复数据点
+    post_points(app, headers, [{'metric': 'weight', 'ts': day.isoformat(), 'value': 70.1}])
+    with app.app_context():
+        assert db.session.execute(select(func.count()).select_from(HealthDatapoint)).scalar() == 2
+
+    chart = app.test_client().get('/api/health/datapoints', headers=headers).get_json()['data']
+    assert chart['weight'] == [{'date': day.strftime('%Y-%m-%d'), 'value': 70.1}]
+    assert chart['blood_pressure'] == [{'date': day.strftime('%Y-%m-%d'), 'systolic': 130, 'diastolic': 85}]
+    assert chart['blood_sugar'] == []
+
+
+def test_points_before_earliest_ts_are_rejected(app, headers):
+    point = {'metric': 'weight', 'ts': '1969-12-31T20:13:20', 'value': 70}
+    for _ in range(2):
+        result = post_points(app, headers, [point])
+        assert result['code'] == 200
+        assert result['data']['accepted'] == 0
+        assert [item['index'] for item in result['data']['rejected']] == [0]
+    with app.app_context():
+        assert db.session.execute(select(func.count()).select_from(HealthDatapointRollup)).scalar() == 0
+
+
+def test_range_query_is_served_from_rollups(app, headers):
+    start = (datetime.now() - timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+    points = [{
+        'metric': 'heart_rate',
+        'ts': (start + timedelta(minutes=i)).isoformat(),
+        'value': 60 + i % 30
+    } for i in range(2 * 24 * 60)]
+    assert post_points(app, headers, points)['data']['accepted'] == len(points)
+
+    with app.app_context():
+        counts = dict(db.session.execute(
+            select(HealthDatapointRollup.resolution, func.count()).group_by(HealthDatapointRollup.resolution)
+        ).all())
+    assert counts == {3600: 48, 86400: 2}
+
+    params = {'metric': 'heart_rate', 'start': start.isoformat(), 'end': (start + timedelta(days=2)).isoformat()}
+    daily = app.test_client().get('/api/health/datapoints', query_string={**params, 'interval': 86400},
+                                  headers=headers).get_json()['data']
+    assert [bucket['count'] for bucket in daily['points']] == [1440, 1440]
+    assert daily['points'][0]['min'] == 60 and daily['points'][0]['max'] == 89
+    assert daily['points'][0]['avg'] == pytest.approx(74.5)
+
+    # 自动选择间隔：两天、最多48个分桶时为每小时
+    hourly = app.test_client().get('/api/health/datapoints', query_string={**params, 'points': 48},
+                                   headers=headers).get_json()['data']
+    assert hourly['interval'] == 3600 and len(hourly['points']) == 48
+
+    # 不整小时的间隔读取原始数据点，结果与预聚合一致
+    raw = app.test_client().get('/api/health/datapoints', query_string={**params, 'interval': 1800},
+                                headers=headers).get_json()['data']
+    assert sum(bucket['count'] for bucket in raw['points']) == len(points)
+
+    with app.app_context():
+        db.session.execute(HealthDatapointRollup.__table__.delete())
+        assert rebuild_rollups() == 1
+        db.session.commit()
+    rebuilt = app.test_client().get('/api/health/datapoints', query_string={**params, 'interval': 86400},
+                                    headers=headers).get_json()['data']
+    assert rebuilt['points'] == daily['points']
+
+
+def test_datapoints_require_login_and_object_body(app, headers):
+    client = app.test_client()
+    assert client.get('/api/health/datapoints').status_code == 401
+    response = client.post('/api/health/datapoints', json=[1], headers=headers).get_json()
+    assert response['code'] == 400
+
+
+def test_range_query_rejects_too_many_buckets(app, headers):
+    response = app.test_client().get('/api/health/datapoints', query_string={
+        'metric': 'weight', 'start': '2020-01-01', 'end': '2024-01-01', 'interval': 60
+    }, headers=headers).get_json()
+    assert response['code'] == 400
+
+
+def test_stats_trend_alerts_and_cache_invalidation(app, headers):
+    today = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    # 体重每天下降0.1kg；血压最后两天偏高
+    points = [{'metric': 'weight', 'ts': (today - timedelta(days=i)).isoformat(), 'value': 70 + i * 0.1}
+              for i in range(20)]
+    points += [{'metric': 'blood_pressure', 'ts': (today - timedelta(days=i)).isoformat(),
+                'systolic': 150 if i < 2 else 120, 'diastolic': 80} for i in range(10)]
+    post_points(app, headers, points)
+
+    client = app.test_client()
+    stats = client.get('/api/health/datapoints/stats', headers=headers).get_json()['data']
+    weight = stats['weight']['fields']['value']
+    assert stats['weight']['days'] == 20 and stats['weight']['count'] == 20
+    assert weight['weekly_change'] == pytest.approx(-0.7)
+    assert weight['trend'] == 'down'
+    assert weight['latest'] == 70
+    # 7天滑动平均：最后一天为最近7天的平均值
+    assert weight['rolling'][-1] == pytest.approx(70.3)
+    assert stats['weight']['alerts'] == []
+
+    pressure = stats['blood_pressure']
+    assert pressure['alert_days'] == 2
+    assert [(alert['field'], alert['kind'], alert['value']) for alert in pressure['alerts']] == [
+        ('systolic', 'high', 150), ('systolic', 'high', 150)
+    ]
+    assert pressure['fields']['diastolic']['trend'] == 'flat'
+
+    # 新数据使缓存失效
+    with app.app_context():
+        assert db.session.get(HealthStats, 1) is not None
+    post_points(app, headers, [{'metric': 'blood_sugar', 'ts': today.isoformat(), 'value': 9.0}])
+    with app.app_context():
+        assert db.session.get(HealthStats, 1) is None
+    stats = client.get('/api/health/datapoints/stats', query_string={'metric': 'blood_sugar'},
+                       headers=headers).get_json()['data']
+    assert list(stats) == ['blood_sugar']
+    assert stats['blood_sugar']['alerts'][0]['kind'] == 'high'
+
+
+def test_nightly_batch_matches_single_user_stats(app):
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        users = [User(account=f"user{i}", nickname='测试', password_hash='x') for i in range(5)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+        for index, user_id in enumerate(user_ids):
+            ingest_datapoints(user_id, [
+                {'metric': 'heart_rate', 'ts': (start - timedelta(days=day)).isoformat(), 'value': 60 + index + day % 5}
+                for day in range(30)
+            ])
+        db.session.commit()
+
+        assert refresh_all_stats(batch_size=2) == 5
+        cached = {row.user_id: row.data for row in db.session.execute(select(HealthStats)).scalars()}
+        assert set(cached) == set(user_ids)
+        db.session.execute(HealthStats.__table__.delete())
+        db.session.commit()
+        for user_id in user_ids:
+            assert get_user_stats(user_id) == cached[user_id]
@@ -0,0 +1,36 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import json
+import logging
+
+from src.utils.log_util import JsonFormatter, RedactingFilter, parse_log_levels
+
+
+def make_record(msg, args=(), **extra):
+    record = logging.LogRecord('src.routes.auth', logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_redacting_filter_hides_passwords_in_args_and_extra():
+    record = make_record('请求数据: %s', ({'account': 'alice', 'password': 'secret', 'items': [{'token': 't'}]},),
+                         refreshToken='r', user_id=3)
+    RedactingFilter().filter(record)
+
+    output = json.loads(JsonFormatter().format(record))
+    assert 'secret' not in output['message'] and "'account': 'alice'" in output['message']
+    assert "'token': '***'" in output['message']
+    assert output['refreshToken'] == '***'
+    assert output['user_id'] == 3
+
+
+def test_parse_log_levels():
+    assert parse_log_levels('sqlalchemy.engine=warning, src.routes.auth=DEBUG') == {
+        'sqlalchemy.engine': 'WARNING',
+        'src.routes.auth': 'DEBUG'
+    }
+    assert parse_log_levels('') == {}
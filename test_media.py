@@ -0,0 +1,66 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from src.app import create_app
+from src.utils.file_util import get_file_url, store_upload
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'UPLOAD_FOLDER': 'static/uploads',
+        'BASE_URL': '/api'
+    })
+
+
+def upload(app, content, filename, folder='audio'):
+    with app.app_context():
+        stored = store_upload(FileStorage(io.BytesIO(content), filename=filename), folder)
+        return stored, get_file_url(stored.path)
+
+
+def test_range_requests_and_immutable_caching(app):
+    content = bytes(range(256)) * 40
+    stored, url = upload(app, content, 'voice.mp3')
+    client = app.test_client()
+
+    response = client.get(url)
+    assert response.status_code == 200 and response.data == content
+    assert response.headers['ETag'] == f'"{stored.sha256}"'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.mimetype == 'audio/mpeg'
+
+    response = client.get(url, headers={'Range': 'bytes=1000-1999'})
+    assert response.status_code == 206
+    assert response.data == content[1000:2000]
+    assert response.headers['Content-Range'] == f'bytes 1000-1999/{len(content)}'
+
+    response = client.get(url, headers={'If-None-Match': f'"{stored.sha256}"'})
+    assert response.status_code == 304 and response.data == b''
+
+
+def test_missing_and_escaping_paths(app):
+    client = app.test_client()
+    assert client.get('/api/static/uploads/audio/nothing.mp3').status_code == 404
+    assert client.get('/api/static/uploads/../test.db').status_code == 404
+    assert client.get('/api/static/other/file.txt').status_code == 404
+
+
+def test_accel_redirect(app):
+    _, url = upload(app, b'avatar', 'a.png', 'avatars')
+    app.config['MEDIA_ACCEL_REDIRECT_PREFIX'] = '/protected-uploads'
+    response = app.test_client().get(url)
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'].startswith('/protected-uploads/avatars/')
@@ -0,0 +1,84 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import json
+import time
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from src.app import create_app
+from src.migrations import upgrade
+from src.utils.ai_service import answer_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'USE_MOCK_MEDICAL_MODEL': True,
+        'MOCK_MEDICAL_MODEL_LATENCY': 0.2,
+        'QWEN_MAX_CONCURRENCY': 4
+    })
+    with app.app_context():
+        upgrade()
+    answer_cache.clear()
+    return app
+
+
+def post_batch(app, payload):
+    with app.app_context():
+        token = create_access_token(identity='1')
+    return app.test_client().post('/api/consult/medical-qa/batch', json=payload,
+                                  headers={'Authorization': f'Bearer {token}'})
+
+
+def test_batch_fans_out_and_dedupes(app):
+    queries = [f"问题{i}：高血压怎么办" for i in range(8)] + ['问题0：高血压怎么办', {'query': '感冒', 'language': 'mongolian'}]
+    started = time.time()
+    response = post_batch(app, {'queries': queries})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    elapsed = time.time() - started
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert lines[-1]['done'] and lines[-1]['total'] == 10 and lines[-1]['failed'] == 0
+    results = {line['index']: line for line in lines[:-1]}
+    assert sorted(results) == list(range(10))
+    assert results[0]['response'] == results[8]['response']
+    assert '高血压' in results[3]['response']
+    # 9个不同的问题、并发4个，约3轮延迟；串行需要约1.8秒
+    assert elapsed < 1.2
+
+
+def test_batch_uses_answer_cache(app):
+    post_batch(app, {'queries': ['糖尿病饮食']})
+    lines = [json.loads(line) for line in post_batch(app, {'queries': ['糖尿病饮食']}).get_data(as_text=True).splitlines()]
+    assert lines[0]['cached'] is True
+
+
+def test_batch_validation(app):
+    assert post_batch(app, {'queries': []}).get_json()['code'] == 400
+    assert post_batch(app, {'queries': ['ok', '']}).get_json()['code'] == 400
+    assert post_batch(app, {'queries': ['ok'], 'max_tokens': [1]}).get_json()['code'] == 400
+    assert post_batch(app, {'queries': ['ok'], 'temperature': 'hot'}).get_json()['code'] == 400
+    assert post_batch(app, {'queries': ['ok'], 'temperature': 5}).get_json()['code'] == 400
+    app.config['QWEN_BATCH_MAX_QUERIES'] = 2
+    assert post_batch(app, {'queries': ['a', 'b', 'c']}).get_json()['code'] == 400
+
+
+def test_single_question_is_not_cached(app):
+    with app.app_context():
+        token = create_access_token(identity='1')
+    client = app.test_client()
+    for _ in range(2):
+        response = client.post('/api/consult/medical-qa', json={'query': '感冒'},
+                               headers={'Authorization': f'Bearer {token}'}).get_json()
+        assert response['code'] == 200
+    assert len(answer_cache) == 0
+    assert client.post('/api/consult/medical-qa', json={'query': '感冒', 'max_tokens': 0},
+                       headers={'Authorization': f'Bearer {token}'}).get_json()['code'] == 400
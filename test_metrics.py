@@ -0,0 +1,80 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import json
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.app import create_app
+from src.extensions.database import db
+from src.extensions.metrics import MetricsRegistry, Counter, Gauge, Histogram, track_upstream
+from src.migrations import upgrade
+
+
+def test_metrics_endpoint_reports_route_and_db_metrics(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        upgrade()
+    client = app.test_client()
+
+    client.post('/api/auth/login', json={'account': 'nobody', 'password': 'secret123'})
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'http_requests_total{method="POST",endpoint="auth.login",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",endpoint="auth.login",le="+Inf"}' in body
+    assert 'db_queries_per_request_count{endpoint="auth.login"}' in body
+    # 只有正在处理的/metrics请求本身
+    assert 'http_requests_in_flight 1' in body
+
+
+def test_registry_merges_worker_files(tmp_path):
+    registry = MetricsRegistry()
+    registry.directory = str(tmp_path)
+    counter = Counter(registry, 'jobs_total', 'jobs', ['kind'])
+    gauge = Gauge(registry, 'busy', 'busy')
+    histogram = Histogram(registry, 'latency_seconds', 'latency', buckets=(0.1, 1))
+    counter.inc(kind='a')
+    gauge.inc()
+    histogram.observe(0.05)
+
+    # 模拟另一个已退出的worker留下的指标文件：计数器保留，瞬时值忽略
+    other = registry.snapshot()
+    (tmp_path / 'metrics_999999999.json').write_text(json.dumps(other))
+
+    body = registry.render()
+    assert 'jobs_total{kind="a"} 2' in body
+    assert 'busy 1' in body
+    assert 'latency_seconds_bucket{le="0.1"} 2' in body
+    assert 'latency_seconds_count 2' in body
+
+
+def test_track_upstream_records_outcome():
+    from src.extensions.metrics import UPSTREAM_REQUESTS
+
+    before = UPSTREAM_REQUESTS.values.get(('qwen', 'timeout'), 0)
+    with track_upstream('qwen') as call:
+        call['outcome'] = 'timeout'
+    assert UPSTREAM_REQUESTS.values[('qwen', 'timeout')] == before + 1
+
+
+def test_failed_queries_do_not_leak_start_times(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.exec_driver_sql('SELECT * FROM missing_table')
+            conn.exec_driver_sql('SELECT 1')
+            assert conn.info['query_started'] == []
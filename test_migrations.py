@@ -0,0 +1,93 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import MIGRATIONS, current_version, upgrade
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+
+    applied = upgrade(engine)
+    assert applied == [m.version for m in MIGRATIONS]
+    assert current_version(engine) == MIGRATIONS[-1].version
+    assert upgrade(engine) == []
+    assert 'users' in inspect(engine).get_table_names()
+
+
+def test_upgrade_fixes_legacy_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # 旧版register-test创建的users表
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                nickname TEXT,
+                phone TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+
+    upgrade(engine)
+
+    columns = {column['name'] for column in inspect(engine).get_columns('users')}
+    assert {'gender', 'avatar', 'updated_at'} <= columns
+
+    # 旧表的手机号没有唯一约束，迁移后重复的手机号不能再注册
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'legacy.db'}",
+        'RATE_LIMIT_ENABLED': False
+    })
+    client = app.test_client()
+    body = {'account': 'first', 'password': 'secret1', 'confirmPassword': 'secret1',
+            'nickname': '测试', 'phone': '13800000000'}
+    assert client.post('/api/auth/register', json=body).get_json()['code'] == 200
+    result = client.post('/api/auth/register', json={**body, 'account': 'second'}).get_json()
+    assert (result['code'], result['message']) == (409, '该手机号已被注册')
+
+
+def test_revoked_token_ids_are_not_reused_after_upgrade(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # 迁移11之前创建的撤销记录表，id为普通的INTEGER PRIMARY KEY
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE revoked_tokens (
+                id INTEGER NOT NULL PRIMARY KEY,
+                jti VARCHAR(36) NOT NULL UNIQUE,
+                token_type VARCHAR(10) NOT NULL,
+                user_id INTEGER,
+                expires_at DATETIME NOT NULL,
+                created_at DATETIME
+            )
+        """))
+        conn.execute(text("CREATE INDEX ix_revoked_tokens_expires_at ON revoked_tokens (expires_at)"))
+        conn.execute(text("""
+            INSERT INTO revoked_tokens (id, jti, token_type, expires_at)
+            VALUES (1, 'a', 'access', '2030-01-01'), (2, 'b', 'access', '2030-01-01')
+        """))
+
+    upgrade(engine)
+
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT jti FROM revoked_tokens ORDER BY id")).scalars().all() == ['a', 'b']
+        conn.execute(text("DELETE FROM revoked_tokens WHERE id = 2"))
+        conn.execute(text("INSERT INTO revoked_tokens (jti, token_type, expires_at) VALUES ('c', 'access', '2030-01-01')"))
+        assert conn.execute(text("SELECT id FROM revoked_tokens WHERE jti = 'c'")).scalar() == 3
+    assert 'ix_revoked_tokens_expires_at' in {index['name'] for index in inspect(engine).get_indexes('revoked_tokens')}
+
+
+def test_create_app_does_not_create_tables(tmp_path):
+    db_path = tmp_path / 'empty.db'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}"})
+
+    with app.app_context():
+        assert inspect(db.engine).get_table_names() == []
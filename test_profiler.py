@@ -0,0 +1,73 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import threading
+
+from src.app import create_app
+from src.migrations import upgrade
+from src.utils.profiler import SamplingProfiler
+
+
+def create_test_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'PROFILER_ENABLED': True,
+        'PROFILER_ADMIN_TOKEN': 'admin-secret',
+        'PROFILER_OUTPUT_DIR': str(tmp_path / 'profiles')
+    })
+    with app.app_context():
+        upgrade()
+    return app
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collapses_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name='busy')
+    worker.start()
+    try:
+        output = SamplingProfiler(interval=0.001).run(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy_lines = [line for line in output.splitlines() if line.startswith('busy;')]
+    assert busy_lines
+    assert any('busy_loop (test_profiler.py:' in line for line in busy_lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in busy_lines)
+
+
+def test_admin_endpoints_require_token(tmp_path):
+    client = create_test_app(tmp_path).test_client()
+
+    assert client.get('/api/admin/profiles').status_code == 403
+    response = client.get('/api/admin/profiles', headers={'X-Admin-Token': 'wrong'})
+    assert response.status_code == 403
+
+
+def test_per_request_cprofile(tmp_path):
+    client = create_test_app(tmp_path).test_client()
+    admin = {'X-Admin-Token': 'admin-secret'}
+
+    response = client.post('/api/auth/login', json={'account': 'nobody', 'password': 'secret123'},
+                           headers={**admin, 'X-Profile': '1'})
+    filename = response.headers['X-Profile-File']
+
+    # 没有管理员令牌时不开启分析
+    response = client.post('/api/auth/login', json={'account': 'nobody', 'password': 'secret123'},
+                           headers={'X-Profile': '1'})
+    assert 'X-Profile-File' not in response.headers
+
+    assert filename in client.get('/api/admin/profiles', headers=admin).get_json()['data']
+    stats = client.get(f'/api/admin/profiles/{filename}', headers=admin).get_data(as_text=True)
+    assert 'cumulative' in stats
+    assert 'login' in stats
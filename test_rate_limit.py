@@ -0,0 +1,58 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from flask import Flask
+
+from src.extensions.limiter import (
+    LoginRateLimiter, MemoryStorage, SlidingWindowCounter, TokenBucket, create_storage
+)
+
+
+def test_token_bucket_allows_burst_then_rejects():
+    storage = MemoryStorage()
+    bucket = TokenBucket(capacity=3, refill_rate=0.01)
+
+    assert [bucket.consume(storage, 'ip:1.2.3.4') for _ in range(3)] == [0, 0, 0]
+    assert bucket.consume(storage, 'ip:1.2.3.4') > 0
+    # 不同的键互不影响
+    assert bucket.consume(storage, 'ip:5.6.7.8') == 0
+
+
+def test_sliding_window_counter_counts_hits():
+    storage = MemoryStorage()
+    counter = SlidingWindowCounter(window=60)
+
+    for _ in range(4):
+        counter.hit(storage, 'fail:alice')
+
+    assert counter.count(storage, 'fail:alice') == 4
+    assert counter.count(storage, 'fail:bob') == 0
+
+
+def test_sqlite_storage_is_shared_between_instances(tmp_path):
+    url = f"sqlite:///{tmp_path / 'limits.db'}"
+    first, second = create_storage(url), create_storage(url)
+    bucket = TokenBucket(capacity=2, refill_rate=0.01)
+
+    assert bucket.consume(first, 'account:alice') == 0
+    assert bucket.consume(second, 'account:alice') == 0
+    assert bucket.consume(first, 'account:alice') > 0
+
+
+def test_login_limiter_locks_account_after_failures():
+    app = Flask(__name__)
+    app.config.update(LOGIN_LOCKOUT_THRESHOLD=3, LOGIN_ACCOUNT_BUCKET_CAPACITY=100)
+    limiter = LoginRateLimiter(app)
+
+    for _ in range(3):
+        assert limiter.check('alice', '10.0.0.1') == 0
+        limiter.record_failure('alice')
+
+    assert limiter.check('alice', '10.0.0.2') > 0
+    assert limiter.check('bob', '10.0.0.2') == 0
+
+    limiter.reset('alice')
+    assert limiter.check('alice', '10.0.0.1') == 0
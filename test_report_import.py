@@ -0,0 +1,113 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import io
+import json
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import upgrade
+from src.models.health import HealthReport, HealthReportItem
+from src.models.user import User
+from src.utils.report_import import import_reports, read_ndjson
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'REPORT_IMPORT_TOKEN': 'partner-token',
+        'REPORT_IMPORT_CHUNK_SIZE': 3
+    })
+    with app.app_context():
+        upgrade()
+        db.session.add_all([User(account=f"user{i}", nickname='测试', password_hash='x') for i in range(2)])
+        db.session.commit()
+    return app
+
+
+def counts(app):
+    with app.app_context():
+        return (db.session.execute(select(func.count()).select_from(HealthReport)).scalar(),
+                db.session.execute(select(func.count()).select_from(HealthReportItem)).scalar())
+
+
+def test_partner_ndjson_import_reports_row_errors(app):
+    lines = [
+        {'account': 'user0', 'title': '血常规', 'created_at': '2024-03-01T09:00:00',
+         'items': [{'name': '血红蛋白', 'value': 135, 'reference': '120-160'}]},
+        {'user_id': 2, 'title': '肝功能', 'items': [{'name': 'ALT', 'value': '25'}, {'name': 'AST', 'value': '30'}]},
+        {'account': 'nobody', 'title': '未知用户'},
+        {'user_id': 1, 'items': []},
+        'not json',
+        {'user_id': 1, 'title': '血脂', 'items': [{'value': '1'}]},
+        {'user_id': 1, 'title': '尿常规'}
+    ]
+    body = '\n'.join(line if isinstance(line, str) else json.dumps(line, ensure_ascii=False) for line in lines)
+    result = app.test_client().post('/api/health/reports/import', data=body.encode('utf-8'),
+                                    content_type='application/x-ndjson',
+                                    headers={'X-Import-Token': 'partner-token'}).get_json()
+    assert result['code'] == 200
+    data = result['data']
+    assert (data['reports'], data['items'], data['failed']) == (3, 3, 4)
+    assert [error['line'] for error in sorted(data['errors'], key=lambda error: error['line'])] == [3, 4, 5, 6]
+    assert counts(app) == (3, 3)
+
+    with app.app_context():
+        report = db.session.execute(select(HealthReport).where(HealthReport.title == '血常规')).scalar_one()
+        assert report.user_id == 1 and report.created_at.day == 1
+        assert report.items[0].value == '135'
+
+
+def test_user_csv_import_is_limited_to_own_reports(app):
+    with app.app_context():
+        token = create_access_token(identity='1')
+    body = (
+        "report_key,title,hospital,user_id,item_name,item_value,item_reference\n"
+        "a,体检,旗医院,,收缩压,135,90-140\n"
+        "a,体检,旗医院,,舒张压,85,60-90\n"
+        "b,复查,旗医院,2,空腹血糖,5.6,3.9-6.1\n"
+        "c,复查,旗医院,1,,,\n"
+    )
+    response = app.test_client().post('/api/health/reports/import', data={
+        'file': (io.BytesIO(body.encode('utf-8')), 'reports.csv')
+    }, headers={'Authorization': f'Bearer {token}'}).get_json()
+    data = response['data']
+    assert (data['reports'], data['items'], data['failed']) == (2, 2, 1)
+    assert data['errors'] == [{'line': 4, 'error': '不能导入其他用户的报告'}]
+
+    # 没有登录也没有导入令牌
+    response = app.test_client().post('/api/health/reports/import', data=body, content_type='text/csv').get_json()
+    assert response['code'] == 401
+
+
+def test_import_streams_in_chunks(app):
+    records = read_ndjson(json.dumps({'user_id': 1 + i % 2, 'title': f"报告{i}", 'items': [
+        {'name': '血糖', 'value': '5.0'}
+    ]}) for i in range(10))
+    with app.app_context():
+        result = import_reports(records, chunk_size=4)
+    assert (result['reports'], result['items'], result['failed']) == (10, 10, 0)
+    assert counts(app) == (10, 10)
+
+
+def test_invalid_encoding_midway_returns_summary(app):
+    # 超过一次解码的缓冲区后才出现非UTF-8内容，前面的批次已经提交
+    valid = '\n'.join(json.dumps({'user_id': 1, 'title': f"报告{i}"}) for i in range(300))
+    body = valid.encode('utf-8') + b'\n{"user_id": 1, "title": "\xff\xfe"}\n'
+    result = app.test_client().post('/api/health/reports/import', data=body,
+                                    content_type='application/x-ndjson',
+                                    headers={'X-Import-Token': 'partner-token'}).get_json()
+    assert result['code'] == 200
+    data = result['data']
+    assert data['reports'] > 0 and 'UTF-8' in data['errors'][-1]['error']
+    assert counts(app) == (data['reports'], 0)
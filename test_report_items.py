@@ -0,0 +1,112 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert, select
+
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import upgrade
+from src.models.health import HealthReport, HealthReportItem
+from src.models.user import User
+from src.utils.report_import import import_reports, read_ndjson
+from src.utils.report_values import backfill_report_items, parse_item, refresh_report_statuses
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        upgrade()
+    return app
+
+
+@pytest.fixture
+def headers(app):
+    with app.app_context():
+        user = User(account='tester', nickname='测试', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.mark.parametrize('value, reference, expected', [
+    ('5.6 mmol/L', '3.9-6.1', (5.6, 3.9, 6.1, 'mmol/L')),
+    ('135', '120～160 g/L', (135, 120, 160, 'g/L')),
+    ('6.3', '<5.2 mmol/L', (6.3, None, 5.2, 'mmol/L')),
+    ('45%', '≥40', (45, 40, None, '%')),
+    ('135/85', '90-140/60-90', (None, None, None, None)),
+    ('阴性', '阴性', (None, None, None, None)),
+    # 区间、+/-这类值不是单个数值，也不能把后面的文字当作单位覆盖参考范围的单位
+    ('3.9-6.1', '3.9-6.1 mmol/L', (None, 3.9, 6.1, 'mmol/L')),
+    ('1+', '0-1', (None, 0, 1, None)),
+    ('5.6↑', '3.9-6.1 mmol/L', (5.6, 3.9, 6.1, 'mmol/L')),
+    ('6.5 ×10^9/L', '3.5-9.5', (6.5, 3.5, 9.5, '×10^9/L'))
+])
+def test_parse_item(value, reference, expected):
+    parsed = parse_item(value, reference)
+    assert (parsed['value_num'], parsed['ref_low'], parsed['ref_high'], parsed['unit']) == expected
+
+
+def test_numbers_and_statuses_are_filled_at_write_time(app, headers):
+    client = app.test_client()
+    report = client.post('/api/health/reports', json={'title': '血脂', 'items': [
+        {'name': '总胆固醇', 'value': '6.3 mmol/L', 'reference': '<5.2'},
+        {'name': '甘油三酯', 'value': '1.1', 'reference': '0.45-1.7 mmol/L'},
+        {'name': '备注', 'value': '无'}
+    ]}, headers=headers).get_json()['data']
+    assert report['status'] == 'warning'
+    assert [(item['status'], item['value_num'], item['ref_high'], item['unit']) for item in report['items']] == [
+        ('abnormal', 6.3, 5.2, 'mmol/L'), ('normal', 1.1, 1.7, 'mmol/L'), ('normal', None, None, None)
+    ]
+
+    with app.app_context():
+        result = import_reports(read_ndjson([
+            '{"user_id": 1, "title": "血常规", "items": [{"name": "血红蛋白", "value": "110 g/L", "reference": "120-160"}]}',
+            '{"user_id": 1, "title": "血糖", "items": [{"name": "空腹血糖", "value": "5.0", "reference": "3.9-6.1"}]}'
+        ]))
+        assert result['reports'] == 2
+        imported = db.session.execute(select(HealthReport).where(HealthReport.title == '血常规')).scalar_one()
+        assert imported.status == 'warning'
+        assert imported.items[0].status == 'abnormal' and imported.items[0].ref_low == 120
+
+    high = client.get('/api/health/reports/items/abnormal', query_string={'direction': 'high'},
+                      headers=headers).get_json()['data']
+    assert [item['name'] for item in high] == ['总胆固醇']
+    low = client.get('/api/health/reports/items/abnormal', query_string={'name': '血红蛋白'},
+                     headers=headers).get_json()['data']
+    assert [(item['value_num'], item['report_title']) for item in low] == [(110, '血常规')]
+    assert client.get('/api/health/reports/items/abnormal', query_string={'direction': 'up'},
+                      headers=headers).get_json()['code'] == 400
+
+
+def test_backfill_existing_items_and_refresh_statuses(app, headers):
+    with app.app_context():
+        report_id = db.session.execute(insert(HealthReport).returning(HealthReport.id), [
+            {'user_id': 1, 'title': '旧报告', 'status': 'normal'}
+        ]).scalar_one()
+        db.session.execute(insert(HealthReportItem), [
+            {'report_id': report_id, 'name': '收缩压', 'value': '150 mmHg', 'reference': '90-140 mmHg'},
+            {'report_id': report_id, 'name': '心率', 'value': '72', 'reference': '60-100'},
+            {'report_id': report_id, 'name': '血压', 'value': '150/95', 'reference': ''}
+        ])
+        db.session.commit()
+
+        assert backfill_report_items(batch_size=2) == 3
+        items = db.session.execute(select(HealthReportItem).order_by(HealthReportItem.id)).scalars().all()
+        assert [(item.value_num, item.ref_high, item.unit) for item in items] == [
+            (150, 140, 'mmHg'), (72, 100, None), (None, None, None)
+        ]
+
+        assert refresh_report_statuses([report_id]) == 1
+        db.session.commit()
+        assert db.session.get(HealthReport, report_id).status == 'warning'
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+from benchmarks import qwen_standin, xunfei_standin
+from src.app import create_app
+from src.extensions.metrics import UPSTREAM_REQUESTS
+from src.utils.ai_service import query_qwen_medical_api, xunfei_speech_to_text
+
+
+@pytest.fixture
+def qwen_server():
+    server = qwen_standin.start_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def xunfei_server():
+    server = xunfei_standin.start_server(api_key='key', api_secret='secret', text='头疼发烧')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_app(**overrides):
+    config = {'TESTING': True, 'USE_MOCK_MEDICAL_MODEL': False}
+    config.update(overrides)
+    return create_app(config)
+
+
+def test_qwen_client_reuses_pooled_connection(qwen_server):
+    app = make_app(QWEN_API_URL=qwen_server.url)
+    with app.app_context():
+        for _ in range(3):
+            result = query_qwen_medical_api('高血压需要注意什么')
+            assert result['code'] == 0
+            assert result['response'] == qwen_standin.DEFAULT_OPTIONS['answer']
+
+    stats = qwen_server.snapshot_stats()
+    assert stats['requests'] == 3
+    assert stats['connections'] == 1
+
+
+def test_qwen_client_handles_injected_errors_and_timeouts(qwen_server):
+    app = make_app(QWEN_API_URL=qwen_server.url, QWEN_API_TIMEOUT=0.2)
+    with app.app_context():
+        qwen_server.options['error_rate'] = 1.0
+        assert query_qwen_medical_api('感冒')['code'] == 500
+
+        qwen_server.options.update(error_rate=0.0, hang_rate=1.0, hang_seconds=1.0)
+        assert query_qwen_medical_api('感冒')['code'] == -1
+
+
+def test_xunfei_client_against_standin(xunfei_server):
+    app = make_app(XUNFEI_IAT_URL=xunfei_server.url, XUNFEI_API_KEY='key', XUNFEI_API_SECRET='secret')
+    with app.app_context():
+        assert xunfei_speech_to_text(b'\x00' * 3200, 'pcm') == {'code': 0, 'text': '头疼发烧'}
+
+    # 签名不正确时服务端拒绝握手
+    app = make_app(XUNFEI_IAT_URL=xunfei_server.url, XUNFEI_API_KEY='key', XUNFEI_API_SECRET='wrong')
+    with app.app_context():
+        assert xunfei_speech_to_text(b'\x00' * 3200, 'pcm')['code'] == -1
+    assert xunfei_server.stats['unauthorized'] == 1
+
+
+def test_xunfei_client_times_out_waiting_for_result(xunfei_server):
+    before = UPSTREAM_REQUESTS.values.get(('xunfei', 'timeout'), 0)
+    xunfei_server.options['latency'] = 2.0
+    app = make_app(XUNFEI_IAT_URL=xunfei_server.url, XUNFEI_API_KEY='key', XUNFEI_API_SECRET='secret',
+                   XUNFEI_TIMEOUT=0.3)
+    with app.app_context():
+        started = time.monotonic()
+        assert xunfei_speech_to_text(b'\x00' * 3200, 'pcm')['code'] == -1
+        assert time.monotonic() - started < 1.5
+    assert UPSTREAM_REQUESTS.values[('xunfei', 'timeout')] == before + 1
@@ -0,0 +1,132 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Response, stream_with_context
+
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import upgrade
+from src.utils.response import api_response
+from src.utils.tracing import bind_trace, span, traced
+
+
+def create_test_app(tmp_path, **overrides):
+    config = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False
+    }
+    config.update(overrides)
+    app = create_app(config)
+    with app.app_context():
+        upgrade()
+    return app
+
+
+def test_request_id_and_server_timing(tmp_path):
+    client = create_test_app(tmp_path).test_client()
+
+    response = client.post('/api/auth/login', json={'account': 'nobody', 'password': 'secret123'},
+                           headers={'X-Request-ID': 'req-123'})
+    assert response.headers['X-Request-ID'] == 'req-123'
+    assert response.get_json()['requestId'] == 'req-123'
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert 'total;dur=' in response.headers['Server-Timing']
+
+    # 不合法的请求ID会被替换
+    response = client.get('/api/settings', headers={'X-Request-ID': 'bad id'})
+    assert response.headers['X-Request-ID'] != 'bad id'
+
+
+def test_spans_are_exported_as_otlp_json(tmp_path):
+    trace_file = tmp_path / 'spans.jsonl'
+    app = create_test_app(tmp_path, TRACE_EXPORTER=str(trace_file))
+
+    @traced('qwen.medical_qa')
+    def fake_model_call():
+        db.session.execute(db.text('SELECT 1'))
+
+    @app.route('/traced')
+    def traced_view():
+        with span('file.save', size=3):
+            fake_model_call()
+        return api_response(200, 'success')
+
+    app.test_client().get('/traced')
+
+    for _ in range(50):
+        if trace_file.exists() and trace_file.read_text():
+            break
+        time.sleep(0.05)
+    spans = json.loads(trace_file.read_text())['resourceSpans'][0]['scopeSpans'][0]['spans']
+    by_name = {item['name']: item for item in spans}
+
+    assert set(by_name) == {'GET /traced', 'file.save', 'qwen.medical_qa', 'db.query'}
+    assert len({item['traceId'] for item in spans}) == 1
+    assert by_name['qwen.medical_qa']['parentSpanId'] == by_name['file.save']['spanId']
+    assert by_name['db.query']['parentSpanId'] == by_name['qwen.medical_qa']['spanId']
+    assert 'parentSpanId' not in by_name['GET /traced']
+    assert by_name['GET /traced']['kind'] == 2 and by_name['file.save']['kind'] == 1
+
+    # 延续上游的traceparent时，根span仍是SERVER
+    trace_file.write_text('')
+    upstream = '00-' + 'a' * 32 + '-' + 'b' * 16 + '-01'
+    app.test_client().get('/traced', headers={'traceparent': upstream})
+    for _ in range(50):
+        if trace_file.read_text():
+            break
+        time.sleep(0.05)
+    spans = json.loads(trace_file.read_text())['resourceSpans'][0]['scopeSpans'][0]['spans']
+    root = next(item for item in spans if item['name'] == 'GET /traced')
+    assert root['parentSpanId'] == 'b' * 16 and root['kind'] == 2
+
+
+def test_worker_thread_spans_join_the_request_trace(tmp_path):
+    trace_file = tmp_path / 'spans.jsonl'
+    app = create_test_app(tmp_path, TRACE_EXPORTER=str(trace_file))
+
+    @traced('xunfei.speech_to_text')
+    def recognize(chunk):
+        return chunk
+
+    def run_parallel():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return list(executor.map(bind_trace(recognize), range(3)))
+
+    @app.route('/parallel')
+    def parallel_view():
+        with span('audio.recognize'):
+            run_parallel()
+        return api_response(200, 'success')
+
+    @app.route('/streamed')
+    def streamed_view():
+        def generate():
+            yield json.dumps(run_parallel())
+        return Response(stream_with_context(generate()))
+
+    client = app.test_client()
+    client.get('/parallel')
+    response = client.get('/streamed')
+    response.get_data()
+    response.close()
+
+    for _ in range(50):
+        if trace_file.exists() and len(trace_file.read_text().splitlines()) == 2:
+            break
+        time.sleep(0.05)
+    parallel, streamed = [json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans']
+                          for line in trace_file.read_text().splitlines()]
+
+    parent = next(item for item in parallel if item['name'] == 'audio.recognize')
+    workers = [item for item in parallel if item['name'] == 'xunfei.speech_to_text']
+    assert len(workers) == 3 and all(item['parentSpanId'] == parent['spanId'] for item in workers)
+    # 流式响应发送完毕后才导出，生成过程中工作线程的span也在其中
+    assert [item['name'] for item in streamed].count('xunfei.speech_to_text') == 3
@@ -0,0 +1,115 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+from werkzeug.datastructures import FileStorage
+
+from benchmarks import xunfei_standin
+from src.app import create_app
+from src.extensions.database import db
+from src.migrations import upgrade
+from src.models.consult import ConsultSession
+from src.models.transcript import TranscriptCache
+from src.models.user import User
+from src.utils.file_util import store_upload
+
+
+@pytest.fixture
+def xunfei_server():
+    server = xunfei_standin.start_server(api_key='key', api_secret='secret')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def app(tmp_path, xunfei_server):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'UPLOAD_CHUNK_SIZE': 1024,
+        'XUNFEI_IAT_URL': xunfei_server.url,
+        'XUNFEI_API_KEY': 'key',
+        'XUNFEI_API_SECRET': 'secret'
+    })
+    with app.app_context():
+        upgrade()
+    return app
+
+
+def test_identical_uploads_are_stored_once(app, tmp_path):
+    content = os.urandom(10000)
+    with app.app_context():
+        first = store_upload(FileStorage(io.BytesIO(content), filename='a.WAV'), 'audio')
+        second = store_upload(FileStorage(io.BytesIO(content), filename='b.wav'), 'audio')
+
+    assert not first.deduplicated and second.deduplicated
+    assert first.path == second.path and first.path.endswith(f"{first.sha256}.wav")
+    assert first.size == len(content)
+    # 保存的文件按umask设置普通权限而不是临时文件的0600，X-Accel-Redirect/X-Sendfile由前端服务器直接发送
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(first.absolute_path).st_mode & 0o777 == 0o666 & ~umask
+    with first.open_buffer() as buffer:
+        assert buffer[:] == content
+    files = [name for _, _, names in os.walk(tmp_path / 'uploads') for name in names]
+    assert files == [f"{first.sha256}.wav"]
+
+
+def test_non_ascii_filename_keeps_extension(app):
+    with app.app_context():
+        stored = store_upload(FileStorage(io.BytesIO(b'ID3' + os.urandom(100)), filename='录音.MP3'), 'audio')
+    assert stored.path.endswith(f"{stored.sha256}.mp3")
+
+
+def create_session(app):
+    with app.app_context():
+        user = User(account='tester', nickname='测试', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        session = ConsultSession(user_id=user.id, title='问诊')
+        db.session.add(session)
+        db.session.commit()
+        session_id = session.id
+        token = create_access_token(identity=str(user.id))
+    return session_id, token
+
+
+def upload_audio(app, session_id, token, content):
+    return app.test_client().post(
+        f"/api/consult/sessions/{session_id}/audio",
+        data={'audio': (io.BytesIO(content), 'voice.wav')},
+        headers={'Authorization': f'Bearer {token}'}
+    ).get_json()
+
+
+def test_audio_upload_passes_stored_file_to_asr(app):
+    session_id, token = create_session(app)
+    result = upload_audio(app, session_id, token, b'\x01' * 5000)
+    assert result['code'] == 200
+    assert result['data']['text'] == '识别到5000字节音频'
+
+
+def test_retried_audio_upload_uses_transcript_cache(app, xunfei_server):
+    session_id, token = create_session(app)
+    first = upload_audio(app, session_id, token, b'\x02' * 3000)
+    second = upload_audio(app, session_id, token, b'\x02' * 3000)
+    assert first['data']['text'] == second['data']['text'] == '识别到3000字节音频'
+    assert xunfei_server.stats['sessions'] == 1
+
+    # 过期后重新识别
+    with app.app_context():
+        db.session.execute(update(TranscriptCache).values(expires_at=datetime.now() - timedelta(seconds=1)))
+        db.session.commit()
+    upload_audio(app, session_id, token, b'\x02' * 3000)
+    assert xunfei_server.stats['sessions'] == 2
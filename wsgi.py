@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+WSGI入口，供gunicorn使用:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from src.app import create_app
+
+app = create_app()